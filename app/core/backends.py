@@ -0,0 +1,276 @@
+import math
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import redis.asyncio as redis
+
+logger = logging.getLogger(__name__)
+
+# (key, encoded value, ttl in seconds or None)
+SetItem = Tuple[str, bytes, Optional[int]]
+
+# Merge fields into a hash without refreshing it. Initial fields and the
+# TTL only apply when the hash is created; dropped fields are removed from
+# an existing one.
+# ARGV: ttl, field count, initial field count, field/value pairs,
+# initial field/value pairs, fields to drop
+MERGE_HASH_SCRIPT = """
+local key = KEYS[1]
+local ttl = tonumber(ARGV[1])
+local fields = tonumber(ARGV[2]) * 2
+local initial = tonumber(ARGV[3]) * 2
+local created = redis.call('EXISTS', key) == 0
+for i = 4, 3 + fields, 2 do
+    redis.call('HSET', key, ARGV[i], ARGV[i + 1])
+end
+if created then
+    for i = 4 + fields, 3 + fields + initial, 2 do
+        redis.call('HSET', key, ARGV[i], ARGV[i + 1])
+    end
+    if ttl > 0 then
+        redis.call('EXPIRE', key, ttl)
+    end
+else
+    for i = 4 + fields + initial, #ARGV do
+        redis.call('HDEL', key, ARGV[i])
+    end
+end
+return created and 1 or 0
+"""
+
+class CacheBackend:
+    """Storage operations RedisCache needs from a backend.
+
+    TTLs are reported like Redis TTL: seconds remaining, -1 for no expiry,
+    -2 for a missing key.
+    """
+
+    name = "base"
+
+    async def get_many(self, keys: List[str]) -> List[Tuple[Optional[bytes], int]]:
+        raise NotImplementedError
+
+    async def set_many(self, items: List[SetItem]):
+        raise NotImplementedError
+
+    async def get_hash(self, key: str) -> Tuple[Dict[str, str], int]:
+        raise NotImplementedError
+
+    async def set_hash(self, key: str, mapping: Dict[str, str], ttl: Optional[int]):
+        raise NotImplementedError
+
+    async def merge_hash(self, key: str, mapping: Dict[str, str], initial: Dict[str, str], drop: List[str], ttl: Optional[int]) -> bool:
+        raise NotImplementedError
+
+    async def delete(self, keys: List[str]):
+        raise NotImplementedError
+
+    async def exists(self, key: str) -> bool:
+        raise NotImplementedError
+
+    async def set_nx(self, key: str, value: str, ttl: int) -> bool:
+        raise NotImplementedError
+
+    async def ping(self) -> bool:
+        raise NotImplementedError
+
+class RedisBackend(CacheBackend):
+    """Redis backend (shared by all workers)"""
+
+    name = "redis"
+
+    def __init__(self, url: str, socket_timeout: float = None):
+        # Hashes, counters and locks use a decoding client; cache values go
+        # through value_codec and may be binary, so they use a raw one
+        self.client = redis.from_url(
+            url,
+            encoding="utf-8",
+            decode_responses=True,
+            socket_timeout=socket_timeout,
+            socket_connect_timeout=socket_timeout
+        )
+        self.binary_client = redis.from_url(
+            url,
+            decode_responses=False,
+            socket_timeout=socket_timeout,
+            socket_connect_timeout=socket_timeout
+        )
+        self._merge_hash_script = self.client.register_script(MERGE_HASH_SCRIPT)
+
+    async def get_many(self, keys: List[str]) -> List[Tuple[Optional[bytes], int]]:
+        # Fetch remaining TTLs in the same round trip
+        pipe = self.binary_client.pipeline(transaction=False)
+        pipe.mget(keys)
+        for key in keys:
+            pipe.ttl(key)
+        values, *ttls = await pipe.execute()
+        return list(zip(values, ttls))
+
+    async def set_many(self, items: List[SetItem]):
+        pipe = self.binary_client.pipeline(transaction=False)
+        for key, value, ttl in items:
+            if ttl:
+                pipe.setex(key, ttl, value)
+            else:
+                pipe.set(key, value)
+        await pipe.execute()
+
+    async def get_hash(self, key: str) -> Tuple[Dict[str, str], int]:
+        pipe = self.client.pipeline(transaction=False)
+        pipe.hgetall(key)
+        pipe.ttl(key)
+        value, ttl = await pipe.execute()
+        return value, ttl
+
+    async def set_hash(self, key: str, mapping: Dict[str, str], ttl: Optional[int]):
+        # MULTI/EXEC so readers never observe a half-written table
+        pipe = self.client.pipeline(transaction=True)
+        pipe.delete(key)
+        pipe.hset(key, mapping=mapping)
+        if ttl:
+            pipe.expire(key, ttl)
+        await pipe.execute()
+
+    async def merge_hash(self, key: str, mapping: Dict[str, str], initial: Dict[str, str], drop: List[str], ttl: Optional[int]) -> bool:
+        args = [ttl or 0, len(mapping), len(initial)]
+        for fields in (mapping, initial):
+            for field, value in fields.items():
+                args.extend((field, value))
+        args.extend(drop)
+        return bool(await self._merge_hash_script(keys=[key], args=args, client=self.client))
+
+    async def delete(self, keys: List[str]):
+        await self.client.delete(*keys)
+
+    async def exists(self, key: str) -> bool:
+        return await self.client.exists(key) > 0
+
+    async def set_nx(self, key: str, value: str, ttl: int) -> bool:
+        return bool(await self.client.set(key, value, ex=ttl, nx=True))
+
+    async def ping(self) -> bool:
+        return bool(await self.client.ping())
+
+class MemoryBackend(CacheBackend):
+    """Bounded in-process backend used while Redis is unavailable.
+
+    Keeps encoded values with TTLs and evicts least recently used entries
+    once their approximate size exceeds max_bytes.
+    """
+
+    name = "memory"
+
+    # Rough per-entry bookkeeping cost on top of key and value sizes
+    ENTRY_OVERHEAD = 64
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.used_bytes = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Tuple[Optional[float], Any, int]]" = OrderedDict()
+
+    def _lookup(self, key: str) -> Optional[Tuple[Optional[float], Any, int]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] is not None and entry[0] <= time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _remaining(self, expires_at: Optional[float]) -> int:
+        if expires_at is None:
+            return -1
+        return max(1, math.ceil(expires_at - time.monotonic()))
+
+    def _store(self, key: str, value: Any, ttl: Optional[int], size: int):
+        self._remove(key)
+        size += len(key) + self.ENTRY_OVERHEAD
+        if size > self.max_bytes:
+            return
+
+        expires_at = time.monotonic() + ttl if ttl else None
+        self._entries[key] = (expires_at, value, size)
+        self.used_bytes += size
+        while self.used_bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.used_bytes -= entry[2]
+
+    def clear(self):
+        """Drop all entries"""
+        self._entries.clear()
+        self.used_bytes = 0
+
+    async def get_many(self, keys: List[str]) -> List[Tuple[Optional[bytes], int]]:
+        results = []
+        for key in keys:
+            entry = self._lookup(key)
+            if entry is None or not isinstance(entry[1], bytes):
+                results.append((None, -2))
+            else:
+                results.append((entry[1], self._remaining(entry[0])))
+        return results
+
+    async def set_many(self, items: List[SetItem]):
+        for key, value, ttl in items:
+            self._store(key, value, ttl, len(value))
+
+    async def get_hash(self, key: str) -> Tuple[Dict[str, str], int]:
+        entry = self._lookup(key)
+        if entry is None or not isinstance(entry[1], dict):
+            return {}, -2
+        return dict(entry[1]), self._remaining(entry[0])
+
+    async def set_hash(self, key: str, mapping: Dict[str, str], ttl: Optional[int]):
+        self._store_hash(key, dict(mapping), ttl)
+
+    async def merge_hash(self, key: str, mapping: Dict[str, str], initial: Dict[str, str], drop: List[str], ttl: Optional[int]) -> bool:
+        entry = self._lookup(key)
+        if entry is None or not isinstance(entry[1], dict):
+            self._store_hash(key, {**mapping, **initial}, ttl)
+            return True
+
+        value = dict(entry[1])
+        value.update(mapping)
+        for field in drop:
+            value.pop(field, None)
+        self._store_hash(key, value, self._remaining(entry[0]) if entry[0] is not None else None)
+        return False
+
+    def _store_hash(self, key: str, value: Dict[str, str], ttl: Optional[int]):
+        size = sum(len(field) + len(data) for field, data in value.items())
+        self._store(key, value, ttl, size)
+
+    async def delete(self, keys: List[str]):
+        for key in keys:
+            self._remove(key)
+
+    async def exists(self, key: str) -> bool:
+        return self._lookup(key) is not None
+
+    async def set_nx(self, key: str, value: str, ttl: int) -> bool:
+        if self._lookup(key) is not None:
+            return False
+        self._store(key, value, ttl, len(value))
+        return True
+
+    async def ping(self) -> bool:
+        return True
+
+    def get_stats(self) -> Dict:
+        """Get size and eviction counters"""
+        return {
+            "entries": len(self._entries),
+            "used_bytes": self.used_bytes,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions
+        }
@@ -1,70 +1,297 @@
-import redis.asyncio as redis
+from redis.exceptions import ConnectionError as RedisConnectionError, TimeoutError as RedisTimeoutError
 import json
 import logging
-from typing import Any, Optional, Dict
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Dict, List, Tuple
 from datetime import datetime, timedelta
 import pickle
 
 from app.core.config import settings
+from app.core.codec import value_codec
+from app.core.backends import CacheBackend, MemoryBackend, RedisBackend
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on how long one worker may hold a background refresh
+REFRESH_LOCK_TTL = 30
+
+class LocalCache:
+    """Bounded in-process TTL/LRU cache that sits in front of Redis.
+
+    Values are stored already decoded, so callers must treat anything
+    returned from the cache as read-only.
+    """
+    
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Get value if present and not expired"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        
+        self._entries.move_to_end(key)
+        return value
+    
+    def set(self, key: str, value: Any, ttl: float):
+        """Store value for ttl seconds, evicting least recently used entries"""
+        if self.max_entries <= 0 or not ttl or ttl <= 0:
+            return
+        
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    def delete(self, key: str):
+        """Drop a single entry"""
+        self._entries.pop(key, None)
+    
+    def clear(self):
+        """Drop all entries"""
+        self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
 class RedisCache:
+    """Two-layer cache: in-process LocalCache in front of a shared backend.
+
+    The backend is Redis while it is reachable. When a Redis call fails with
+    a connection error, the bounded MemoryBackend takes over and Redis is
+    probed again every REDIS_RETRY_INTERVAL seconds; once it answers, traffic
+    moves back and the fallback is emptied.
+    """
+    
     def __init__(self):
-        self.redis_client = None
+        self.redis_backend: Optional[RedisBackend] = None
+        self.memory_backend = MemoryBackend(settings.MEMORY_CACHE_MAX_BYTES)
+        self.codec = value_codec
+        self.local_cache = LocalCache(settings.LOCAL_CACHE_MAX_ENTRIES)
+        self.stats = {
+            "local_hits": 0,
+            "local_misses": 0,
+            "redis_hits": 0,
+            "redis_misses": 0,
+            "fallback_ops": 0,
+            "failovers": 0
+        }
+        self._redis_down_since: Optional[float] = None
+        self._next_retry = 0.0
         self._connect()
     
     def _connect(self):
         """Initialize Redis connection"""
         try:
-            self.redis_client = redis.from_url(
-                settings.REDIS_URL,
-                encoding="utf-8",
-                decode_responses=True
-            )
+            self.redis_backend = RedisBackend(settings.REDIS_URL, settings.REDIS_SOCKET_TIMEOUT)
             logger.info("Redis connection established")
         except Exception as e:
             logger.error(f"Failed to connect to Redis: {e}")
-            # Fallback to in-memory cache for development
-            self.redis_client = None
+            # Fallback to in-memory cache until Redis can be reached
+            self.redis_backend = None
+            self._mark_down(e)
+    
+    @property
+    def available(self) -> bool:
+        """Whether Redis is currently serving cache traffic"""
+        return self.redis_backend is not None and self._redis_down_since is None
+    
+    @property
+    def redis_client(self):
+        """Text Redis client, or None while Redis is unavailable"""
+        return self.redis_backend.client if self.available else None
+    
+    @property
+    def binary_client(self):
+        """Raw Redis client for encoded values, or None while Redis is unavailable"""
+        return self.redis_backend.binary_client if self.available else None
+    
+    def _mark_down(self, error: Exception):
+        """Switch to the in-memory backend"""
+        now = time.monotonic()
+        if self._redis_down_since is None:
+            logger.warning(f"Redis unavailable, using in-memory cache: {error}")
+            self.stats["failovers"] += 1
+            self._redis_down_since = now
+        self._next_retry = now + settings.REDIS_RETRY_INTERVAL
+    
+    async def _backend(self) -> CacheBackend:
+        """Pick the backend for the next operation, probing Redis when due"""
+        if self.available:
+            return self.redis_backend
+        
+        now = time.monotonic()
+        if now >= self._next_retry:
+            # Due before the probe is awaited, so concurrent requests do not
+            # each send their own ping to an unresponsive Redis
+            self._next_retry = now + settings.REDIS_RETRY_INTERVAL
+            if self.redis_backend is None:
+                self._connect()
+            try:
+                if self.redis_backend is not None and await self.redis_backend.ping():
+                    logger.info("Redis reachable again, leaving in-memory cache")
+                    self._redis_down_since = None
+                    self.memory_backend.clear()
+                    return self.redis_backend
+            except Exception as e:
+                self._mark_down(e)
+        
+        return self.memory_backend
+    
+    async def _run(self, operation: str, *args):
+        """Run a backend operation, failing over to memory on connection errors"""
+        backend = await self._backend()
+        if backend is self.redis_backend:
+            try:
+                return await getattr(backend, operation)(*args)
+            except (RedisConnectionError, RedisTimeoutError, OSError) as e:
+                self._mark_down(e)
+        
+        self.stats["fallback_ops"] += 1
+        return await getattr(self.memory_backend, operation)(*args)
     
     async def get(self, key: str) -> Optional[Any]:
-        """Get value from cache"""
-        if not self.redis_client:
-            return None
+        """Get value from cache (in-process layer first, then Redis)"""
+        found = await self.get_many([key])
+        return found.get(key)
+    
+    async def set(self, key: str, value: Any, ttl: int = None) -> bool:
+        """Set value in cache with optional TTL"""
+        return await self.set_many({key: value}, ttl)
+    
+    async def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """Get several values in one round trip (local layer first, then MGET)
+
+        Returns only the keys that were found.
+        """
+        found = {}
+        missing = []
+        for key in keys:
+            value = self.local_cache.get(key)
+            if value is not None:
+                self.stats["local_hits"] += 1
+                found[key] = value
+            else:
+                self.stats["local_misses"] += 1
+                missing.append(key)
+        
+        if not missing:
+            return found
+        
+        try:
+            results = await self._run("get_many", missing)
+            for key, (value, ttl) in zip(missing, results):
+                if not value:
+                    self.stats["redis_misses"] += 1
+                    continue
+                self.stats["redis_hits"] += 1
+                decoded = self.codec.decode(value)
+                # Never keep the local copy longer than the shared entry
+                if ttl and ttl > 0:
+                    self.local_cache.set(key, decoded, ttl)
+                found[key] = decoded
+        except Exception as e:
+            logger.error(f"Error getting from cache: {e}")
+        return found
+    
+    async def set_many(self, items: Dict[str, Any], ttl: int = None, ttls: Dict[str, int] = None) -> bool:
+        """Set several values in one pipelined round trip
+
+        ttls overrides the shared ttl for individual keys.
+        """
+        if not items:
+            return True
+        
+        ttls = ttls or {}
+        for key, value in items.items():
+            # Entries without a TTL are never kept locally, other workers
+            # could not invalidate them
+            self.local_cache.delete(key)
+            key_ttl = ttls.get(key, ttl)
+            if key_ttl:
+                self.local_cache.set(key, value, key_ttl)
         
         try:
-            value = await self.redis_client.get(key)
+            await self._run("set_many", [
+                (key, self.codec.encode(value), ttls.get(key, ttl))
+                for key, value in items.items()
+            ])
+            return True
+        except Exception as e:
+            logger.error(f"Error setting cache: {e}")
+            return False
+    
+    async def get_hash(self, key: str) -> Optional[Dict[str, str]]:
+        """Get all fields of a hash (in-process layer first, then Redis)"""
+        value = self.local_cache.get(key)
+        if value is not None:
+            self.stats["local_hits"] += 1
+            return value
+        self.stats["local_misses"] += 1
+        
+        try:
+            value, ttl = await self._run("get_hash", key)
             if value:
-                return json.loads(value)
+                self.stats["redis_hits"] += 1
+                if ttl and ttl > 0:
+                    self.local_cache.set(key, value, ttl)
+                return value
+            self.stats["redis_misses"] += 1
             return None
         except Exception as e:
-            logger.error(f"Error getting from cache: {e}")
+            logger.error(f"Error getting hash from cache: {e}")
             return None
     
-    async def set(self, key: str, value: Any, ttl: int = None) -> bool:
-        """Set value in cache with optional TTL"""
-        if not self.redis_client:
+    async def set_hash(self, key: str, mapping: Dict[str, str], ttl: int = None) -> bool:
+        """Replace a hash with optional TTL"""
+        self.local_cache.delete(key)
+        if ttl:
+            self.local_cache.set(key, dict(mapping), ttl)
+        
+        try:
+            await self._run("set_hash", key, mapping, ttl)
+            return True
+        except Exception as e:
+            logger.error(f"Error setting hash in cache: {e}")
             return False
+    
+    async def merge_hash(self, key: str, mapping: Dict[str, str], ttl: int = None, initial: Dict[str, str] = None, drop: List[str] = None) -> bool:
+        """Merge fields into a hash without refreshing it
         
+        initial fields and ttl only apply if the hash does not exist yet;
+        drop fields are removed from an existing one.
+        """
+        self.local_cache.delete(key)
         try:
-            serialized_value = json.dumps(value, default=str)
-            if ttl:
-                await self.redis_client.setex(key, ttl, serialized_value)
-            else:
-                await self.redis_client.set(key, serialized_value)
+            await self._run("merge_hash", key, mapping, initial or {}, drop or [], ttl)
             return True
         except Exception as e:
-            logger.error(f"Error setting cache: {e}")
+            logger.error(f"Error merging hash in cache: {e}")
             return False
     
     async def delete(self, key: str) -> bool:
         """Delete key from cache"""
-        if not self.redis_client:
+        return await self.delete_many([key])
+    
+    async def delete_many(self, keys: List[str]) -> bool:
+        """Delete several keys in one round trip"""
+        for key in keys:
+            self.local_cache.delete(key)
+        if not keys:
             return False
         
         try:
-            await self.redis_client.delete(key)
+            await self._run("delete", keys)
             return True
         except Exception as e:
             logger.error(f"Error deleting from cache: {e}")
@@ -72,26 +299,46 @@ class RedisCache:
     
     async def exists(self, key: str) -> bool:
         """Check if key exists in cache"""
-        if not self.redis_client:
-            return False
-        
         try:
-            return await self.redis_client.exists(key) > 0
+            return await self._run("exists", key)
         except Exception as e:
             logger.error(f"Error checking cache existence: {e}")
             return False
     
+    async def try_lock(self, key: str, ttl: int) -> bool:
+        """Acquire a short-lived lock shared by all workers (SET NX)"""
+        try:
+            return await self._run("set_nx", key, "1", ttl)
+        except Exception as e:
+            logger.error(f"Error acquiring cache lock: {e}")
+            return True
+    
     async def ping(self) -> bool:
         """Ping Redis server"""
-        if not self.redis_client:
+        backend = await self._backend()
+        if backend is not self.redis_backend:
             return False
         
         try:
-            await self.redis_client.ping()
-            return True
+            return await self.redis_backend.ping()
         except Exception as e:
             logger.error(f"Redis ping failed: {e}")
+            self._mark_down(e)
             return False
+    
+    def get_layer_stats(self) -> Dict:
+        """Get hit/miss counters for the local and Redis layers"""
+        lookups = self.stats["local_hits"] + self.stats["local_misses"]
+        return {
+            **self.stats,
+            "backend": "redis" if self.available else "memory",
+            "local_entries": len(self.local_cache),
+            "local_evictions": self.local_cache.evictions,
+            "local_hit_ratio": round(self.stats["local_hits"] / lookups, 4) if lookups else 0.0,
+            "redis_round_trips_saved": self.stats["local_hits"],
+            "memory_backend": self.memory_backend.get_stats(),
+            "codec": self.codec.describe()
+        }
 
 # Global cache instance
 redis_client = RedisCache()
@@ -102,10 +349,9 @@ class CacheKeys:
     """Cache key constants"""
     
     @staticmethod
-    def forex_latest(base: str, symbols: str = None) -> str:
-        """Forex latest rates cache key"""
-        symbols_str = symbols or "default"
-        return f"forex:latest:{base}:{symbols_str}"
+    def forex_latest(base: str) -> str:
+        """Forex latest rates cache key (hash of symbol -> rate for base)"""
+        return f"forex:latest:{base}"
     
     @staticmethod
     def forex_historical(date: str, base: str, symbols: str = None) -> str:
@@ -113,22 +359,42 @@ class CacheKeys:
         symbols_str = symbols or "default"
         return f"forex:historical:{date}:{base}:{symbols_str}"
     
+    @staticmethod
+    def forex_pair(base: str, symbol: str) -> str:
+        """Single fallback-source rate for a currency pair"""
+        return f"forex:pair:{base}:{symbol}"
+    
+    @staticmethod
+    def forex_view(base: str) -> str:
+        """Latest rates of one base derived from the anchor table"""
+        return f"forex:view:{base}"
+    
+    @staticmethod
+    def forex_refresh_stats() -> str:
+        """Stats of the last scheduled forex refresh"""
+        return "forex:refresh_stats"
+    
+    @staticmethod
+    def forex_day(base: str, date: str) -> str:
+        """Full rate table of one past day (time series store)"""
+        return f"forex:day:{base}:{date}"
+    
     @staticmethod
     def forex_convert(from_curr: str, to_curr: str) -> str:
         """Forex conversion cache key"""
         return f"forex:convert:{from_curr}:{to_curr}"
     
     @staticmethod
-    def crypto_latest(symbols: str = None) -> str:
-        """Crypto latest prices cache key"""
-        symbols_str = symbols or "default"
-        return f"crypto:latest:{symbols_str}"
+    def crypto_latest(coin_id: str = None) -> str:
+        """Crypto latest price cache key (one entry per coin)"""
+        coin_str = coin_id or "default"
+        return f"crypto:latest:{coin_str}"
     
     @staticmethod
-    def crypto_historical(date: str, symbols: str = None) -> str:
-        """Crypto historical prices cache key"""
-        symbols_str = symbols or "default"
-        return f"crypto:historical:{date}:{symbols_str}"
+    def crypto_historical(date: str, coin_id: str = None) -> str:
+        """Crypto historical price cache key (one entry per date and coin)"""
+        coin_str = coin_id or "default"
+        return f"crypto:historical:{date}:{coin_str}"
     
     @staticmethod
     def crypto_marketcap(symbols: str = None) -> str:
@@ -136,11 +402,46 @@ class CacheKeys:
         symbols_str = symbols or "default"
         return f"crypto:marketcap:{symbols_str}"
     
+    @staticmethod
+    def refresh_lock(key: str) -> str:
+        """Background refresh lock for a cache key"""
+        return f"lock:refresh:{key}"
+    
+    @staticmethod
+    def circuit_breaker(provider: str) -> str:
+        """Open-until time of a tripped provider circuit"""
+        return f"circuit:{provider}"
+    
+    @staticmethod
+    def circuit_probe(provider: str) -> str:
+        """Lock held by the worker probing a half-open circuit"""
+        return f"circuit:{provider}:probe"
+    
+    @staticmethod
+    def provider_calls(provider: str, month: str) -> str:
+        """Upstream calls made to a metered provider during a month"""
+        return f"provider_calls:{provider}:{month}"
+    
     @staticmethod
     def rate_limit(client_ip: str, endpoint: str) -> str:
         """Rate limit cache key"""
         return f"ratelimit:{client_ip}:{endpoint}"
     
+    @staticmethod
+    def rate_limit_endpoints(client_ip: str) -> str:
+        """Set of endpoints a client has called today"""
+        return f"ratelimit_meta:endpoints:{client_ip}"
+    
+    @staticmethod
+    def rate_limit_clients(day_start: int) -> str:
+        """HyperLogLog of clients seen during a day"""
+        return f"ratelimit_meta:clients:{day_start}"
+    
+    @staticmethod
+    def rate_limit_requests(day_start: int) -> str:
+        """Request counter for a day"""
+        return f"ratelimit_meta:requests:{day_start}"
+    
     @staticmethod
     def api_usage(client_ip: str) -> str:
         """API usage tracking cache key"""
@@ -149,28 +450,132 @@ class CacheKeys:
 # ==================== CACHE UTILITIES ====================
 
 async def get_cached_forex_rates(base: str, symbols: list = None) -> Optional[Dict]:
-    """Get cached forex rates"""
-    symbols_str = ",".join(symbols) if symbols else None
-    key = CacheKeys.forex_latest(base, symbols_str)
-    return await redis_client.get(key)
+    """Get cached forex rates, sliced from the canonical table for base"""
+    table = await redis_client.get_hash(CacheKeys.forex_latest(base))
+    if not table or "_date" not in table:
+        return None
+    
+    # A complete table came from a full upstream fetch, so symbols missing
+    # from it are unknown upstream too and do not count as a miss
+    complete = table.get("_complete") == "1"
+    wanted = symbols or [field for field in table if not field.startswith("_")]
+    
+    rates = {}
+    for symbol in wanted:
+        value = table.get(symbol)
+        if value is None:
+            if not complete:
+                return None
+            continue
+        rates[symbol] = float(value)
+    
+    return {
+        "success": True,
+        "base": base,
+        "date": table["_date"],
+        "rates": rates
+    }
 
-async def set_cached_forex_rates(base: str, rates: Dict, symbols: list = None) -> bool:
-    """Set cached forex rates"""
-    symbols_str = ",".join(symbols) if symbols else None
-    key = CacheKeys.forex_latest(base, symbols_str)
-    return await redis_client.set(key, rates, settings.FOREX_CACHE_TTL)
+async def get_cached_forex_table(base: str) -> Optional[Dict[str, str]]:
+    """Get the raw canonical table for base (symbol -> rate plus _meta fields)"""
+    return await redis_client.get_hash(CacheKeys.forex_latest(base))
 
-async def get_cached_crypto_prices(symbols: list = None) -> Optional[Dict]:
-    """Get cached crypto prices"""
-    symbols_str = ",".join(symbols) if symbols else None
-    key = CacheKeys.crypto_latest(symbols_str)
-    return await redis_client.get(key)
+async def set_cached_forex_rates(base: str, rates: Dict, complete: bool = False) -> bool:
+    """Store forex rates in the canonical table for base
 
-async def set_cached_crypto_prices(prices: Dict, symbols: list = None) -> bool:
-    """Set cached crypto prices"""
-    symbols_str = ",".join(symbols) if symbols else None
-    key = CacheKeys.crypto_latest(symbols_str)
-    return await redis_client.set(key, prices, settings.CRYPTO_CACHE_TTL)
+    A complete table replaces whatever was cached; partial results (from
+    fallback sources) are merged into it.
+    """
+    mapping = {symbol: repr(float(rate)) for symbol, rate in rates.get("rates", {}).items()}
+    mapping["_updated_at"] = repr(time.time())
+    meta = {
+        "_date": rates.get("date") or datetime.now().strftime("%Y-%m-%d"),
+        "_fetched_at": repr(rates.get("fetched_at") or time.time())
+    }
+    
+    # Kept past FOREX_CACHE_TTL so stale rates can be served while refreshing
+    key = CacheKeys.forex_latest(base)
+    ttl = settings.FOREX_CACHE_TTL + settings.FOREX_STALE_TTL
+    if complete:
+        return await redis_client.set_hash(key, {**mapping, **meta, "_complete": "1"}, ttl)
+    
+    # A partial result cannot vouch for the rest of the table: it is no
+    # longer complete, and its date, age and TTL stay those of the last
+    # full fetch (or of this one if nothing was cached)
+    return await redis_client.merge_hash(key, mapping, ttl, initial=meta, drop=["_complete"])
+
+async def get_cached_crypto_prices(symbols: list) -> Optional[Dict]:
+    """Get cached crypto prices as {"data": ..., "fetched_at": ...}
+
+    Every coin is its own cache entry, read with a single MGET. Returns None
+    unless all requested coins are cached; fetched_at is the oldest one.
+    """
+    keys = {coin_id: CacheKeys.crypto_latest(coin_id) for coin_id in symbols}
+    entries = await redis_client.get_many(list(keys.values()))
+    
+    data = {}
+    fetched_at = None
+    for coin_id, key in keys.items():
+        entry = entries.get(key)
+        if not entry or "fetched_at" not in entry:
+            return None
+        # Coins CoinGecko did not return are cached as None, not refetched
+        if entry["data"] is not None:
+            data[coin_id.upper()] = entry["data"]
+        fetched_at = entry["fetched_at"] if fetched_at is None else min(fetched_at, entry["fetched_at"])
+    
+    return {"data": data, "fetched_at": fetched_at}
+
+async def set_cached_crypto_prices(prices: Dict, symbols: list) -> bool:
+    """Set cached crypto prices, one entry per coin in a single pipeline"""
+    now = time.time()
+    items = {
+        CacheKeys.crypto_latest(coin_id): {"data": prices.get(coin_id.upper()), "fetched_at": now}
+        for coin_id in symbols
+    }
+    # Kept past CRYPTO_CACHE_TTL so stale prices can be served while refreshing
+    return await redis_client.set_many(items, settings.CRYPTO_CACHE_TTL + settings.CRYPTO_STALE_TTL)
+
+async def get_cached_forex_pairs(base: str, symbols: list) -> Dict[str, float]:
+    """Get the cached per-pair rates that are available"""
+    keys = {symbol: CacheKeys.forex_pair(base, symbol) for symbol in symbols}
+    entries = await redis_client.get_many(list(keys.values()))
+    return {symbol: entries[key] for symbol, key in keys.items() if entries.get(key) is not None}
+
+async def set_cached_forex_pairs(base: str, rates: Dict[str, float]) -> bool:
+    """Set per-pair rates, one entry per pair in a single pipeline"""
+    items = {CacheKeys.forex_pair(base, symbol): rate for symbol, rate in rates.items()}
+    return await redis_client.set_many(items, settings.FOREX_CACHE_TTL)
+
+async def get_cached_forex_view(base: str) -> Optional[Dict]:
+    """Get the derived latest rates of base ({"date", "rates", "fetched_at"})"""
+    return await redis_client.get(CacheKeys.forex_view(base))
+
+async def set_cached_forex_views(views: Dict[str, Dict]) -> bool:
+    """Store derived per-base views, one entry per base in a single pipeline"""
+    items = {CacheKeys.forex_view(base): view for base, view in views.items()}
+    # Same lifetime as the anchor table they are derived from
+    return await redis_client.set_many(items, settings.FOREX_CACHE_TTL + settings.FOREX_STALE_TTL)
+
+async def get_forex_refresh_stats() -> Optional[Dict]:
+    """Get the stats of the last scheduled forex refresh (any worker)"""
+    return await redis_client.get(CacheKeys.forex_refresh_stats())
+
+async def set_forex_refresh_stats(stats: Dict) -> bool:
+    """Share the stats of a scheduled forex refresh with every worker"""
+    # No TTL, so the entry is never kept in a worker's local layer
+    return await redis_client.set(CacheKeys.forex_refresh_stats(), stats)
+
+async def get_cached_forex_days(base: str, dates: list) -> Dict[str, Dict[str, float]]:
+    """Get stored day tables for the dates that are cached (one round trip)"""
+    keys = {day: CacheKeys.forex_day(base, day) for day in dates}
+    entries = await redis_client.get_many(list(keys.values()))
+    return {day: entries[key] for day, key in keys.items() if entries.get(key) is not None}
+
+async def set_cached_forex_days(base: str, days: Dict[str, Dict[str, float]]) -> bool:
+    """Store day tables, one entry per day in a single pipeline"""
+    items = {CacheKeys.forex_day(base, day): rates for day, rates in days.items()}
+    return await redis_client.set_many(items, settings.FOREX_DAY_CACHE_TTL)
 
 async def get_cached_historical_forex(date: str, base: str, symbols: list = None) -> Optional[Dict]:
     """Get cached historical forex rates"""
@@ -178,25 +583,28 @@ async def get_cached_historical_forex(date: str, base: str, symbols: list = None
     key = CacheKeys.forex_historical(date, base, symbols_str)
     return await redis_client.get(key)
 
-async def set_cached_historical_forex(date: str, base: str, rates: Dict, symbols: list = None) -> bool:
+async def set_cached_historical_forex(date: str, base: str, rates: Dict, symbols: list = None, ttl: int = None) -> bool:
     """Set cached historical forex rates"""
     symbols_str = ",".join(symbols) if symbols else None
     key = CacheKeys.forex_historical(date, base, symbols_str)
-    # Historical data cached longer (7 days)
-    return await redis_client.set(key, rates, 7 * 24 * 3600)
+    # Historical data cached longer (7 days) unless the day is not over
+    return await redis_client.set(key, rates, ttl or 7 * 24 * 3600)
 
-async def get_cached_historical_crypto(date: str, symbols: list = None) -> Optional[Dict]:
-    """Get cached historical crypto prices"""
-    symbols_str = ",".join(symbols) if symbols else None
-    key = CacheKeys.crypto_historical(date, symbols_str)
-    return await redis_client.get(key)
+async def get_cached_historical_crypto(date: str, symbols: list) -> Dict:
+    """Get cached historical crypto prices for the coins that are cached"""
+    keys = {coin_id: CacheKeys.crypto_historical(date, coin_id) for coin_id in symbols}
+    entries = await redis_client.get_many(list(keys.values()))
+    return {coin_id.upper(): entries[key] for coin_id, key in keys.items() if entries.get(key)}
 
-async def set_cached_historical_crypto(date: str, prices: Dict, symbols: list = None) -> bool:
-    """Set cached historical crypto prices"""
-    symbols_str = ",".join(symbols) if symbols else None
-    key = CacheKeys.crypto_historical(date, symbols_str)
+async def set_cached_historical_crypto(date: str, prices: Dict, symbols: list) -> bool:
+    """Set cached historical crypto prices, one entry per coin"""
+    items = {
+        CacheKeys.crypto_historical(date, coin_id): prices[coin_id.upper()]
+        for coin_id in symbols
+        if coin_id.upper() in prices
+    }
     # Historical crypto data cached for 30 days
-    return await redis_client.set(key, prices, 30 * 24 * 3600)
+    return await redis_client.set_many(items, 30 * 24 * 3600)
 
 async def clear_expired_cache():
     """Clear expired cache entries (called by scheduler)"""
@@ -210,11 +618,12 @@ async def get_cache_stats() -> Dict:
     """Get cache statistics"""
     try:
         if not redis_client.redis_client:
-            return {"status": "not_connected"}
+            return {"status": "not_connected", "layers": redis_client.get_layer_stats()}
         
         info = await redis_client.redis_client.info()
         return {
             "status": "connected",
+            "layers": redis_client.get_layer_stats(),
             "used_memory": info.get("used_memory_human", "N/A"),
             "connected_clients": info.get("connected_clients", 0),
             "total_commands_processed": info.get("total_commands_processed", 0),
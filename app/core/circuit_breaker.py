@@ -0,0 +1,224 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Tuple
+
+from app.core.config import settings
+from app.core.cache import redis_client, CacheKeys
+from app.core.latency import get_tracker
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# How long a worker trusts its copy of the shared breaker state
+SHARED_STATE_TTL = 1.0
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker for one upstream provider.
+
+    Outcomes are kept for CIRCUIT_WINDOW_SECONDS. Once the window holds at
+    least CIRCUIT_MIN_CALLS calls and CIRCUIT_ERROR_THRESHOLD of them failed,
+    the breaker opens for CIRCUIT_OPEN_SECONDS and calls are skipped. After
+    that a single probe call (one per cluster, via a Redis lock) decides
+    between closing and reopening.
+
+    The open-until time is stored in Redis, so when one worker trips the
+    breaker every other worker skips the provider too.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.state = CLOSED
+        self.open_until = 0.0
+        self.window: Deque[Tuple[float, bool]] = deque()
+        self.trips = 0
+        self._probing = False
+        self._synced_at = 0.0
+
+    async def call(self, fn: Callable[[], Awaitable[Any]], is_valid: Callable[[Any], bool]) -> Any:
+        """Run fn through the breaker; returns None without calling while open"""
+        if not await self.allow_request():
+            logger.debug(f"Circuit {self.name} is {self.state}, skipping call")
+            return None
+        probe = self.state == HALF_OPEN and self._probing
+
+        start = time.perf_counter()
+        ok = False
+        cancelled = False
+        try:
+            result = await fn()
+            ok = is_valid(result)
+            if ok:
+                get_tracker(self.name).record(time.perf_counter() - start)
+            return result
+        except asyncio.CancelledError:
+            # Cancelled (e.g. lost a hedged race); not the provider's fault.
+            # A cancelled probe gives the lock back so another call can probe.
+            cancelled = True
+            if probe:
+                self._probing = False
+                await self._release_probe()
+            raise
+        finally:
+            if not cancelled:
+                await self.record(ok, probe)
+
+    async def allow_request(self) -> bool:
+        """Whether a call may go to the provider now"""
+        await self._sync()
+        now = time.time()
+
+        if self.state == OPEN and now >= self.open_until:
+            self.state = HALF_OPEN
+        if self.state == OPEN:
+            return False
+        if self.state == HALF_OPEN:
+            if self._probing:
+                return False
+            self._probing = await redis_client.try_lock(
+                CacheKeys.circuit_probe(self.name), settings.CIRCUIT_OPEN_SECONDS
+            )
+            return self._probing
+        return True
+
+    async def record(self, ok: bool, probe: bool = False):
+        """Record the outcome of a call; only the probe's outcome ends half-open"""
+        now = time.time()
+        if probe:
+            self._probing = False
+            if ok:
+                await self._close()
+            else:
+                await self._trip(now)
+            return
+
+        self.window.append((now, ok))
+        self._prune(now)
+        if self.state == CLOSED and len(self.window) >= settings.CIRCUIT_MIN_CALLS:
+            if self.error_rate() >= settings.CIRCUIT_ERROR_THRESHOLD:
+                await self._trip(now)
+
+    def error_rate(self) -> float:
+        """Share of failed calls in the rolling window"""
+        self._prune(time.time())
+        if not self.window:
+            return 0.0
+        return sum(1 for _, ok in self.window if not ok) / len(self.window)
+
+    def health_score(self) -> float:
+        """0 (unusable) to 1 (healthy); the success rate, halved while half-open"""
+        if self.state == OPEN and time.time() < self.open_until:
+            return 0.0
+        score = 1.0 - self.error_rate()
+        if self.state == HALF_OPEN:
+            score *= 0.5
+        return score
+
+    def _prune(self, now: float):
+        cutoff = now - settings.CIRCUIT_WINDOW_SECONDS
+        while self.window and self.window[0][0] < cutoff:
+            self.window.popleft()
+
+    async def _trip(self, now: float):
+        self.state = OPEN
+        self.open_until = now + settings.CIRCUIT_OPEN_SECONDS
+        self.trips += 1
+        logger.warning(f"Circuit {self.name} opened for {settings.CIRCUIT_OPEN_SECONDS}s")
+        try:
+            if redis_client.redis_client:
+                # Kept past open_until so other workers also go half-open
+                # instead of straight back to closed
+                await redis_client.redis_client.set(
+                    CacheKeys.circuit_breaker(self.name),
+                    repr(self.open_until),
+                    ex=settings.CIRCUIT_OPEN_SECONDS + settings.CIRCUIT_WINDOW_SECONDS
+                )
+        except Exception as e:
+            logger.error(f"Error sharing circuit state for {self.name}: {e}")
+
+    async def _close(self):
+        self.state = CLOSED
+        self.window.clear()
+        logger.info(f"Circuit {self.name} closed")
+        try:
+            if redis_client.redis_client:
+                await redis_client.redis_client.delete(
+                    CacheKeys.circuit_breaker(self.name),
+                    CacheKeys.circuit_probe(self.name)
+                )
+        except Exception as e:
+            logger.error(f"Error sharing circuit state for {self.name}: {e}")
+
+    async def _release_probe(self):
+        try:
+            if redis_client.redis_client:
+                await redis_client.redis_client.delete(CacheKeys.circuit_probe(self.name))
+        except Exception as e:
+            logger.error(f"Error releasing circuit probe for {self.name}: {e}")
+
+    async def _sync(self):
+        """Adopt a trip recorded by another worker (at most once per SHARED_STATE_TTL)"""
+        now = time.time()
+        if now - self._synced_at < SHARED_STATE_TTL or not redis_client.redis_client:
+            return
+        self._synced_at = now
+        try:
+            value = await redis_client.redis_client.get(CacheKeys.circuit_breaker(self.name))
+        except Exception as e:
+            logger.error(f"Error reading circuit state for {self.name}: {e}")
+            return
+
+        if value is None:
+            if self.state == HALF_OPEN and not self._probing:
+                # Another worker's probe succeeded
+                self.state = CLOSED
+                self.window.clear()
+            return
+        open_until = float(value)
+        if self.state == CLOSED or open_until > self.open_until:
+            self.open_until = open_until
+            self.state = OPEN if now < open_until else HALF_OPEN
+
+    def get_stats(self) -> Dict:
+        """Get state, error rate and health score"""
+        return {
+            "state": self.state,
+            "error_rate": round(self.error_rate(), 3),
+            "calls": len(self.window),
+            "health": round(self.health_score(), 3),
+            "trips": self.trips
+        }
+
+# Provider name -> breaker
+circuit_breakers: Dict[str, CircuitBreaker] = {}
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Get (or create) the breaker for a provider"""
+    breaker = circuit_breakers.get(name)
+    if breaker is None:
+        breaker = circuit_breakers[name] = CircuitBreaker(name)
+    return breaker
+
+def order_by_health(names: List[str]) -> List[str]:
+    """Providers sorted by health score, then p95 latency, keeping the given order on ties
+
+    A provider without latency samples counts as the median of the others,
+    so the given order holds until there is evidence either way.
+    """
+    latencies = {name: get_tracker(name).percentile(95) for name in names}
+    sampled = sorted(latency for latency in latencies.values() if latency is not None)
+    neutral = sampled[len(sampled) // 2] if sampled else 0.0
+
+    def key(name: str) -> Tuple[float, float]:
+        latency = latencies[name]
+        return -get_breaker(name).health_score(), neutral if latency is None else latency
+
+    return sorted(names, key=key)
+
+def get_circuit_stats() -> Dict:
+    """Get stats for every breaker"""
+    return {name: breaker.get_stats() for name, breaker in circuit_breakers.items()}
@@ -0,0 +1,131 @@
+import json
+import logging
+import zlib
+from typing import Any, Dict
+
+from app.core.config import settings
+
+try:
+    import msgpack
+except ImportError:  # optional, only needed for CACHE_CODEC=msgpack
+    msgpack = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:  # optional, only needed for CACHE_COMPRESSION=lz4
+    lz4_frame = None
+
+logger = logging.getLogger(__name__)
+
+# Encoded values start with MAGIC | VERSION | codec id | compression id.
+# 0xFE can never start a UTF-8 JSON document, so values written before the
+# header existed are still read as plain JSON.
+MAGIC = 0xFE
+VERSION = 1
+HEADER_SIZE = 4
+
+class JSONCodec:
+    """Stdlib JSON (default, human readable in redis-cli)"""
+    id = 1
+    name = "json"
+
+    def dumps(self, value: Any) -> bytes:
+        return json.dumps(value, default=str, separators=(",", ":")).encode("utf-8")
+
+    def loads(self, data: bytes) -> Any:
+        return json.loads(data)
+
+class MsgpackCodec:
+    """MessagePack binary encoding"""
+    id = 2
+    name = "msgpack"
+
+    def dumps(self, value: Any) -> bytes:
+        return msgpack.packb(value, default=str, use_bin_type=True)
+
+    def loads(self, data: bytes) -> Any:
+        return msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+CODECS = {codec.id: codec for codec in (JSONCodec(), MsgpackCodec())}
+CODEC_IDS = {codec.name: codec.id for codec in CODECS.values()}
+
+COMPRESSION_IDS = {"none": 0, "zlib": 1, "lz4": 2}
+
+def _compress(compression_id: int, data: bytes) -> bytes:
+    if compression_id == 1:
+        return zlib.compress(data, 6)
+    if compression_id == 2:
+        return lz4_frame.compress(data)
+    return data
+
+def _decompress(compression_id: int, data: bytes) -> bytes:
+    if compression_id == 1:
+        return zlib.decompress(data)
+    if compression_id == 2:
+        if lz4_frame is None:
+            raise ValueError("lz4 compressed value but lz4 is not installed")
+        return lz4_frame.decompress(data)
+    return data
+
+class ValueCodec:
+    """Serialize cache values with a versioned header.
+
+    Writes use the configured codec/compression; reads dispatch on the
+    header, so keys written with different settings (e.g. during a rollout)
+    stay readable.
+    """
+
+    def __init__(self, codec: str = "json", compression: str = "none", min_compress_size: int = 1024):
+        if codec == "msgpack" and msgpack is None:
+            logger.warning("msgpack is not installed, falling back to JSON cache codec")
+            codec = "json"
+        if compression == "lz4" and lz4_frame is None:
+            logger.warning("lz4 is not installed, falling back to zlib cache compression")
+            compression = "zlib"
+
+        self.codec = CODECS[CODEC_IDS.get(codec, JSONCodec.id)]
+        self.compression_id = COMPRESSION_IDS.get(compression, 0)
+        self.min_compress_size = min_compress_size
+
+    def encode(self, value: Any) -> bytes:
+        """Encode a value for storage"""
+        payload = self.codec.dumps(value)
+
+        compression_id = 0
+        if self.compression_id and len(payload) >= self.min_compress_size:
+            payload = _compress(self.compression_id, payload)
+            compression_id = self.compression_id
+
+        return bytes((MAGIC, VERSION, self.codec.id, compression_id)) + payload
+
+    def decode(self, data: bytes) -> Any:
+        """Decode a stored value (headered or legacy plain JSON)"""
+        if isinstance(data, str):
+            return json.loads(data)
+        if not data or data[0] != MAGIC:
+            return json.loads(data)
+
+        version, codec_id, compression_id = data[1], data[2], data[3]
+        if version != VERSION or codec_id not in CODECS:
+            raise ValueError(f"Unsupported cache value header: v{version} codec {codec_id}")
+        if codec_id == MsgpackCodec.id and msgpack is None:
+            raise ValueError("msgpack encoded value but msgpack is not installed")
+
+        payload = _decompress(compression_id, data[HEADER_SIZE:])
+        return CODECS[codec_id].loads(payload)
+
+    def describe(self) -> Dict:
+        """Get the active write settings"""
+        compression = next(name for name, cid in COMPRESSION_IDS.items() if cid == self.compression_id)
+        return {
+            "codec": self.codec.name,
+            "compression": compression,
+            "min_compress_size": self.min_compress_size
+        }
+
+# Global codec configured from settings
+value_codec = ValueCodec(
+    settings.CACHE_CODEC,
+    settings.CACHE_COMPRESSION,
+    settings.CACHE_COMPRESSION_MIN_SIZE
+)
@@ -0,0 +1,172 @@
+import logging
+import os
+import re
+from contextlib import contextmanager
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process development only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Row 0 of every column; row n is EPOCH + n days
+EPOCH = date(1999, 1, 1)
+DTYPE = np.dtype("<f8")
+COLUMN_SUFFIX = ".f64"
+# Column marking days that were fetched, even if the source had no data
+COVERAGE_COLUMN = "_days"
+_COLUMN_NAME = re.compile(r"^[A-Za-z0-9_][A-Za-z0-9_.-]*$")
+
+def day_index(day: date) -> int:
+    """Row of a day in every column"""
+    return (day - EPOCH).days
+
+class ColumnarArchive:
+    """Append-only on-disk columns of daily values, read through memmap.
+
+    Each dataset is a directory holding one raw little-endian float64 file
+    per symbol, with one row per calendar day since EPOCH (NaN = no value).
+    Columns only grow, and a value is only written where the row is still
+    NaN. Reads return zero-copy slices of read-only memory maps, so every
+    worker shares the OS page cache instead of holding its own copy.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        # (dataset, symbol) -> (file size when mapped, map)
+        self._maps: Dict[Tuple[str, str], Tuple[int, np.memmap]] = {}
+
+    def _path(self, dataset: str, symbol: str = None) -> str:
+        if symbol is None:
+            return os.path.join(self.root, dataset)
+        return os.path.join(self.root, dataset, symbol + COLUMN_SUFFIX)
+
+    @contextmanager
+    def _lock(self, dataset: str):
+        """Exclusive lock across processes while a dataset is written"""
+        os.makedirs(self._path(dataset), exist_ok=True)
+        with open(os.path.join(self._path(dataset), ".lock"), "w") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def column(self, dataset: str, symbol: str) -> np.ndarray:
+        """Read-only map of a whole column (empty if it does not exist)"""
+        try:
+            size = os.path.getsize(self._path(dataset, symbol))
+        except OSError:
+            return np.empty(0, dtype=DTYPE)
+        if size < DTYPE.itemsize:
+            return np.empty(0, dtype=DTYPE)
+
+        cached = self._maps.get((dataset, symbol))
+        if cached is not None and cached[0] == size:
+            return cached[1]
+        # The file grew (or was never mapped): map it again at its new size
+        column = np.memmap(self._path(dataset, symbol), dtype=DTYPE, mode="r", shape=(size // DTYPE.itemsize,))
+        self._maps[(dataset, symbol)] = (size, column)
+        return column
+
+    def symbols(self, dataset: str) -> List[str]:
+        """Symbols with a column in the dataset"""
+        try:
+            names = os.listdir(self._path(dataset))
+        except OSError:
+            return []
+        return sorted(
+            name[:-len(COLUMN_SUFFIX)]
+            for name in names
+            if name.endswith(COLUMN_SUFFIX) and name != COVERAGE_COLUMN + COLUMN_SUFFIX
+        )
+
+    def read(self, dataset: str, symbol: str, start: date, end: date) -> np.ndarray:
+        """Values of start..end inclusive; a view, shorter if the column ends early"""
+        first, last = day_index(start), day_index(end) + 1
+        if first >= 0:
+            return self.column(dataset, symbol)[first:last]
+        # There are no rows before EPOCH: pad them with NaN so every value
+        # stays at its day's offset from start (a copy, not a view)
+        padding = np.full(min(-first, last - first), np.nan, dtype=DTYPE)
+        return np.concatenate((padding, self.column(dataset, symbol)[:max(0, last)]))
+
+    def coverage(self, dataset: str, start: date, end: date) -> np.ndarray:
+        """Boolean mask of the days in start..end that were archived"""
+        days = (end - start).days + 1
+        covered = np.zeros(days, dtype=bool)
+        values = self.read(dataset, COVERAGE_COLUMN, start, end)
+        covered[:len(values)] = ~np.isnan(values)
+        return covered
+
+    def write(self, dataset: str, days: Dict[str, Dict[str, Optional[float]]], mark_coverage: bool = True):
+        """Archive values by ISO day and symbol; existing values are kept"""
+        columns: Dict[str, Dict[int, float]] = {}
+        for day, values in days.items():
+            row = day_index(date.fromisoformat(day))
+            if row < 0:
+                continue
+            if mark_coverage:
+                columns.setdefault(COVERAGE_COLUMN, {})[row] = 1.0
+            for symbol, value in values.items():
+                if value is None or not _COLUMN_NAME.match(symbol):
+                    continue
+                columns.setdefault(symbol, {})[row] = float(value)
+        if not columns:
+            return
+
+        # Coverage goes last: readers take a covered day as fully written
+        coverage = columns.pop(COVERAGE_COLUMN, None)
+        with self._lock(dataset):
+            for symbol, rows in columns.items():
+                self._write_column(dataset, symbol, rows)
+            if coverage:
+                self._write_column(dataset, COVERAGE_COLUMN, coverage)
+
+    def _write_column(self, dataset: str, symbol: str, rows: Dict[int, float]):
+        path = self._path(dataset, symbol)
+        length = os.path.getsize(path) // DTYPE.itemsize if os.path.exists(path) else 0
+        needed = max(rows) + 1
+        if needed > length:
+            # Append: new rows start as NaN
+            with open(path, "ab") as column_file:
+                column_file.write(np.full(needed - length, np.nan, dtype=DTYPE).tobytes())
+
+        column = np.memmap(path, dtype=DTYPE, mode="r+", shape=(max(length, needed),))
+        idx = np.fromiter(rows.keys(), dtype=np.intp, count=len(rows))
+        values = np.fromiter(rows.values(), dtype=DTYPE, count=len(rows))
+        empty = np.isnan(column[idx])
+        column[idx[empty]] = values[empty]
+        column.flush()
+        del column
+
+    def get_stats(self) -> Dict:
+        """Get datasets with their column count and archived day count"""
+        try:
+            datasets = sorted(os.listdir(self.root))
+        except OSError:
+            return {}
+        return {
+            dataset: {
+                "columns": len(self.symbols(dataset)),
+                "days": int(np.count_nonzero(~np.isnan(self.column(dataset, COVERAGE_COLUMN))))
+            }
+            for dataset in datasets
+            if os.path.isdir(self._path(dataset))
+        }
+
+def archive_days(start: date, covered: np.ndarray) -> List[str]:
+    """ISO days of the set entries of a coverage mask starting at start"""
+    return [(start + timedelta(days=int(offset))).isoformat() for offset in np.flatnonzero(covered)]
+
+# Global archive (directories are created on first write)
+rate_archive = ColumnarArchive(settings.ARCHIVE_DIR) if settings.ARCHIVE_ENABLED else None
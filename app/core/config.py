@@ -19,20 +19,73 @@ class Settings(BaseSettings):
     REDIS_PORT: int = 6379
     REDIS_DB: int = 0
     REDIS_PASSWORD: Optional[str] = None
+    REDIS_SOCKET_TIMEOUT: float = 2.0  # Seconds, so an unreachable Redis fails fast
+    REDIS_RETRY_INTERVAL: int = 5  # Seconds between reconnect attempts while Redis is down
+    MEMORY_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # In-memory fallback cache while Redis is down
     
     # Rate Limiting
     RATE_LIMIT_PER_MINUTE: int = 60
     RATE_LIMIT_PER_HOUR: int = 1000
     RATE_LIMIT_PER_DAY: int = 10000
+    # fixed_window, sliding_window (weighted previous + current counter) or
+    # gcra (token bucket); the latter two smooth bursts at window boundaries
+    RATE_LIMIT_ALGORITHM: str = "fixed_window"
+    # exact checks Redis on every request; local admits from in-process
+    # allowances and reconciles with Redis every RATE_LIMIT_SYNC_INTERVAL_MS
+    # (fixed windows only, may over-admit by what other workers admit
+    # within one sync interval)
+    RATE_LIMIT_MODE: str = "exact"
+    RATE_LIMIT_SYNC_INTERVAL_MS: int = 250
+    # Local counters unused this long stop being synced and are dropped
+    RATE_LIMIT_IDLE_SECONDS: int = 10
     
     # Cache Configuration
     FOREX_CACHE_TTL: int = 86400  # 24 hours in seconds
     CRYPTO_CACHE_TTL: int = 300   # 5 minutes in seconds
+    # Stale-while-revalidate: past the TTL above, entries are served for this
+    # much longer while a single background task refreshes them
+    FOREX_STALE_TTL: int = 3600  # 1 hour
+    CRYPTO_STALE_TTL: int = 600   # 10 minutes
+    LOCAL_CACHE_MAX_ENTRIES: int = 1024  # In-process cache in front of Redis (0 disables)
+    CACHE_CODEC: str = "json"  # json | msgpack
+    CACHE_COMPRESSION: str = "none"  # none | zlib | lz4
+    CACHE_COMPRESSION_MIN_SIZE: int = 1024  # Only compress values at least this many bytes
+    
+    # Anchor currency for the forex cross-rate table; every other base is derived from it
+    FOREX_ANCHOR_CURRENCY: str = "USD"
+    FOREX_TIMESERIES_MAX_DAYS: int = 366  # Longest range /forex/timeseries serves
+    FOREX_DAY_CACHE_TTL: int = 30 * 24 * 3600  # Per-day anchor tables for time series
+    FOREX_BATCH_MAX_ITEMS: int = 1_000_000  # Conversions per /forex/convert/batch request
+    FOREX_BATCH_STREAM_CHUNK: int = 10_000  # Conversions per NDJSON line when streaming
+    FOREX_BATCH_ITEMS_PER_UNIT: int = 20_000  # Conversions per extra rate limit unit of a batch
+    # Days without a forex fixing; historical requests for them are answered
+    # with the previous business day's rates
+    FOREX_CLOSED_WEEKDAYS: list = [5, 6]  # Saturday, Sunday
+    FOREX_MAX_CLOSED_DAYS: int = 7  # Longest run of closed days walked back over
+    # Start the next forex provider in parallel if the current one has not
+    # answered after this long; None uses its observed latency percentile
+    FOREX_HEDGE_DELAY_MS: Optional[int] = None
+    FOREX_HEDGE_PERCENTILE: float = 95.0
+    FOREX_HEDGE_DEFAULT_DELAY_MS: int = 1500  # Until a provider has latency samples
+    
+    # Upstream circuit breakers (per provider, shared through Redis)
+    CIRCUIT_WINDOW_SECONDS: int = 60  # Rolling window of call outcomes
+    CIRCUIT_MIN_CALLS: int = 5  # Calls in the window before the error rate counts
+    CIRCUIT_ERROR_THRESHOLD: float = 0.5  # Error rate that opens the circuit
+    CIRCUIT_OPEN_SECONDS: int = 30  # Time before a half-open probe
+    
+    # Shared upstream HTTP client
+    HTTP_TIMEOUT: int = 10  # Seconds per request
+    HTTP_POOL_LIMIT: int = 100  # Open connections in total
+    HTTP_POOL_LIMIT_PER_HOST: int = 20
+    HTTP_DNS_CACHE_TTL: int = 300  # Seconds
+    HTTP_KEEPALIVE_TIMEOUT: int = 60  # Seconds an idle connection stays pooled
     
     # Data Sources
     ECB_API_URL: str = "https://api.exchangerate.host/latest"
     COINGECKO_API_URL: str = "https://api.coingecko.com/api/v3"
     YAHOO_FINANCE_BASE_URL: str = "https://finance.yahoo.com/quote"
+    YAHOO_FINANCE_CONCURRENCY: int = 8  # Parallel page loads when Yahoo is the fallback
     
     # External API Keys (optional)
     COINMARKETCAP_API_KEY: Optional[str] = None
@@ -49,6 +102,11 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str = "sqlite:///./liteforex_api.db"
+    HISTORY_STORE_ENABLED: bool = True  # Keep historical rates in the database permanently
+    HISTORY_STORE_BATCH_SIZE: int = 500  # Rows per INSERT batch
+    # Memory-mapped columnar archive of daily rates for range queries
+    ARCHIVE_ENABLED: bool = True
+    ARCHIVE_DIR: str = "./data/archive"
     
     # Logging
     LOG_LEVEL: str = "INFO"
@@ -0,0 +1,73 @@
+import bisect
+import logging
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Set
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class DateIndex:
+    """Sorted per-base index of the dates that have a forex fixing.
+
+    Days without a fixing are weekends (FOREX_CLOSED_WEEKDAYS) and the
+    holidays learned from upstream. A requested date resolves to the latest
+    fixing at or before it when only such closed days lie in between, so a
+    Saturday is answered with Friday's rates under Friday's cache key.
+    """
+
+    def __init__(self):
+        self._fixings: Dict[str, List[str]] = {}  # base -> sorted ISO dates
+        self._closed: Set[str] = set()  # Holidays are the same for every base
+        self._loaded: Set[str] = set()
+
+    def is_loaded(self, base: str) -> bool:
+        return base in self._loaded
+
+    def load(self, base: str, dates: Iterable[str]):
+        """Merge stored fixing dates of base into the index"""
+        self._fixings[base] = sorted(set(self._fixings.get(base, [])).union(dates))
+        self._loaded.add(base)
+
+    def add_fixing(self, base: str, day: str):
+        """Record that base has a fixing on day"""
+        fixings = self._fixings.setdefault(base, [])
+        i = bisect.bisect_left(fixings, day)
+        if i == len(fixings) or fixings[i] != day:
+            fixings.insert(i, day)
+
+    def mark_closed(self, day: str):
+        """Record that no fixing is published on day"""
+        self._closed.add(day)
+
+    def is_closed(self, day: date) -> bool:
+        """Whether day is a weekend or a known holiday"""
+        return day.weekday() in settings.FOREX_CLOSED_WEEKDAYS or day.isoformat() in self._closed
+
+    def resolve(self, base: str, day: date) -> str:
+        """ISO date of the fixing that answers day
+
+        Walks back over closed days (at most FOREX_MAX_CLOSED_DAYS) to the
+        last business day; a stored fixing in that span wins.
+        """
+        business_day = day
+        for _ in range(settings.FOREX_MAX_CLOSED_DAYS):
+            if not self.is_closed(business_day):
+                break
+            business_day -= timedelta(days=1)
+
+        fixings = self._fixings.get(base, [])
+        i = bisect.bisect_right(fixings, day.isoformat()) - 1
+        if i >= 0 and fixings[i] >= business_day.isoformat():
+            return fixings[i]
+        return business_day.isoformat()
+
+    def get_stats(self) -> Dict:
+        """Get indexed fixing counts per base and known holidays"""
+        return {
+            "fixings": {base: len(fixings) for base, fixings in self._fixings.items()},
+            "holidays": len(self._closed)
+        }
+
+# Global forex date index for this process
+forex_date_index = DateIndex()
@@ -0,0 +1,57 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+Attempt = Tuple[str, Callable[[], Awaitable[Any]]]
+
+async def hedged_race(
+    attempts: List[Attempt],
+    is_valid: Callable[[Any], bool],
+    hedge_delay: Callable[[str], float]
+) -> Tuple[Optional[str], Any]:
+    """Call providers in order, hedging slow ones.
+
+    The first provider starts immediately. If it has not answered within
+    hedge_delay(provider) seconds, or answers with an invalid result, the
+    next one starts in parallel. The first valid answer wins and every other
+    in-flight call is cancelled. Returns (provider, result), or (None, None)
+    when every provider failed or there was none to call.
+    """
+    if not attempts:
+        return None, None
+    queue = list(attempts)
+    running: Dict[asyncio.Task, str] = {}
+    last_started = None
+
+    def start_next():
+        nonlocal last_started
+        provider, fn = queue.pop(0)
+        running[asyncio.ensure_future(fn())] = provider
+        last_started = provider
+
+    start_next()
+    try:
+        while running:
+            timeout = hedge_delay(last_started) if queue else None
+            done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                logger.info(f"{last_started} slower than {timeout:.3f}s, hedging with {queue[0][0]}")
+                start_next()
+                continue
+
+            for task in done:
+                provider = running.pop(task)
+                if task.exception() is not None:
+                    logger.error(f"Provider {provider} failed: {task.exception()}")
+                elif is_valid(task.result()):
+                    return provider, task.result()
+
+            # Something failed; start the next provider right away
+            if queue:
+                start_next()
+        return None, None
+    finally:
+        for task in running:
+            task.cancel()
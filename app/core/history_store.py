@@ -0,0 +1,201 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional
+
+from sqlalchemy import (
+    Column,
+    Float,
+    Index,
+    MetaData,
+    String,
+    Table,
+    and_,
+    create_engine,
+    select
+)
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+metadata = MetaData()
+
+# Historical rates never change, so rows are only ever inserted
+forex_rates = Table(
+    "forex_rates",
+    metadata,
+    Column("date", String(10), primary_key=True),  # ISO date, sorts chronologically
+    Column("base", String(8), primary_key=True),
+    Column("symbol", String(8), primary_key=True),
+    Column("rate", Float, nullable=False),
+    Index("ix_forex_rates_base_symbol_date", "base", "symbol", "date")
+)
+
+crypto_prices = Table(
+    "crypto_prices",
+    metadata,
+    Column("date", String(10), primary_key=True),
+    Column("coin", String(64), primary_key=True),
+    Column("price", Float),
+    Column("market_cap", Float),
+    Column("volume_24h", Float),
+    Index("ix_crypto_prices_coin_date", "coin", "date")
+)
+
+def _insert_ignore(engine: Engine, table: Table):
+    """INSERT that skips rows whose key already exists"""
+    if engine.dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        return insert(table).on_conflict_do_nothing()
+    if engine.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+        return insert(table).on_conflict_do_nothing()
+    return table.insert().prefix_with("IGNORE")
+
+class HistoryStore:
+    """Append-only store of historical forex and crypto rates on DATABASE_URL.
+
+    Blocking database work runs in a thread via asyncio.to_thread. Errors
+    are logged and treated as misses, so the store never fails a request.
+    """
+
+    def __init__(self, url: str, batch_size: int = 500):
+        self.url = url
+        self.batch_size = batch_size
+        self._engine: Optional[Engine] = None
+
+    def _get_engine(self) -> Engine:
+        if self._engine is None:
+            connect_args = {"check_same_thread": False} if self.url.startswith("sqlite") else {}
+            self._engine = create_engine(self.url, connect_args=connect_args)
+            metadata.create_all(self._engine)
+        return self._engine
+
+    def _insert(self, table: Table, rows: List[Dict]):
+        """Insert rows in batches of batch_size, one transaction"""
+        engine = self._get_engine()
+        statement = _insert_ignore(engine, table)
+        with engine.begin() as connection:
+            for start in range(0, len(rows), self.batch_size):
+                connection.execute(statement, rows[start:start + self.batch_size])
+
+    def close(self):
+        """Release pooled database connections"""
+        if self._engine is not None:
+            self._engine.dispose()
+            self._engine = None
+
+    # ==================== FOREX ====================
+
+    def _get_forex(self, date: str, base: str, symbols: Optional[List[str]]) -> Dict[str, float]:
+        query = select(forex_rates.c.symbol, forex_rates.c.rate).where(
+            and_(forex_rates.c.date == date, forex_rates.c.base == base)
+        )
+        if symbols:
+            query = query.where(forex_rates.c.symbol.in_(symbols))
+        with self._get_engine().connect() as connection:
+            return {symbol: rate for symbol, rate in connection.execute(query)}
+
+    def _get_forex_range(self, base: str, start: str, end: str, symbols: Optional[List[str]]) -> Dict[str, Dict[str, float]]:
+        query = select(forex_rates.c.date, forex_rates.c.symbol, forex_rates.c.rate).where(
+            and_(forex_rates.c.base == base, forex_rates.c.date >= start, forex_rates.c.date <= end)
+        )
+        if symbols:
+            query = query.where(forex_rates.c.symbol.in_(symbols))
+        days: Dict[str, Dict[str, float]] = {}
+        with self._get_engine().connect() as connection:
+            for day, symbol, rate in connection.execute(query.order_by(forex_rates.c.date)):
+                days.setdefault(day, {})[symbol] = rate
+        return days
+
+    def _get_forex_dates(self, base: str) -> List[str]:
+        query = select(forex_rates.c.date).where(forex_rates.c.base == base).distinct().order_by(forex_rates.c.date)
+        with self._get_engine().connect() as connection:
+            return [day for (day,) in connection.execute(query)]
+
+    async def get_forex(self, date: str, base: str, symbols: List[str] = None) -> Dict[str, float]:
+        """Get stored rates of one day against base"""
+        try:
+            return await asyncio.to_thread(self._get_forex, date, base, symbols)
+        except Exception as e:
+            logger.error(f"Error reading forex history: {e}")
+            return {}
+
+    async def get_forex_range(self, base: str, start: str, end: str, symbols: List[str] = None) -> Dict[str, Dict[str, float]]:
+        """Get stored rates for an inclusive date range (date -> symbol -> rate)"""
+        try:
+            return await asyncio.to_thread(self._get_forex_range, base, start, end, symbols)
+        except Exception as e:
+            logger.error(f"Error reading forex history: {e}")
+            return {}
+
+    async def get_forex_dates(self, base: str) -> List[str]:
+        """Get the sorted dates with stored rates against base"""
+        try:
+            return await asyncio.to_thread(self._get_forex_dates, base)
+        except Exception as e:
+            logger.error(f"Error reading forex history: {e}")
+            return []
+
+    async def put_forex(self, date: str, base: str, rates: Dict[str, float]):
+        """Store one day's rates against base"""
+        await self.put_forex_days(base, {date: rates})
+
+    async def put_forex_days(self, base: str, days: Dict[str, Dict[str, float]]):
+        """Store several days' rates against base (date -> symbol -> rate) in one transaction"""
+        rows = [
+            {"date": date, "base": base, "symbol": symbol, "rate": float(rate)}
+            for date, rates in days.items()
+            for symbol, rate in rates.items()
+            if rate is not None
+        ]
+        if not rows:
+            return
+        try:
+            await asyncio.to_thread(self._insert, forex_rates, rows)
+        except Exception as e:
+            logger.error(f"Error writing forex history: {e}")
+
+    # ==================== CRYPTO ====================
+
+    def _get_crypto(self, date: str, coins: List[str]) -> Dict[str, Dict]:
+        query = select(crypto_prices).where(
+            and_(crypto_prices.c.date == date, crypto_prices.c.coin.in_(coins))
+        )
+        with self._get_engine().connect() as connection:
+            return {
+                row.coin: {"price": row.price, "market_cap": row.market_cap, "volume_24h": row.volume_24h}
+                for row in connection.execute(query)
+            }
+
+    async def get_crypto(self, date: str, coins: List[str]) -> Dict[str, Dict]:
+        """Get stored prices of coins (upper-case ids) for one day"""
+        try:
+            return await asyncio.to_thread(self._get_crypto, date, coins)
+        except Exception as e:
+            logger.error(f"Error reading crypto history: {e}")
+            return {}
+
+    async def put_crypto(self, date: str, prices: Dict[str, Dict]):
+        """Store one day's prices keyed by upper-case coin id"""
+        rows = [
+            {
+                "date": date,
+                "coin": coin,
+                "price": data.get("price"),
+                "market_cap": data.get("market_cap"),
+                "volume_24h": data.get("volume_24h")
+            }
+            for coin, data in prices.items()
+            if data
+        ]
+        if not rows:
+            return
+        try:
+            await asyncio.to_thread(self._insert, crypto_prices, rows)
+        except Exception as e:
+            logger.error(f"Error writing crypto history: {e}")
+
+# Global history store (the database is created on first use)
+history_store = HistoryStore(settings.DATABASE_URL, settings.HISTORY_STORE_BATCH_SIZE) if settings.HISTORY_STORE_ENABLED else None
@@ -0,0 +1,88 @@
+import asyncio
+import ssl
+import logging
+from typing import Dict, Optional
+
+import aiohttp
+
+from app.core.config import settings
+from app.core.request_cost import upstream_trace_config
+
+logger = logging.getLogger(__name__)
+
+class HTTPClientManager:
+    """One aiohttp session and connection pool shared by every service.
+
+    Created in the app lifespan (or lazily on first use) and closed at
+    shutdown. A single SSL context is shared so TLS sessions can be resumed,
+    and pooled keep-alive connections are reused across requests.
+    """
+
+    def __init__(self):
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._ssl_context = ssl.create_default_context()
+        self.stats = {
+            "requests": 0,
+            "connections_created": 0,
+            "connections_reused": 0
+        }
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_request_start(session, context, params):
+            self.stats["requests"] += 1
+
+        async def on_connection_create_end(session, context, params):
+            self.stats["connections_created"] += 1
+
+        async def on_connection_reuseconn(session, context, params):
+            self.stats["connections_reused"] += 1
+
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        return trace_config
+
+    async def start(self) -> aiohttp.ClientSession:
+        """Create the session if it is not open yet (or belongs to another event loop)"""
+        if (
+            self._session is None
+            or self._session.closed
+            or self._session._loop is not asyncio.get_running_loop()
+        ):
+            connector = aiohttp.TCPConnector(
+                limit=settings.HTTP_POOL_LIMIT,
+                limit_per_host=settings.HTTP_POOL_LIMIT_PER_HOST,
+                ttl_dns_cache=settings.HTTP_DNS_CACHE_TTL,
+                keepalive_timeout=settings.HTTP_KEEPALIVE_TIMEOUT,
+                ssl=self._ssl_context
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=settings.HTTP_TIMEOUT),
+                trace_configs=[self._trace_config(), upstream_trace_config()]
+            )
+        return self._session
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """Get the shared session"""
+        return await self.start()
+
+    async def close(self):
+        """Close the session and its pooled connections"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def get_stats(self) -> Dict:
+        """Get request and connection counters with the reuse ratio"""
+        connections = self.stats["connections_created"] + self.stats["connections_reused"]
+        return {
+            **self.stats,
+            "reuse_ratio": round(self.stats["connections_reused"] / connections, 3) if connections else None,
+            "open": self._session is not None and not self._session.closed
+        }
+
+# Global HTTP client shared by the services in this process
+http_client = HTTPClientManager()
@@ -0,0 +1,47 @@
+import logging
+from collections import deque
+from typing import Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class LatencyTracker:
+    """Rolling window of recent latencies for one upstream provider"""
+
+    def __init__(self, window: int = 200):
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.count = 0
+
+    def record(self, seconds: float):
+        """Add one observed latency"""
+        self.samples.append(seconds)
+        self.count += 1
+
+    def percentile(self, p: float) -> Optional[float]:
+        """Latency at percentile p (0-100), None without samples"""
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(len(ordered) * p / 100))
+        return ordered[index]
+
+    def get_stats(self) -> Dict:
+        """Get sample count and common percentiles in milliseconds"""
+        stats = {"count": self.count, "window": len(self.samples)}
+        for p in (50, 95, 99):
+            value = self.percentile(p)
+            stats[f"p{p}_ms"] = round(value * 1000, 1) if value is not None else None
+        return stats
+
+# Provider name -> tracker, shared by every service in the process
+latency_trackers: Dict[str, LatencyTracker] = {}
+
+def get_tracker(provider: str) -> LatencyTracker:
+    """Get (or create) the tracker for a provider"""
+    tracker = latency_trackers.get(provider)
+    if tracker is None:
+        tracker = latency_trackers[provider] = LatencyTracker()
+    return tracker
+
+def get_latency_stats() -> Dict:
+    """Get latency stats for every provider seen so far"""
+    return {provider: tracker.get_stats() for provider, tracker in latency_trackers.items()}
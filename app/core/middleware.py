@@ -0,0 +1,94 @@
+import time
+import logging
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.rate_limiter import RateLimiter
+from app.core.request_cost import admission_weight, request_weight, start_request_cost
+
+logger = logging.getLogger(__name__)
+
+# Plain ASGI middleware: no extra task per request and the response body is
+# passed through untouched, unlike @app.middleware("http") / BaseHTTPMiddleware
+
+class RateLimitMiddleware:
+    """Reject requests over the limit and add X-RateLimit-* headers.
+
+    Requests are weighted by endpoint cost (app.core.request_cost). The
+    cached-path weight is checked and counted before the request; if serving
+    it needed upstream calls, the difference is charged afterwards.
+    Endpoints with a per-symbol upstream fan-out reserve their uncached
+    weight instead and are refunded what the cache saved. Endpoints whose
+    size is only known from the body reserve the rest themselves.
+    """
+
+    def __init__(self, app: ASGIApp, limiter: RateLimiter):
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        client = scope.get("client")
+        client_ip = client[0] if client else "unknown"
+        endpoint = scope["path"]
+        cost = start_request_cost(endpoint, scope.get("query_string", b""))
+        weight = admission_weight(cost)
+        result = await self.limiter.check(client_ip, endpoint, weight)
+        cost.charged = weight
+
+        headers = {
+            "X-RateLimit-Limit": str(result.limit),
+            "X-RateLimit-Remaining": str(result.remaining),
+            "X-RateLimit-Reset": str(result.reset)
+        }
+
+        if not result.allowed:
+            headers["Retry-After"] = str(max(0, result.reset - int(time.time())))
+            response = JSONResponse(
+                status_code=429,
+                content={
+                    "success": False,
+                    "error": "Rate limit exceeded",
+                    "message": "Too many requests. Please try again later."
+                },
+                headers=headers
+            )
+            await response(scope, receive, send)
+            return
+
+        raw_headers = [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers.items()]
+
+        async def send_with_headers(message: Message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + raw_headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+        await self.limiter.charge(client_ip, endpoint, request_weight(cost) - cost.charged)
+
+class ProcessTimeMiddleware:
+    """Add X-Process-Time (seconds until the response starts)"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.time()
+
+        async def send_with_time(message: Message):
+            if message["type"] == "http.response.start":
+                process_time = time.time() - start_time
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-process-time", str(process_time).encode("latin-1"))
+                ]
+            await send(message)
+
+        await self.app(scope, receive, send_with_time)
@@ -1,7 +1,9 @@
 import time
+import asyncio
 import logging
-from typing import Dict, Optional
-from datetime import datetime, timedelta
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+from datetime import datetime, timedelta, timezone
 import json
 
 from app.core.config import settings
@@ -9,90 +11,315 @@ from app.core.cache import redis_client, CacheKeys
 
 logger = logging.getLogger(__name__)
 
+# Window name -> length in seconds
+WINDOWS = {
+    "per_minute": 60,
+    "per_hour": 3600,
+    "per_day": 86400
+}
+
+# Every script takes the same arguments and checks all three windows at once,
+# admitting the request only if each window has room.
+# KEYS: endpoints set, clients HLL, requests counter, then per-window state
+# ARGV: client ip, endpoint, mode, now, minute, hour, day limits,
+#       minute, hour, day lengths, weight
+# Modes: check admits and counts weight only if every window has room,
+# reserve does the same for more weight of an admitted request (without
+# counting another request), peek reports without counting, charge counts
+# weight unconditionally
+# (extra cost of an admitted request, may push a window past its limit),
+# refund gives back weight an admitted request did not use (never below
+# an empty window)
+# Returns {allowed, remaining x3, seconds until reset x3}
+_SCRIPT_HEADER = """
+local mode = ARGV[3]
+local peek = mode == 'peek'
+local enforce = mode == 'check' or mode == 'reserve' or peek
+local refund = mode == 'refund'
+local now = tonumber(ARGV[4])
+local weight = tonumber(ARGV[11])
+local allowed = 1
+local remaining, reset = {}, {}
+
+local function record()
+    redis.call('SADD', KEYS[1], ARGV[2])
+    redis.call('EXPIRE', KEYS[1], 86400)
+    redis.call('PFADD', KEYS[2], ARGV[1])
+    redis.call('EXPIRE', KEYS[2], 172800)
+    redis.call('INCR', KEYS[3])
+    redis.call('EXPIRE', KEYS[3], 172800)
+end
+"""
+
+_SCRIPT_FOOTER = """
+return {allowed, remaining[1], remaining[2], remaining[3], reset[1], reset[2], reset[3]}
+"""
+
+# One counter per window, all reset together at the window boundary
+FIXED_WINDOW_SCRIPT = _SCRIPT_HEADER + """
+local counts = redis.call('MGET', KEYS[4], KEYS[5], KEYS[6])
+for i = 1, 3 do
+    counts[i] = tonumber(counts[i]) or 0
+    if enforce and counts[i] + weight > tonumber(ARGV[4 + i]) then
+        allowed = 0
+    end
+end
+
+if refund then
+    for i = 1, 3 do
+        local amount = math.min(counts[i], weight)
+        if amount > 0 then
+            counts[i] = redis.call('DECRBY', KEYS[3 + i], amount)
+        end
+    end
+elseif allowed == 1 and not peek then
+    for i = 1, 3 do
+        counts[i] = redis.call('INCRBY', KEYS[3 + i], weight)
+        if counts[i] == weight then
+            redis.call('EXPIRE', KEYS[3 + i], ARGV[7 + i])
+        end
+    end
+    if mode == 'check' then
+        record()
+    end
+end
+
+for i = 1, 3 do
+    local period = tonumber(ARGV[7 + i])
+    remaining[i] = math.max(0, tonumber(ARGV[4 + i]) - counts[i])
+    reset[i] = math.ceil(period - now % period)
+end
+""" + _SCRIPT_FOOTER
+
+# Current and previous counter per window; the previous one is weighted by
+# how much of it still overlaps the sliding window
+SLIDING_WINDOW_SCRIPT = _SCRIPT_HEADER + """
+local estimates, currents = {}, {}
+for i = 1, 3 do
+    local period = tonumber(ARGV[7 + i])
+    currents[i] = tonumber(redis.call('GET', KEYS[2 + 2 * i])) or 0
+    local previous = tonumber(redis.call('GET', KEYS[3 + 2 * i])) or 0
+    estimates[i] = previous * (1 - (now % period) / period) + currents[i]
+    if enforce and estimates[i] + weight > tonumber(ARGV[4 + i]) then
+        allowed = 0
+    end
+end
+
+if refund then
+    for i = 1, 3 do
+        local amount = math.min(currents[i], weight)
+        if amount > 0 then
+            redis.call('DECRBY', KEYS[2 + 2 * i], amount)
+            estimates[i] = estimates[i] - amount
+        end
+    end
+elseif allowed == 1 and not peek then
+    for i = 1, 3 do
+        if redis.call('INCRBY', KEYS[2 + 2 * i], weight) == weight then
+            redis.call('EXPIRE', KEYS[2 + 2 * i], 2 * tonumber(ARGV[7 + i]))
+        end
+        estimates[i] = estimates[i] + weight
+    end
+    if mode == 'check' then
+        record()
+    end
+end
+
+for i = 1, 3 do
+    local period = tonumber(ARGV[7 + i])
+    remaining[i] = math.max(0, math.floor(tonumber(ARGV[4 + i]) - estimates[i]))
+    reset[i] = math.ceil(period - now % period)
+end
+""" + _SCRIPT_FOOTER
+
+# Generic cell rate algorithm: one theoretical arrival time (TAT) per window.
+# Each request pushes the TAT by period / limit; a request is admitted while
+# the TAT stays within one period of now, i.e. a token bucket of size limit
+# refilled continuously. Uses the Redis clock so workers agree on time.
+GCRA_SCRIPT = _SCRIPT_HEADER + """
+local time = redis.call('TIME')
+now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+
+local tats, intervals = {}, {}
+for i = 1, 3 do
+    local period = tonumber(ARGV[7 + i])
+    intervals[i] = period / tonumber(ARGV[4 + i])
+    tats[i] = math.max(tonumber(redis.call('GET', KEYS[3 + i])) or now, now)
+    if enforce and tats[i] + intervals[i] * weight - now > period then
+        allowed = 0
+    end
+end
+
+if refund then
+    for i = 1, 3 do
+        tats[i] = math.max(now, tats[i] - intervals[i] * weight)
+        local ttl = math.ceil((tats[i] - now) * 1000)
+        if ttl > 0 then
+            redis.call('SET', KEYS[3 + i], string.format('%.6f', tats[i]), 'PX', ttl)
+        else
+            redis.call('DEL', KEYS[3 + i])
+        end
+    end
+elseif allowed == 1 and not peek then
+    for i = 1, 3 do
+        tats[i] = tats[i] + intervals[i] * weight
+        redis.call('SET', KEYS[3 + i], string.format('%.6f', tats[i]), 'PX', math.ceil((tats[i] - now) * 1000))
+    end
+    if mode == 'check' then
+        record()
+    end
+end
+
+for i = 1, 3 do
+    local period = tonumber(ARGV[7 + i])
+    remaining[i] = math.max(0, math.floor((period - (tats[i] - now)) / intervals[i]))
+    reset[i] = math.ceil(tats[i] - now)
+end
+""" + _SCRIPT_FOOTER
+
+ALGORITHMS = {
+    "fixed_window": FIXED_WINDOW_SCRIPT,
+    "sliding_window": SLIDING_WINDOW_SCRIPT,
+    "gcra": GCRA_SCRIPT
+}
+
+@dataclass
+class RateLimitResult:
+    """Outcome of one rate limit check"""
+    allowed: bool
+    limit: int
+    remaining: int
+    reset: int  # Unix time the binding window resets (GCRA: bucket is full again)
+    windows: Dict[str, int] = field(default_factory=dict)  # Remaining per window
+    resets: Dict[str, int] = field(default_factory=dict)  # Reset time per window
+
+def _window_key(client_ip: str, endpoint: str, window: str, now: int) -> str:
+    """Counter key for the current fixed window"""
+    length = WINDOWS[window]
+    window_start = now - (now % length)
+    return f"{CacheKeys.rate_limit(client_ip, endpoint)}:{window}:{window_start}"
+
 class RateLimiter:
-    def __init__(self):
+    def __init__(self, algorithm: str = None):
         self.limits = {
             "per_minute": settings.RATE_LIMIT_PER_MINUTE,
             "per_hour": settings.RATE_LIMIT_PER_HOUR,
             "per_day": settings.RATE_LIMIT_PER_DAY
         }
+        algorithm = algorithm or settings.RATE_LIMIT_ALGORITHM
+        if algorithm not in ALGORITHMS:
+            logger.warning(f"Unknown rate limit algorithm {algorithm}, using fixed_window")
+            algorithm = "fixed_window"
+        self.algorithm = algorithm
+        self._script = None
+        self._script_client = None
     
     async def is_allowed(self, client_ip: str, endpoint: str) -> bool:
         """Check if request is allowed based on rate limits"""
+        result = await self.check(client_ip, endpoint)
+        return result.allowed
+    
+    async def check(self, client_ip: str, endpoint: str, weight: int = 1) -> RateLimitResult:
+        """Check and count a request of the given weight against every window in one Redis call"""
+        now = time.time()
         try:
-            # Check all rate limit windows
-            for window, limit in self.limits.items():
-                if not await self._check_window(client_ip, endpoint, window, limit):
-                    logger.warning(f"Rate limit exceeded for {client_ip} on {endpoint} ({window})")
-                    return False
+            if not redis_client.redis_client:
+                return self._unlimited(now)  # Allow if Redis is not available
             
-            # If all checks pass, increment counters
-            await self._increment_counters(client_ip, endpoint)
-            return True
+            reply = await self._run_script(client_ip, endpoint, now, "check", weight)
+            result = self._result(reply, now)
+            if not result.allowed:
+                logger.warning(f"Rate limit exceeded for {client_ip} on {endpoint}")
+            return result
             
         except Exception as e:
             logger.error(f"Error in rate limiter: {e}")
             # Allow request if rate limiter fails
-            return True
+            return self._unlimited(now)
     
-    async def _check_window(self, client_ip: str, endpoint: str, window: str, limit: int) -> bool:
-        """Check if request is allowed for a specific time window"""
+    async def reserve(self, client_ip: str, endpoint: str, weight: int) -> RateLimitResult:
+        """Count extra weight for an already admitted request, only if every window has room"""
+        now = time.time()
         try:
             if not redis_client.redis_client:
-                return True  # Allow if Redis is not available
-            
-            # Get current timestamp
-            now = int(time.time())
-            
-            # Calculate window start time
-            if window == "per_minute":
-                window_start = now - (now % 60)
-            elif window == "per_hour":
-                window_start = now - (now % 3600)
-            elif window == "per_day":
-                window_start = now - (now % 86400)
-            else:
-                return True
-            
-            # Create key for this window
-            key = f"{CacheKeys.rate_limit(client_ip, endpoint)}:{window}:{window_start}"
-            
-            # Get current count
-            current_count = await redis_client.redis_client.get(key)
-            count = int(current_count) if current_count else 0
+                return self._unlimited(now)
             
-            return count < limit
+            result = self._result(await self._run_script(client_ip, endpoint, now, "reserve", weight), now)
+            if not result.allowed:
+                logger.warning(f"Rate limit exceeded for {client_ip} on {endpoint}")
+            return result
             
         except Exception as e:
-            logger.error(f"Error checking rate limit window: {e}")
-            return True
+            logger.error(f"Error in rate limiter: {e}")
+            return self._unlimited(now)
     
-    async def _increment_counters(self, client_ip: str, endpoint: str):
-        """Increment request counters for all time windows"""
+    async def charge(self, client_ip: str, endpoint: str, weight: int):
+        """Count extra weight for an already admitted request (refund it if negative)"""
+        if weight == 0:
+            return
         try:
-            if not redis_client.redis_client:
-                return
-            
-            now = int(time.time())
-            
-            # Increment for each window
-            windows = [
-                ("per_minute", now - (now % 60), 60),
-                ("per_hour", now - (now % 3600), 3600),
-                ("per_day", now - (now % 86400), 86400)
-            ]
-            
-            for window, window_start, ttl in windows:
-                key = f"{CacheKeys.rate_limit(client_ip, endpoint)}:{window}:{window_start}"
-                
-                # Use Redis pipeline for efficiency
-                pipe = redis_client.redis_client.pipeline()
-                pipe.incr(key)
-                pipe.expire(key, ttl)
-                await pipe.execute()
-                
+            if redis_client.redis_client:
+                mode = "charge" if weight > 0 else "refund"
+                await self._run_script(client_ip, endpoint, time.time(), mode, abs(weight))
         except Exception as e:
-            logger.error(f"Error incrementing rate limit counters: {e}")
+            logger.error(f"Error charging rate limit: {e}")
+    
+    def _get_script(self):
+        """Script handle for the current Redis client (EVALSHA with EVAL fallback)"""
+        client = redis_client.redis_client
+        if self._script is None or self._script_client is not client:
+            self._script = client.register_script(ALGORITHMS[self.algorithm])
+            self._script_client = client
+        return self._script
+    
+    def _state_keys(self, client_ip: str, endpoint: str, now: float) -> List[str]:
+        """Per-window Redis keys the configured algorithm keeps for a client"""
+        now = int(now)
+        if self.algorithm == "gcra":
+            prefix = CacheKeys.rate_limit(client_ip, endpoint)
+            return [f"{prefix}:{window}:gcra" for window in WINDOWS]
+        if self.algorithm == "sliding_window":
+            return [
+                key
+                for window, length in WINDOWS.items()
+                for key in (
+                    _window_key(client_ip, endpoint, window, now),
+                    _window_key(client_ip, endpoint, window, now - length)
+                )
+            ]
+        return [_window_key(client_ip, endpoint, window, now) for window in WINDOWS]
+    
+    async def _run_script(self, client_ip: str, endpoint: str, now: float, mode: str, weight: int = 1, client=None):
+        """Run the algorithm script; with a pipeline as client it is only queued"""
+        day_start = int(now) - (int(now) % 86400)
+        keys = [
+            CacheKeys.rate_limit_endpoints(client_ip),
+            CacheKeys.rate_limit_clients(day_start),
+            CacheKeys.rate_limit_requests(day_start),
+            *self._state_keys(client_ip, endpoint, now)
+        ]
+        args = [client_ip, endpoint, mode, repr(now), *self.limits.values(), *WINDOWS.values(), weight]
+        return await self._get_script()(keys=keys, args=args, client=client)
+    
+    def _result(self, reply: List[int], now: float) -> RateLimitResult:
+        """Build a result reporting the window closest to its limit"""
+        allowed, remaining, resets = reply[0], reply[1:4], reply[4:7]
+        remaining = dict(zip(WINDOWS, remaining))
+        resets = {window: int(now) + reset for window, reset in zip(WINDOWS, resets)}
+        window = min(remaining, key=lambda name: remaining[name])
+        return RateLimitResult(
+            allowed=bool(allowed),
+            limit=self.limits[window],
+            remaining=remaining[window],
+            reset=resets[window],
+            windows=remaining,
+            resets=resets
+        )
+    
+    def _unlimited(self, now: float) -> RateLimitResult:
+        """Result used when limits cannot be checked (fail open)"""
+        resets = [length - int(now) % length for length in WINDOWS.values()]
+        return self._result([1, *self.limits.values(), *resets], now)
     
     async def get_usage_info(self, client_ip: str, endpoint: str) -> Dict:
         """Get current usage information for a client"""
@@ -100,29 +327,18 @@ class RateLimiter:
             if not redis_client.redis_client:
                 return {"error": "Redis not available"}
             
-            now = int(time.time())
-            usage = {}
+            # Same script in peek mode, so usage matches what check() enforces
+            now = time.time()
+            result = self._result(await self._run_script(client_ip, endpoint, now, "peek"), now)
             
+            usage = {}
             for window, limit in self.limits.items():
-                if window == "per_minute":
-                    window_start = now - (now % 60)
-                    ttl = 60
-                elif window == "per_hour":
-                    window_start = now - (now % 3600)
-                    ttl = 3600
-                elif window == "per_day":
-                    window_start = now - (now % 86400)
-                    ttl = 86400
-                
-                key = f"{CacheKeys.rate_limit(client_ip, endpoint)}:{window}:{window_start}"
-                current_count = await redis_client.redis_client.get(key)
-                count = int(current_count) if current_count else 0
-                
+                remaining = result.windows[window]
                 usage[window] = {
-                    "current": count,
+                    "current": limit - remaining,
                     "limit": limit,
-                    "remaining": max(0, limit - count),
-                    "reset_time": window_start + ttl
+                    "remaining": remaining,
+                    "reset_time": result.resets[window]
                 }
             
             return usage
@@ -131,23 +347,41 @@ class RateLimiter:
             logger.error(f"Error getting usage info: {e}")
             return {"error": str(e)}
     
+    async def peek_many(self, client_ip: str, endpoints: List[str]) -> Dict[str, RateLimitResult]:
+        """Get current limits for several endpoints in one pipeline, without counting"""
+        now = time.time()
+        pipe = redis_client.redis_client.pipeline(transaction=False)
+        for endpoint in endpoints:
+            await self._run_script(client_ip, endpoint, now, "peek", client=pipe)
+        replies = await pipe.execute()
+        return {endpoint: self._result(reply, now) for endpoint, reply in zip(endpoints, replies)}
+    
+    async def close(self):
+        """Release background resources (nothing to do in exact mode)"""
+    
     async def reset_limits(self, client_ip: str, endpoint: str = None):
         """Reset rate limits for a client (admin function)"""
         try:
             if not redis_client.redis_client:
                 return False
             
+            # Only the current state matters; older counters expire on their own
+            endpoints_key = CacheKeys.rate_limit_endpoints(client_ip)
             if endpoint:
-                # Reset specific endpoint
-                pattern = f"{CacheKeys.rate_limit(client_ip, endpoint)}:*"
+                endpoints = [endpoint]
             else:
-                # Reset all endpoints for client
-                pattern = f"{CacheKeys.rate_limit(client_ip, '*')}"
+                endpoints = list(await redis_client.redis_client.smembers(endpoints_key))
             
-            # Find and delete matching keys
-            keys = await redis_client.redis_client.keys(pattern)
-            if keys:
-                await redis_client.redis_client.delete(*keys)
+            now = time.time()
+            keys = [
+                key
+                for name in endpoints
+                for key in self._state_keys(client_ip, name, now)
+            ]
+            if not endpoint:
+                keys.append(endpoints_key)
+            
+            if keys and await redis_client.redis_client.delete(*keys):
                 logger.info(f"Reset rate limits for {client_ip} on {endpoint or 'all endpoints'}")
                 return True
             
@@ -158,32 +392,23 @@ class RateLimiter:
             return False
     
     async def get_global_stats(self) -> Dict:
-        """Get global rate limiting statistics"""
+        """Get global rate limiting statistics for the current day"""
         try:
             if not redis_client.redis_client:
                 return {"error": "Redis not available"}
             
-            # Get all rate limit keys
-            pattern = "ratelimit:*"
-            keys = await redis_client.redis_client.keys(pattern)
-            
-            total_requests = 0
-            active_clients = set()
-            blocked_requests = 0
-            
-            for key in keys:
-                count = await redis_client.redis_client.get(key)
-                if count:
-                    total_requests += int(count)
-                    # Extract client IP from key
-                    parts = key.split(":")
-                    if len(parts) >= 2:
-                        active_clients.add(parts[1])
+            # Read the maintained aggregates; cost does not grow with keyspace
+            now = int(time.time())
+            day_start = now - (now % 86400)
+            pipe = redis_client.redis_client.pipeline(transaction=False)
+            pipe.get(CacheKeys.rate_limit_requests(day_start))
+            pipe.pfcount(CacheKeys.rate_limit_clients(day_start))
+            total_requests, active_clients = await pipe.execute()
             
             return {
-                "total_requests": total_requests,
-                "active_clients": len(active_clients),
-                "rate_limit_keys": len(keys),
+                "total_requests": int(total_requests) if total_requests else 0,
+                "active_clients": active_clients,
+                "period_start": datetime.fromtimestamp(day_start, tz=timezone.utc).isoformat(),
                 "timestamp": datetime.now().isoformat()
             }
             
@@ -191,29 +416,188 @@ class RateLimiter:
             logger.error(f"Error getting global stats: {e}")
             return {"error": str(e)}
 
+class LocalRateLimiter(RateLimiter):
+    """Rate limiter that admits requests from in-process allowances.
+    
+    Each worker tracks the fixed-window counters it has seen: the global
+    count from Redis at the last sync plus what it admitted since. Every
+    sync interval the locally admitted counts are flushed with INCRBY in one
+    pipeline, and the replies (global totals across workers) become the new
+    baseline, shrinking each worker's local allowance.
+    
+    Over-admission bound: a window can exceed its limit by at most what the
+    other workers admit during one sync interval, and never by more than
+    (workers - 1) x the allowance remaining at the last sync. A client first
+    seen by a worker starts from a global count of 0 until the next sync.
+    If Redis is unavailable, counts are kept and limits hold per worker.
+    
+    Only counters with pending counts or used within RATE_LIMIT_IDLE_SECONDS
+    are synced; idle ones are dropped, so sync cost follows active clients
+    rather than every client seen today.
+    """
+    
+    def __init__(self, sync_interval_ms: int = None):
+        super().__init__("fixed_window")
+        self.sync_interval = (sync_interval_ms or settings.RATE_LIMIT_SYNC_INTERVAL_MS) / 1000
+        self.idle_seconds = settings.RATE_LIMIT_IDLE_SECONDS
+        # Counter key -> [global count at last sync, admitted since, window end, last used]
+        self._counters: Dict[str, List[int]] = {}
+        self._pending_endpoints: Dict[str, Set[str]] = {}
+        self._pending_requests = 0
+        self._sync_task: Optional[asyncio.Task] = None
+    
+    async def check(self, client_ip: str, endpoint: str, weight: int = 1) -> RateLimitResult:
+        """Check and count a request against local allowances (no Redis call)"""
+        return self._admit(client_ip, endpoint, weight, True)
+    
+    async def reserve(self, client_ip: str, endpoint: str, weight: int) -> RateLimitResult:
+        """Count extra weight for an already admitted request, only if every window has room"""
+        return self._admit(client_ip, endpoint, weight, False)
+    
+    def _admit(self, client_ip: str, endpoint: str, weight: int, new_request: bool) -> RateLimitResult:
+        now = time.time()
+        self._ensure_sync_task()
+        
+        counters = self._local_counters(client_ip, endpoint, now)
+        remaining = [limit - counter[0] - counter[1] for limit, counter in zip(self.limits.values(), counters)]
+        allowed = all(left >= weight for left in remaining)
+        if allowed:
+            for counter in counters:
+                counter[1] += weight
+            remaining = [left - weight for left in remaining]
+            if new_request:
+                self._pending_endpoints.setdefault(client_ip, set()).add(endpoint)
+                self._pending_requests += 1
+        else:
+            logger.warning(f"Rate limit exceeded for {client_ip} on {endpoint}")
+        
+        resets = [counter[2] - int(now) for counter in counters]
+        return self._result([int(allowed), *(max(0, left) for left in remaining), *resets], now)
+    
+    async def charge(self, client_ip: str, endpoint: str, weight: int):
+        """Count extra weight for an already admitted request (refund it if negative)"""
+        if weight == 0:
+            return
+        for counter in self._local_counters(client_ip, endpoint, time.time()):
+            # A refund never takes a window below empty
+            counter[1] += max(weight, -(counter[0] + counter[1]))
+    
+    def _local_counters(self, client_ip: str, endpoint: str, now: float) -> List[List[int]]:
+        """Local counters for the current windows, created on first use"""
+        counters = []
+        for key, length in zip(self._state_keys(client_ip, endpoint, now), WINDOWS.values()):
+            counter = self._counters.get(key)
+            if counter is None:
+                counter = self._counters[key] = [0, 0, int(now) - int(now) % length + length, 0]
+            counter[3] = int(now)
+            counters.append(counter)
+        return counters
+    
+    def _ensure_sync_task(self):
+        """Start the periodic sync on the running loop if needed"""
+        loop = asyncio.get_running_loop()
+        if self._sync_task is None or self._sync_task.done() or self._sync_task.get_loop() is not loop:
+            self._sync_task = loop.create_task(self._sync_loop())
+    
+    async def _sync_loop(self):
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            await self.sync()
+    
+    async def sync(self):
+        """Flush locally admitted counts to Redis and pull back global totals"""
+        if not self._counters or not redis_client.redis_client:
+            return
+        
+        now = int(time.time())
+        day_start = now - (now % 86400)
+        
+        # Take the pending counts before awaiting; admissions during the
+        # flush accumulate for the next one. Idle counters with nothing to
+        # flush are dropped instead of polled.
+        flushed = []
+        for key, counter in list(self._counters.items()):
+            if not counter[1] and (counter[3] <= now - self.idle_seconds or counter[2] <= now):
+                del self._counters[key]
+                continue
+            flushed.append((key, counter, counter[1]))
+            counter[1] = 0
+        endpoints, self._pending_endpoints = self._pending_endpoints, {}
+        requests, self._pending_requests = self._pending_requests, 0
+        if not flushed and not requests:
+            return
+        
+        try:
+            pipe = redis_client.redis_client.pipeline(transaction=False)
+            for key, counter, pending in flushed:
+                if pending:
+                    pipe.incrby(key, pending)
+                    pipe.expire(key, max(1, counter[2] - now))
+                else:
+                    pipe.get(key)
+            for client_ip, names in endpoints.items():
+                pipe.sadd(CacheKeys.rate_limit_endpoints(client_ip), *names)
+                pipe.expire(CacheKeys.rate_limit_endpoints(client_ip), 86400)
+            if requests:
+                pipe.pfadd(CacheKeys.rate_limit_clients(day_start), *endpoints)
+                pipe.expire(CacheKeys.rate_limit_clients(day_start), 172800)
+                pipe.incrby(CacheKeys.rate_limit_requests(day_start), requests)
+                pipe.expire(CacheKeys.rate_limit_requests(day_start), 172800)
+            replies = iter(await pipe.execute())
+            
+        except Exception as e:
+            logger.error(f"Error syncing rate limits: {e}")
+            # Keep the counts for the next attempt
+            for key, counter, pending in flushed:
+                counter[1] += pending
+            for client_ip, names in endpoints.items():
+                self._pending_endpoints.setdefault(client_ip, set()).update(names)
+            self._pending_requests += requests
+            return
+        
+        for key, counter, pending in flushed:
+            total = next(replies)
+            if pending:
+                next(replies)  # EXPIRE
+            counter[0] = int(total or 0)
+    
+    async def close(self):
+        """Stop the sync task and flush what is left"""
+        if self._sync_task is not None:
+            self._sync_task.cancel()
+            self._sync_task = None
+        await self.sync()
+    
+    async def reset_limits(self, client_ip: str, endpoint: str = None):
+        """Reset rate limits for a client (admin function)"""
+        prefix = f"{CacheKeys.rate_limit(client_ip, endpoint)}:" if endpoint else CacheKeys.rate_limit(client_ip, "")
+        for key in [key for key in self._counters if key.startswith(prefix)]:
+            del self._counters[key]
+        return await super().reset_limits(client_ip, endpoint)
+
+def create_rate_limiter() -> RateLimiter:
+    """Build the rate limiter selected by RATE_LIMIT_MODE"""
+    if settings.RATE_LIMIT_MODE == "local":
+        return LocalRateLimiter()
+    return RateLimiter()
+
 # Global rate limiter instance
-rate_limiter = RateLimiter()
+rate_limiter = create_rate_limiter()
 
 # ==================== RATE LIMIT MIDDLEWARE HELPERS ====================
 
 async def check_rate_limit(client_ip: str, endpoint: str) -> Dict:
     """Check rate limit and return detailed information"""
-    if not await rate_limiter.is_allowed(client_ip, endpoint):
-        usage_info = await rate_limiter.get_usage_info(client_ip, endpoint)
-        
-        return {
-            "allowed": False,
-            "usage": usage_info,
-            "limits": rate_limiter.limits
-        }
-    else:
-        usage_info = await rate_limiter.get_usage_info(client_ip, endpoint)
-        
-        return {
-            "allowed": True,
-            "usage": usage_info,
-            "limits": rate_limiter.limits
-        }
+    result = await rate_limiter.check(client_ip, endpoint)
+    return {
+        "allowed": result.allowed,
+        "usage": {
+            window: {"limit": rate_limiter.limits[window], "remaining": max(0, remaining)}
+            for window, remaining in result.windows.items()
+        },
+        "limits": rate_limiter.limits,
+        "reset_time": result.reset
+    }
 
 async def get_client_usage(client_ip: str) -> Dict:
     """Get usage information for all endpoints for a client"""
@@ -221,19 +605,16 @@ async def get_client_usage(client_ip: str) -> Dict:
         if not redis_client.redis_client:
             return {"error": "Redis not available"}
         
-        # Get all keys for this client
-        pattern = f"ratelimit:{client_ip}:*"
-        keys = await redis_client.redis_client.keys(pattern)
+        # Endpoints come from the per-client index, daily usage from one pipeline
+        endpoints = sorted(await redis_client.redis_client.smembers(CacheKeys.rate_limit_endpoints(client_ip)))
+        results = await rate_limiter.peek_many(client_ip, endpoints) if endpoints else {}
         
-        usage = {}
-        for key in keys:
-            # Extract endpoint from key
-            parts = key.split(":")
-            if len(parts) >= 3:
-                endpoint = parts[2]
-                count = await redis_client.redis_client.get(key)
-                if count:
-                    usage[endpoint] = int(count)
+        daily_limit = rate_limiter.limits["per_day"]
+        usage = {
+            endpoint: daily_limit - result.windows["per_day"]
+            for endpoint, result in results.items()
+            if result.windows["per_day"] < daily_limit
+        }
         
         return {
             "client_ip": client_ip,
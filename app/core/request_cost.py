@@ -0,0 +1,104 @@
+import logging
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+from urllib.parse import parse_qs
+
+import aiohttp
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class RequestCost:
+    """What the current request has cost so far.
+
+    Mutable on purpose: tasks spawned while serving the request (singleflight
+    leaders) get a copy of the context that still points at this object.
+    """
+    endpoint: str
+    symbols: int = 0
+    upstream_calls: int = 0
+    charged: int = 0  # Weight already counted against the limits
+
+    @property
+    def cached(self) -> bool:
+        return self.upstream_calls == 0
+
+@dataclass
+class EndpointCost:
+    """Rate limit weight of one request to an endpoint"""
+    cost: Callable[[int, bool], int]  # (symbol count, served from cache) -> weight
+    default_symbols: int = 0  # Symbols the endpoint uses when none are given
+    # Check the uncached weight up front and refund what the cache saved, so
+    # a client without the budget for a miss cannot trigger its fan-out
+    reserve: bool = False
+
+def _latest_cost(symbols: int, cached: bool) -> int:
+    # One upstream call refreshes everything; large responses cost some CPU
+    return (1 if cached else 2) + symbols // 50
+
+def _per_coin_cost(symbols: int, cached: bool) -> int:
+    # One CoinGecko call per coin on a miss
+    return 1 + symbols // 50 if cached else 1 + symbols
+
+def _batch_cost(items: int, cached: bool) -> int:
+    # No upstream calls, but CPU and response size grow with the batch
+    return 1 + items // settings.FOREX_BATCH_ITEMS_PER_UNIT
+
+# Endpoints not listed here cost 1
+ENDPOINT_COSTS: Dict[str, EndpointCost] = {
+    "/forex/latest": EndpointCost(_latest_cost, 4),
+    "/forex/historical": EndpointCost(_latest_cost, 4),
+    "/forex/timeseries": EndpointCost(_latest_cost, 4),
+    "/crypto/latest": EndpointCost(_latest_cost, 5),
+    "/crypto/marketcap": EndpointCost(_latest_cost, 5),
+    "/crypto/historical": EndpointCost(_per_coin_cost, 3, reserve=True),
+    # Item count is only known from the body; the endpoint reserves it
+    "/forex/convert/batch": EndpointCost(_batch_cost)
+}
+
+_current_cost: ContextVar[Optional[RequestCost]] = ContextVar("request_cost", default=None)
+
+def start_request_cost(endpoint: str, query_string: bytes = b"") -> RequestCost:
+    """Begin tracking the cost of the request handled in this context"""
+    cost = RequestCost(endpoint)
+    symbols = parse_qs(query_string.decode("latin-1")).get("symbols")
+    if symbols:
+        cost.symbols = len([symbol for symbol in symbols[0].split(",") if symbol])
+    elif endpoint in ENDPOINT_COSTS:
+        cost.symbols = ENDPOINT_COSTS[endpoint].default_symbols
+    _current_cost.set(cost)
+    return cost
+
+def request_weight(cost: RequestCost, cached: bool = None) -> int:
+    """Weight of a request; cached overrides what was observed"""
+    endpoint_cost = ENDPOINT_COSTS.get(cost.endpoint)
+    if endpoint_cost is None:
+        return 1
+    return max(1, endpoint_cost.cost(cost.symbols, cost.cached if cached is None else cached))
+
+def current_request_cost() -> Optional[RequestCost]:
+    """Cost tracker of the request handled in this context, if any"""
+    return _current_cost.get()
+
+def admission_weight(cost: RequestCost) -> int:
+    """Weight checked before the request: uncached if the endpoint reserves it"""
+    endpoint_cost = ENDPOINT_COSTS.get(cost.endpoint)
+    return request_weight(cost, cached=not (endpoint_cost and endpoint_cost.reserve))
+
+def record_upstream_call():
+    """Count an upstream call against the current request, if any"""
+    cost = _current_cost.get()
+    if cost is not None:
+        cost.upstream_calls += 1
+
+async def _on_request_start(session, context, params):
+    record_upstream_call()
+
+def upstream_trace_config() -> aiohttp.TraceConfig:
+    """aiohttp trace config that counts requests against the current request"""
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(_on_request_start)
+    return trace_config
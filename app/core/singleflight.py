@@ -0,0 +1,64 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one in-flight call"""
+
+    def __init__(self):
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.stats = {
+            "leaders": 0,
+            "coalesced": 0,
+            "background": 0
+        }
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fn once per key; concurrent callers await the same result"""
+        task = self._in_flight.get(key)
+        if task is not None and task.get_loop() is asyncio.get_running_loop():
+            self.stats["coalesced"] += 1
+            logger.debug(f"Coalesced request for {key}")
+        else:
+            self.stats["leaders"] += 1
+            # Run as a separate task so a cancelled leader (e.g. a client
+            # disconnect) does not cancel the fetch for everyone else
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+
+        return await asyncio.shield(task)
+
+    def spawn(self, key: str, fn: Callable[[], Awaitable[Any]]) -> bool:
+        """Run fn in the background unless a call for key is already in flight"""
+        task = self._in_flight.get(key)
+        if task is not None and task.get_loop() is asyncio.get_running_loop():
+            return False
+
+        self.stats["background"] += 1
+        task = asyncio.ensure_future(fn())
+        self._in_flight[key] = task
+        task.add_done_callback(lambda t: self._forget(key, t, log_errors=True))
+        return True
+
+    def _forget(self, key: str, task: asyncio.Future, log_errors: bool = False):
+        """Drop a finished call from the registry"""
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Mark the exception as retrieved even if every waiter was cancelled
+        if not task.cancelled():
+            error = task.exception()
+            if error and log_errors:
+                logger.error(f"Background refresh for {key} failed: {error}")
+
+    def get_stats(self) -> Dict:
+        """Get coalescing counters"""
+        return {
+            **self.stats,
+            "in_flight": len(self._in_flight)
+        }
+
+# Global single-flight registry
+singleflight = SingleFlight()
@@ -1,39 +1,67 @@
 from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic_core import to_json
 import time
 import logging
+from contextlib import asynccontextmanager
 from typing import List, Optional
 from datetime import datetime, date
 import json
 
+import numpy as np
+
 from app.core.config import settings
-from app.core.rate_limiter import RateLimiter
+from app.core.http_client import http_client
+from app.core.history_store import history_store
+from app.core.columnar_archive import rate_archive
+from app.core.date_index import forex_date_index
+from app.providers.registry import provider_registry
+from app.core.rate_limiter import create_rate_limiter
+from app.core.middleware import RateLimitMiddleware, ProcessTimeMiddleware
+from app.core.request_cost import current_request_cost, request_weight
 from app.services.forex_service import ForexService
 from app.services.crypto_service import CryptoService
 from app.models.schemas import (
     ForexLatestResponse,
     ForexConvertResponse,
+    ForexBatchConvertRequest,
+    ForexBatchConvertResponse,
     ForexHistoricalResponse,
+    ForexTimeseriesResponse,
     CryptoLatestResponse,
     CryptoHistoricalResponse,
     CryptoMarketCapResponse,
     ErrorResponse
 )
-from app.core.cache import redis_client
+from app.core.cache import redis_client, get_cache_stats, get_forex_refresh_stats
+from app.core.singleflight import singleflight
+from app.core.latency import get_latency_stats
+from app.core.circuit_breaker import get_circuit_stats
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the shared HTTP client; flush rate limits and close it on shutdown"""
+    await http_client.start()
+    yield
+    await rate_limiter.close()
+    await http_client.close()
+    if history_store is not None:
+        history_store.close()
+
 # Initialize FastAPI app
 app = FastAPI(
     title="LiteForexCryptoAPI",
     description="Simple, Fast, Affordable Currency & Crypto Rates API for Developers & Indie Projects",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # Add middleware
@@ -51,37 +79,13 @@ app.add_middleware(
 )
 
 # Initialize services
-forex_service = ForexService()
-crypto_service = CryptoService()
-rate_limiter = RateLimiter()
-
-@app.middleware("http")
-async def rate_limit_middleware(request: Request, call_next):
-    """Rate limiting middleware"""
-    client_ip = request.client.host
-    endpoint = request.url.path
-    
-    if not rate_limiter.is_allowed(client_ip, endpoint):
-        return JSONResponse(
-            status_code=429,
-            content={
-                "success": False,
-                "error": "Rate limit exceeded",
-                "message": "Too many requests. Please try again later."
-            }
-        )
-    
-    response = await call_next(request)
-    return response
+forex_service = ForexService(http_client)
+crypto_service = CryptoService(http_client)
+rate_limiter = create_rate_limiter()
 
-@app.middleware("http")
-async def add_process_time_header(request: Request, call_next):
-    """Add processing time header"""
-    start_time = time.time()
-    response = await call_next(request)
-    process_time = time.time() - start_time
-    response.headers["X-Process-Time"] = str(process_time)
-    return response
+# Outermost last: process time wraps rate limiting like the previous stack
+app.add_middleware(RateLimitMiddleware, limiter=rate_limiter)
+app.add_middleware(ProcessTimeMiddleware)
 
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
@@ -108,7 +112,9 @@ async def root():
             "forex": {
                 "latest": "/forex/latest",
                 "convert": "/forex/convert", 
+                "convert_batch": "/forex/convert/batch",
                 "historical": "/forex/historical",
+                "timeseries": "/forex/timeseries",
                 "list": "/forex/list"
             },
             "crypto": {
@@ -141,6 +147,26 @@ async def health_check():
         }
     }
 
+@app.get("/stats", tags=["Health"])
+async def get_stats():
+    """Cache and upstream statistics"""
+    if not settings.ENABLE_METRICS:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    
+    return {
+        "success": True,
+        "timestamp": datetime.now().isoformat(),
+        "cache": await get_cache_stats(),
+        "coalescing": singleflight.get_stats(),
+        "upstream_latency": get_latency_stats(),
+        "circuits": get_circuit_stats(),
+        "http_client": http_client.get_stats(),
+        "archive": rate_archive.get_stats() if rate_archive is not None else None,
+        "forex_dates": forex_date_index.get_stats(),
+        "forex_refresh": await get_forex_refresh_stats(),
+        "providers": provider_registry.get_stats()
+    }
+
 # ==================== FOREX ENDPOINTS ====================
 
 @app.get(
@@ -167,7 +193,9 @@ async def get_forex_latest(
             base=base,
             date=rates_data["date"],
             timestamp=int(datetime.now().timestamp()),
-            rates=rates_data["rates"]
+            rates=rates_data["rates"],
+            age=rates_data.get("age"),
+            stale=rates_data.get("stale", False)
         )
     except Exception as e:
         logger.error(f"Error in forex latest: {e}")
@@ -208,6 +236,110 @@ async def convert_forex(
         logger.error(f"Error in forex convert: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def _batch_columns(request: ForexBatchConvertRequest):
+    """Amounts, from and to currencies of a batch request in columnar form"""
+    if request.conversions is not None:
+        rows = request.conversions
+        amounts = np.fromiter((row.amount for row in rows), dtype=np.float64, count=len(rows))
+        return amounts, [row.from_currency for row in rows], [row.to_currency for row in rows]
+    
+    if request.amounts is None or request.from_currencies is None or request.to_currencies is None:
+        raise HTTPException(status_code=400, detail="Send either conversions or amounts, from and to")
+    amounts = np.asarray(request.amounts, dtype=np.float64)
+    columns = []
+    for currencies in (request.from_currencies, request.to_currencies):
+        if isinstance(currencies, str):
+            currencies = [currencies]
+        if len(currencies) not in (1, len(amounts)):
+            raise HTTPException(status_code=400, detail="from and to must have one entry or one per amount")
+        columns.append(currencies)
+    return amounts, columns[0], columns[1]
+
+async def _reserve_request_weight(http_request: Request, symbols: int):
+    """Count the weight of a request sized by its body; 429 if over the limit"""
+    cost = current_request_cost()
+    if cost is None:
+        return
+    previous, cost.symbols = cost.symbols, symbols
+    extra = request_weight(cost) - cost.charged
+    if extra <= 0:
+        return
+    
+    client_ip = http_request.client.host if http_request.client else "unknown"
+    result = await rate_limiter.reserve(client_ip, cost.endpoint, extra)
+    if not result.allowed:
+        # Rejected before any work: nothing more to charge afterwards
+        cost.symbols = previous
+        raise HTTPException(
+            status_code=429,
+            detail=f"Rate limit exceeded: a batch of {symbols} costs {extra + cost.charged} requests",
+            headers={"Retry-After": str(max(0, result.reset - int(time.time())))}
+        )
+    cost.charged += extra
+
+def _nullable(values: np.ndarray, unresolved: List[int]) -> list:
+    """Array as a JSON-ready list with null instead of NaN"""
+    items = values.tolist()
+    for i in unresolved:
+        items[i] = None
+    return items
+
+@app.post(
+    "/forex/convert/batch",
+    response_model=ForexBatchConvertResponse,
+    tags=["Forex"],
+    summary="Convert many amounts",
+    description="Convert a batch of amounts, given as rows or columns, with the latest rates; stream=true returns NDJSON chunks"
+)
+async def convert_forex_batch(request: ForexBatchConvertRequest, http_request: Request, stream: bool = False):
+    """Convert a batch of currency amounts"""
+    try:
+        amounts, from_currencies, to_currencies = _batch_columns(request)
+        if not len(amounts):
+            raise HTTPException(status_code=400, detail="No conversions given")
+        if len(amounts) > settings.FOREX_BATCH_MAX_ITEMS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Batch too large, at most {settings.FOREX_BATCH_MAX_ITEMS} conversions"
+            )
+        await _reserve_request_weight(http_request, len(amounts))
+        
+        batch = await forex_service.convert_batch(amounts, from_currencies, to_currencies)
+        rates, results = batch["rates"], batch["results"]
+        unresolved = np.flatnonzero(np.isnan(results)).tolist()
+        
+        if stream:
+            def chunks():
+                # One line per chunk: offset plus that slice of the columns
+                size = settings.FOREX_BATCH_STREAM_CHUNK
+                for offset in range(0, len(results), size):
+                    chunk_unresolved = np.flatnonzero(np.isnan(results[offset:offset + size])).tolist()
+                    yield to_json({
+                        "date": batch["date"],
+                        "offset": offset,
+                        "rates": _nullable(rates[offset:offset + size], chunk_unresolved),
+                        "results": _nullable(results[offset:offset + size], chunk_unresolved),
+                        "unresolved": chunk_unresolved
+                    }) + b"\n"
+            return StreamingResponse(chunks(), media_type="application/x-ndjson")
+        
+        response = ForexBatchConvertResponse(
+            success=True,
+            date=batch["date"],
+            count=len(results),
+            rates=_nullable(rates, unresolved),
+            results=_nullable(results, unresolved),
+            unresolved=unresolved
+        )
+        # Serialized directly: the default JSONResponse path is several times
+        # slower for millions of floats
+        return Response(content=response.model_dump_json(), media_type="application/json")
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in forex batch convert: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get(
     "/forex/historical",
     response_model=ForexHistoricalResponse,
@@ -240,12 +372,65 @@ async def get_forex_historical(
             success=True,
             base=base,
             date=date_str,
+            effective_date=rates_data.get("date"),
             rates=rates_data["rates"]
         )
     except Exception as e:
         logger.error(f"Error in forex historical: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get(
+    "/forex/timeseries",
+    response_model=ForexTimeseriesResponse,
+    tags=["Forex"],
+    summary="Get forex rates for a date range",
+    description="Get daily exchange rates between two dates (inclusive)"
+)
+async def get_forex_timeseries(
+    start: str,
+    end: str,
+    base: str = "USD",
+    symbols: Optional[str] = None
+):
+    """Get forex time series"""
+    try:
+        # Parse dates
+        try:
+            start_date = datetime.strptime(start, "%Y-%m-%d").date()
+            end_date = datetime.strptime(end, "%Y-%m-%d").date()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+        
+        if start_date > end_date:
+            raise HTTPException(status_code=400, detail="start must not be after end")
+        # There are no rates after today; end_date in the response says where the series stops
+        if start_date > date.today():
+            raise HTTPException(status_code=400, detail="start must not be in the future")
+        end_date = min(end_date, date.today())
+        if (end_date - start_date).days >= settings.FOREX_TIMESERIES_MAX_DAYS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Range too long, at most {settings.FOREX_TIMESERIES_MAX_DAYS} days"
+            )
+        
+        # Parse symbols
+        symbol_list = symbols.split(",") if symbols else ["EUR", "GBP", "JPY", "IDR"]
+        
+        timeseries = await forex_service.get_timeseries(start_date, end_date, base, symbol_list)
+        
+        return ForexTimeseriesResponse(
+            success=timeseries["success"],
+            base=base,
+            start_date=timeseries["start_date"],
+            end_date=timeseries["end_date"],
+            rates=timeseries["rates"]
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in forex timeseries: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/forex/list", tags=["Forex"])
 async def get_forex_list():
     """Get list of supported forex currencies"""
@@ -276,12 +461,14 @@ async def get_crypto_latest(symbols: Optional[str] = None):
         symbol_list = symbols.split(",") if symbols else ["BTC", "ETH", "SOL", "ADA", "BNB"]
         
         # Get crypto data
-        crypto_data = await crypto_service.get_latest_prices(symbol_list)
+        snapshot = await crypto_service.get_latest_snapshot(symbol_list)
         
         return CryptoLatestResponse(
             success=True,
             timestamp=int(datetime.now().timestamp()),
-            data=crypto_data
+            data=snapshot["data"],
+            age=snapshot["age"],
+            stale=snapshot["stale"]
         )
     except Exception as e:
         logger.error(f"Error in crypto latest: {e}")
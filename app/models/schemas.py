@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Union
 from datetime import datetime, date
 
 # ==================== BASE MODELS ====================
@@ -22,6 +22,8 @@ class ForexLatestResponse(BaseModel):
     date: str
     timestamp: int
     rates: Dict[str, float]
+    age: Optional[int] = None  # Seconds since the rates were fetched upstream
+    stale: bool = False
 
 class ForexConvertResponse(BaseModel):
     success: bool = True
@@ -32,12 +34,28 @@ class ForexConvertResponse(BaseModel):
     result: float
     date: str
 
+class ForexBatchConvertResponse(BaseModel):
+    success: bool = True
+    date: str
+    count: int
+    rates: List[Optional[float]]  # Same order as the request; null if a currency is unknown
+    results: List[Optional[float]]
+    unresolved: List[int] = []  # Indexes of the null entries
+
 class ForexHistoricalResponse(BaseModel):
     success: bool = True
     base: str
     date: str
+    effective_date: Optional[str] = None  # Date of the fixing used (earlier for weekends/holidays)
     rates: Dict[str, float]
 
+class ForexTimeseriesResponse(BaseModel):
+    success: bool = True
+    base: str
+    start_date: str
+    end_date: str
+    rates: Dict[str, Dict[str, float]]  # Date -> symbol -> rate
+
 class ForexListResponse(BaseModel):
     success: bool = True
     currencies: List[str]
@@ -56,6 +74,8 @@ class CryptoLatestResponse(BaseModel):
     success: bool = True
     timestamp: int
     data: Dict[str, CryptoPriceData]
+    age: Optional[int] = None  # Seconds since the prices were fetched upstream
+    stale: bool = False
 
 class CryptoHistoricalResponse(BaseModel):
     success: bool = True
@@ -83,6 +103,22 @@ class ForexConvertRequest(BaseModel):
     from_currency: str = Field(..., alias="from")
     to_currency: str = Field(..., alias="to")
 
+class ForexConversion(BaseModel):
+    amount: float
+    from_currency: str = Field(..., alias="from")
+    to_currency: str = Field(..., alias="to")
+
+class ForexBatchConvertRequest(BaseModel):
+    """Either rows in conversions, or columns in amounts/from/to
+
+    In the columnar form from and to may be a single currency used for
+    every amount.
+    """
+    conversions: Optional[List[ForexConversion]] = None
+    amounts: Optional[List[float]] = None
+    from_currencies: Optional[Union[str, List[str]]] = Field(None, alias="from")
+    to_currencies: Optional[Union[str, List[str]]] = Field(None, alias="to")
+
 class ForexHistoricalRequest(BaseModel):
     date: str
     base: str = "USD"
@@ -0,0 +1 @@
+# Upstream rate providers for LiteForexCryptoAPI
@@ -0,0 +1,108 @@
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+FOREX = "forex"
+CRYPTO = "crypto"
+
+# Operations a provider may support; each has its own circuit breaker
+LATEST = "latest"
+HISTORICAL = "historical"
+TIMESERIES = "timeseries"
+MARKETS = "markets"
+SYMBOLS = "symbols"
+
+@dataclass
+class ProviderCapabilities:
+    """What a provider can answer and how it should be called"""
+    kind: str  # FOREX or CRYPTO
+    operations: List[str] = field(default_factory=lambda: [LATEST])
+    bases: Optional[List[str]] = None  # Bases it quotes against; None = any
+    batch_size: Optional[int] = None  # Symbols per upstream call; None = no limit
+    complete: bool = False  # One latest call returns every currency it knows
+    calls_per_month: Optional[int] = None  # Upstream quota; None = unmetered
+
+    def supports(self, operation: str) -> bool:
+        return operation in self.operations
+
+@dataclass
+class RateBatch:
+    """Normalized forex result: units of each symbol per 1 base"""
+    provider: str
+    base: str
+    date: str
+    rates: Dict[str, float]
+    complete: bool = False
+
+@dataclass
+class PriceBatch:
+    """Normalized crypto result: USD market data per upper-case coin id"""
+    provider: str
+    prices: Dict[str, Dict[str, Optional[float]]]
+    date: Optional[str] = None
+
+class Provider:
+    """One upstream source.
+
+    fetch_* methods do the HTTP call and return a normalized batch, or None
+    when the source had nothing usable (errors are logged, not raised).
+    parse_* methods turn a raw response body into that batch without any
+    I/O, so parsing can be benchmarked against recorded responses.
+    """
+
+    name: str = ""
+    capabilities: ProviderCapabilities
+
+    def available(self) -> bool:
+        """Whether the provider is configured (e.g. has its API key)"""
+        return True
+
+    def breaker_name(self, operation: str) -> str:
+        """Circuit breaker (and latency tracker) of one operation"""
+        return self.name if operation == LATEST else f"{self.name}_{operation}"
+
+    async def fetch_symbols(self, session: aiohttp.ClientSession) -> Optional[List[str]]:
+        """Currencies or coin ids the provider quotes"""
+        raise NotImplementedError
+
+    async def _get_text(self, session: aiohttp.ClientSession, url: str, **kwargs) -> Optional[str]:
+        """GET url and return the body, or None on a non-200 status"""
+        async with session.get(url, **kwargs) as response:
+            if response.status != 200:
+                logger.error(f"{self.name} API error: {response.status}")
+                return None
+            return await response.text()
+
+class ForexProvider(Provider):
+    """Source of forex rate tables"""
+
+    async def fetch_latest(self, session: aiohttp.ClientSession, base: str, symbols: List[str] = None) -> Optional[RateBatch]:
+        """Latest rates; complete providers ignore symbols and return everything"""
+        raise NotImplementedError
+
+    async def fetch_historical(self, session: aiohttp.ClientSession, day: str, base: str) -> Optional[RateBatch]:
+        """Full rate table of one past day; date is the fixing upstream used"""
+        raise NotImplementedError
+
+    async def fetch_timeseries(self, session: aiohttp.ClientSession, start: str, end: str, base: str) -> Optional[Dict[str, Dict[str, float]]]:
+        """Full rate tables of start..end (ISO day -> symbol -> rate)"""
+        raise NotImplementedError
+
+class CryptoProvider(Provider):
+    """Source of crypto prices"""
+
+    async def fetch_latest(self, session: aiohttp.ClientSession, coin_ids: List[str]) -> Optional[PriceBatch]:
+        """Latest prices of coins"""
+        raise NotImplementedError
+
+    async def fetch_markets(self, session: aiohttp.ClientSession, coin_ids: List[str]) -> Optional[PriceBatch]:
+        """Latest market data of coins"""
+        raise NotImplementedError
+
+    async def fetch_historical(self, session: aiohttp.ClientSession, day: str, coin_id: str) -> Optional[PriceBatch]:
+        """Prices of one coin on a past day (day as DD-MM-YYYY)"""
+        raise NotImplementedError
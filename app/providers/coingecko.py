@@ -0,0 +1,127 @@
+import json
+import logging
+from typing import List, Optional
+
+import aiohttp
+
+from app.core.config import settings
+from app.providers.base import (
+    CRYPTO,
+    HISTORICAL,
+    LATEST,
+    MARKETS,
+    SYMBOLS,
+    CryptoProvider,
+    PriceBatch,
+    ProviderCapabilities
+)
+
+logger = logging.getLogger(__name__)
+
+class CoinGeckoProvider(CryptoProvider):
+    """CoinGecko: latest prices and markets in batches, history per coin"""
+
+    name = "coingecko"
+    capabilities = ProviderCapabilities(
+        kind=CRYPTO,
+        operations=[LATEST, MARKETS, HISTORICAL, SYMBOLS],
+        bases=["USD"],
+        batch_size=250,  # /coins/markets per_page limit
+        calls_per_month=10000  # Demo plan
+    )
+
+    async def fetch_latest(self, session: aiohttp.ClientSession, coin_ids: List[str]) -> Optional[PriceBatch]:
+        params = {
+            "ids": ",".join(coin_ids),
+            "vs_currencies": "usd",
+            "include_24hr_change": "true",
+            "include_market_cap": "true",
+            "include_24hr_vol": "true",
+            "include_circulating_supply": "true"
+        }
+        try:
+            text = await self._get_text(session, f"{settings.COINGECKO_API_URL}/simple/price", params=params)
+            return self.parse_latest(text) if text is not None else None
+        except Exception as e:
+            logger.error(f"Error fetching from CoinGecko API: {e}")
+            return None
+
+    def parse_latest(self, text: str) -> Optional[PriceBatch]:
+        prices = {
+            coin_id.upper(): {
+                "price": coin_data.get("usd", 0),
+                "change_24h": coin_data.get("usd_24h_change", 0),
+                "market_cap": coin_data.get("usd_market_cap", 0),
+                "volume_24h": coin_data.get("usd_24h_vol", 0),
+                "circulating_supply": coin_data.get("circulating_supply", 0)
+            }
+            for coin_id, coin_data in json.loads(text).items()
+        }
+        return PriceBatch(provider=self.name, prices=prices)
+
+    async def fetch_markets(self, session: aiohttp.ClientSession, coin_ids: List[str]) -> Optional[PriceBatch]:
+        params = {
+            "vs_currency": "usd",
+            "ids": ",".join(coin_ids),
+            "order": "market_cap_desc",
+            "per_page": self.capabilities.batch_size,
+            "page": 1,
+            "sparkline": "false"
+        }
+        try:
+            text = await self._get_text(session, f"{settings.COINGECKO_API_URL}/coins/markets", params=params)
+            return self.parse_markets(text) if text is not None else None
+        except Exception as e:
+            logger.error(f"Error fetching market cap data: {e}")
+            return None
+
+    def parse_markets(self, text: str) -> Optional[PriceBatch]:
+        prices = {
+            coin.get("id", "").upper(): {
+                "price": coin.get("current_price", 0),
+                "change_24h": coin.get("price_change_percentage_24h", 0),
+                "market_cap": coin.get("market_cap", 0),
+                "volume_24h": coin.get("total_volume", 0),
+                "circulating_supply": coin.get("circulating_supply", 0)
+            }
+            for coin in json.loads(text)
+        }
+        return PriceBatch(provider=self.name, prices=prices)
+
+    async def fetch_historical(self, session: aiohttp.ClientSession, day: str, coin_id: str) -> Optional[PriceBatch]:
+        try:
+            url = f"{settings.COINGECKO_API_URL}/coins/{coin_id}/history"
+            text = await self._get_text(session, url, params={"date": day})
+            return self.parse_historical(text, day, coin_id) if text is not None else None
+        except Exception as e:
+            logger.error(f"Error fetching historical data for {coin_id}: {e}")
+            return None
+
+    def parse_historical(self, text: str, day: str, coin_id: str) -> Optional[PriceBatch]:
+        market_data = json.loads(text).get("market_data")
+        if not market_data:
+            # A valid answer: CoinGecko has no data for the coin on that day
+            return PriceBatch(provider=self.name, date=day, prices={})
+        return PriceBatch(
+            provider=self.name,
+            date=day,
+            prices={
+                coin_id.upper(): {
+                    "price": market_data["current_price"]["usd"],
+                    "market_cap": market_data["market_cap"]["usd"],
+                    "volume_24h": market_data["total_volume"]["usd"]
+                }
+            }
+        )
+
+    async def fetch_symbols(self, session: aiohttp.ClientSession) -> Optional[List[str]]:
+        try:
+            text = await self._get_text(session, f"{settings.COINGECKO_API_URL}/coins/list")
+            return self.parse_symbols(text) if text is not None else None
+        except Exception as e:
+            logger.error(f"Error getting supported cryptocurrencies: {e}")
+            return None
+
+    def parse_symbols(self, text: str) -> Optional[List[str]]:
+        # The first 50 coins of the list
+        return [coin["id"] for coin in json.loads(text)[:50]]
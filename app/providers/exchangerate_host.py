@@ -0,0 +1,100 @@
+import json
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import aiohttp
+
+from app.core.config import settings
+from app.providers.base import (
+    FOREX,
+    HISTORICAL,
+    LATEST,
+    SYMBOLS,
+    TIMESERIES,
+    ForexProvider,
+    ProviderCapabilities,
+    RateBatch
+)
+
+logger = logging.getLogger(__name__)
+
+class ExchangeRateHostProvider(ForexProvider):
+    """exchangerate.host: full tables for any base, history and time series"""
+
+    name = "exchangerate_host"
+    capabilities = ProviderCapabilities(
+        kind=FOREX,
+        operations=[LATEST, HISTORICAL, TIMESERIES, SYMBOLS],
+        complete=True
+    )
+
+    async def fetch_latest(self, session: aiohttp.ClientSession, base: str, symbols: List[str] = None) -> Optional[RateBatch]:
+        try:
+            text = await self._get_text(session, f"{settings.ECB_API_URL}?base={base}")
+            return self.parse_latest(text, base) if text is not None else None
+        except Exception as e:
+            logger.error(f"Error fetching from ExchangeRate API: {e}")
+            return None
+
+    def parse_latest(self, text: str, base: str) -> Optional[RateBatch]:
+        data = json.loads(text)
+        if not data.get("success"):
+            return None
+        return RateBatch(
+            provider=self.name,
+            base=data.get("base", base),
+            date=data.get("date", datetime.now().strftime("%Y-%m-%d")),
+            rates=data.get("rates", {}),
+            complete=True
+        )
+
+    async def fetch_historical(self, session: aiohttp.ClientSession, day: str, base: str) -> Optional[RateBatch]:
+        try:
+            text = await self._get_text(session, f"https://api.exchangerate.host/{day}?base={base}")
+            return self.parse_historical(text, day, base) if text is not None else None
+        except Exception as e:
+            logger.error(f"Error fetching historical rates from ExchangeRate API: {e}")
+            return None
+
+    def parse_historical(self, text: str, day: str, base: str) -> Optional[RateBatch]:
+        data = json.loads(text)
+        if not data.get("success"):
+            return None
+        return RateBatch(
+            provider=self.name,
+            base=data.get("base", base),
+            # A day without a fixing is answered with the previous one
+            date=data.get("date") or day,
+            rates=data.get("rates", {}),
+            complete=True
+        )
+
+    async def fetch_timeseries(self, session: aiohttp.ClientSession, start: str, end: str, base: str) -> Optional[Dict[str, Dict[str, float]]]:
+        try:
+            url = f"https://api.exchangerate.host/timeseries?start_date={start}&end_date={end}&base={base}"
+            text = await self._get_text(session, url)
+            return self.parse_timeseries(text) if text is not None else None
+        except Exception as e:
+            logger.error(f"Error fetching time series from ExchangeRate API: {e}")
+            return None
+
+    def parse_timeseries(self, text: str) -> Optional[Dict[str, Dict[str, float]]]:
+        data = json.loads(text)
+        if not data.get("success"):
+            return None
+        return {day: rates for day, rates in data.get("rates", {}).items() if rates}
+
+    async def fetch_symbols(self, session: aiohttp.ClientSession) -> Optional[List[str]]:
+        try:
+            text = await self._get_text(session, "https://api.exchangerate.host/symbols")
+            return self.parse_symbols(text) if text is not None else None
+        except Exception as e:
+            logger.error(f"Error fetching symbols from ExchangeRate API: {e}")
+            return None
+
+    def parse_symbols(self, text: str) -> Optional[List[str]]:
+        data = json.loads(text)
+        if not data.get("success"):
+            return None
+        return list(data.get("symbols", {}).keys())
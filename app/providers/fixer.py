@@ -0,0 +1,50 @@
+import json
+import logging
+from typing import List, Optional
+
+import aiohttp
+
+from app.core.config import settings
+from app.providers.base import FOREX, LATEST, ForexProvider, ProviderCapabilities, RateBatch
+
+logger = logging.getLogger(__name__)
+
+class FixerProvider(ForexProvider):
+    """Fixer.io: full tables, free plan quotes against EUR only
+
+    Rates are returned against EUR as-is; rebasing to any other currency is
+    done by CrossRateTable.
+    """
+
+    name = "fixer"
+    capabilities = ProviderCapabilities(
+        kind=FOREX,
+        operations=[LATEST],
+        bases=["EUR"],
+        complete=True,
+        calls_per_month=100
+    )
+
+    def available(self) -> bool:
+        return bool(settings.FIXER_API_KEY)
+
+    async def fetch_latest(self, session: aiohttp.ClientSession, base: str, symbols: List[str] = None) -> Optional[RateBatch]:
+        try:
+            url = f"http://data.fixer.io/api/latest?access_key={settings.FIXER_API_KEY}"
+            text = await self._get_text(session, url)
+            return self.parse_latest(text) if text is not None else None
+        except Exception as e:
+            logger.error(f"Error fetching from Fixer.io: {e}")
+            return None
+
+    def parse_latest(self, text: str) -> Optional[RateBatch]:
+        data = json.loads(text)
+        if not data.get("success"):
+            return None
+        return RateBatch(
+            provider=self.name,
+            base="EUR",
+            date=data.get("date"),
+            rates=data.get("rates", {}),
+            complete=True
+        )
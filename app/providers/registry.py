@@ -0,0 +1,115 @@
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.core.cache import redis_client, CacheKeys
+from app.core.circuit_breaker import get_breaker, order_by_health
+from app.providers.base import LATEST, Provider
+from app.providers.coingecko import CoinGeckoProvider
+from app.providers.exchangerate_host import ExchangeRateHostProvider
+from app.providers.fixer import FixerProvider
+from app.providers.yahoo_finance import YahooFinanceProvider
+
+logger = logging.getLogger(__name__)
+
+class ProviderRegistry:
+    """Registered providers, selected by capability and measured health.
+
+    Registration order is the preference order when providers are equally
+    healthy. Every call goes through the circuit breaker of the provider's
+    operation, which also records its latency. Calls to providers with a
+    monthly quota are counted in Redis, and a provider whose quota is used
+    up is not selected until the next month.
+    """
+
+    def __init__(self):
+        self._providers: Dict[str, Provider] = {}
+        # name -> (month, calls) as last counted by this worker
+        self._usage: Dict[str, Tuple[str, int]] = {}
+
+    def register(self, provider: Provider):
+        """Add a provider (replacing one with the same name)"""
+        self._providers[provider.name] = provider
+
+    def get(self, name: str) -> Provider:
+        return self._providers[name]
+
+    def select(self, kind: str, operation: str = LATEST, base: str = None) -> List[Provider]:
+        """Available providers of kind supporting operation, healthiest and fastest first
+
+        With a base, only providers quoting against it (or any base) are
+        returned. Providers without calls left this month are skipped.
+        """
+        candidates = {
+            provider.breaker_name(operation): provider
+            for provider in self._providers.values()
+            if provider.capabilities.kind == kind
+            and provider.capabilities.supports(operation)
+            and (base is None or provider.capabilities.bases is None or base in provider.capabilities.bases)
+            and provider.available()
+            and self.remaining_calls(provider) != 0
+        }
+        return [candidates[name] for name in order_by_health(list(candidates))]
+
+    async def call(self, provider: Provider, operation: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run one provider call through its breaker; None if skipped or unusable"""
+        async def counted():
+            await self._count_call(provider)
+            return await fn()
+
+        # Only calls the breaker lets through reach upstream and are counted
+        return await get_breaker(provider.breaker_name(operation)).call(counted, lambda result: result is not None)
+
+    def remaining_calls(self, provider: Provider) -> Optional[int]:
+        """Calls left in the provider's monthly quota; None if unmetered"""
+        quota = provider.capabilities.calls_per_month
+        if quota is None:
+            return None
+        month, calls = self._usage.get(provider.name, (None, 0))
+        if month != _current_month():
+            calls = 0
+        return max(0, quota - calls)
+
+    async def _count_call(self, provider: Provider):
+        """Count one upstream call against a metered provider's quota"""
+        if provider.capabilities.calls_per_month is None:
+            return
+        month = _current_month()
+        last_month, calls = self._usage.get(provider.name, (None, 0))
+        calls = calls + 1 if last_month == month else 1
+        try:
+            if redis_client.redis_client:
+                # Shared by every worker; kept a little past the month
+                key = CacheKeys.provider_calls(provider.name, month)
+                calls = await redis_client.redis_client.incr(key)
+                await redis_client.redis_client.expire(key, 32 * 86400)
+        except Exception as e:
+            logger.error(f"Error counting calls for {provider.name}: {e}")
+        self._usage[provider.name] = (month, calls)
+
+    def get_stats(self) -> Dict:
+        """Get every provider's capabilities and availability"""
+        return {
+            name: {
+                "kind": provider.capabilities.kind,
+                "operations": provider.capabilities.operations,
+                "bases": provider.capabilities.bases,
+                "batch_size": provider.capabilities.batch_size,
+                "complete": provider.capabilities.complete,
+                "calls_per_month": provider.capabilities.calls_per_month,
+                "remaining_calls": self.remaining_calls(provider),
+                "available": provider.available()
+            }
+            for name, provider in self._providers.items()
+        }
+
+def _current_month() -> str:
+    """Quota period of upstream plans (UTC calendar month)"""
+    return time.strftime("%Y-%m", time.gmtime())
+
+# Global registry, in preference order
+provider_registry = ProviderRegistry()
+provider_registry.register(ExchangeRateHostProvider())
+provider_registry.register(YahooFinanceProvider())
+provider_registry.register(FixerProvider())
+provider_registry.register(CoinGeckoProvider())
@@ -0,0 +1,80 @@
+import asyncio
+import logging
+import re
+from datetime import datetime
+from typing import List, Optional
+
+import aiohttp
+
+from app.core.config import settings
+from app.core.cache import get_cached_forex_pairs, set_cached_forex_pairs
+from app.providers.base import FOREX, LATEST, ForexProvider, ProviderCapabilities, RateBatch
+
+logger = logging.getLogger(__name__)
+
+YAHOO_PRICE_PATTERN = re.compile(r'"regularMarketPrice":\s*([\d.]+)')
+YAHOO_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+}
+
+class YahooFinanceProvider(ForexProvider):
+    """Yahoo Finance quote pages: one pair per page, a partial table (fallback)
+
+    Pages are fetched concurrently up to YAHOO_FINANCE_CONCURRENCY and pairs
+    are cached individually so partial successes are reused.
+    """
+
+    name = "yahoo_finance"
+    capabilities = ProviderCapabilities(
+        kind=FOREX,
+        operations=[LATEST],
+        batch_size=1
+    )
+
+    async def fetch_latest(self, session: aiohttp.ClientSession, base: str, symbols: List[str] = None) -> Optional[RateBatch]:
+        symbols = symbols or settings.DEFAULT_FOREX_CURRENCIES
+        try:
+            rates = await get_cached_forex_pairs(base, symbols)
+            if base in symbols:
+                rates[base] = 1.0
+
+            missing = [symbol for symbol in symbols if symbol not in rates]
+            if missing:
+                semaphore = asyncio.Semaphore(settings.YAHOO_FINANCE_CONCURRENCY)
+                results = await asyncio.gather(*(
+                    self._fetch_pair(session, semaphore, base, symbol)
+                    for symbol in missing
+                ))
+                fetched = {symbol: rate for symbol, rate in zip(missing, results) if rate is not None}
+                if fetched:
+                    await set_cached_forex_pairs(base, fetched)
+                rates.update(fetched)
+
+            if not any(symbol != base for symbol in rates):
+                return None
+            return RateBatch(
+                provider=self.name,
+                base=base,
+                date=datetime.now().strftime("%Y-%m-%d"),
+                rates=rates
+            )
+        except Exception as e:
+            logger.error(f"Error fetching from Yahoo Finance: {e}")
+            return None
+
+    async def _fetch_pair(self, session: aiohttp.ClientSession, semaphore: asyncio.Semaphore, base: str, symbol: str) -> Optional[float]:
+        """Fetch one currency pair quote page and extract its price"""
+        url = f"{settings.YAHOO_FINANCE_BASE_URL}/{base}{symbol}=X"
+        try:
+            async with semaphore:
+                text = await self._get_text(session, url, headers=YAHOO_HEADERS)
+        except Exception as e:
+            logger.error(f"Error fetching {base}{symbol} from Yahoo Finance: {e}")
+            return None
+        return self.parse_quote(text) if text is not None else None
+
+    def parse_quote(self, text: str) -> Optional[float]:
+        # Simple regex to extract price (this is a basic implementation)
+        # In production, you'd want to use a proper HTML parser
+        price_match = YAHOO_PRICE_PATTERN.search(text)
+        return float(price_match.group(1)) if price_match else None
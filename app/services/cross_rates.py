@@ -0,0 +1,88 @@
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class CrossRateTable:
+    """Derive any base/quote pair from a single anchor rate table.
+
+    Rates are held as one float64 vector of "units of currency per 1 anchor"
+    over all known currencies, so rebasing is a single vectorized division.
+    Currencies the anchor table does not quote are NaN.
+    """
+
+    def __init__(
+        self,
+        anchor: str,
+        rates: Dict[str, float],
+        date: Optional[str] = None,
+        complete: bool = True,
+        currencies: Optional[List[str]] = None,
+        fetched_at: Optional[float] = None
+    ):
+        self.anchor = anchor
+        self.date = date
+        self.complete = complete
+        self.fetched_at = fetched_at
+
+        # dict.fromkeys keeps order and drops duplicates
+        known = currencies or settings.DEFAULT_FOREX_CURRENCIES
+        self.currencies = list(dict.fromkeys([anchor, *known, *rates]))
+        self.index = {currency: i for i, currency in enumerate(self.currencies)}
+
+        self.vector = np.full(len(self.currencies), np.nan)
+        for currency, rate in rates.items():
+            if rate:
+                self.vector[self.index[currency]] = rate
+        self.vector[self.index[anchor]] = 1.0
+
+    def has(self, currency: str) -> bool:
+        """Check whether the table quotes currency"""
+        i = self.index.get(currency)
+        return i is not None and bool(np.isfinite(self.vector[i]))
+
+    def covers(self, base: str, symbols: Optional[List[str]] = None) -> bool:
+        """Check whether base/symbols can be answered without refetching
+
+        A complete table is authoritative: currencies it does not quote are
+        unknown upstream as well.
+        """
+        if self.complete:
+            return True
+        return self.has(base) and all(self.has(symbol) for symbol in symbols or [])
+
+    def rates_for(self, base: str, symbols: Optional[List[str]] = None) -> Dict[str, float]:
+        """Get rates of symbols (default: every quoted currency) against base"""
+        if not self.has(base):
+            return {}
+
+        names = self.currencies if not symbols else [s for s in symbols if s in self.index]
+        idx = np.fromiter((self.index[name] for name in names), dtype=np.intp, count=len(names))
+        values = self.vector[idx] / self.vector[self.index[base]]
+
+        return {
+            name: value
+            for name, value in zip(names, values.tolist())
+            if value == value  # skip NaN (currency not quoted)
+        }
+
+    def rate(self, base: str, quote: str) -> Optional[float]:
+        """Get a single base/quote rate"""
+        if not self.has(base) or not self.has(quote):
+            return None
+        return float(self.vector[self.index[quote]] / self.vector[self.index[base]])
+
+    def rebase(self, anchor: str) -> "CrossRateTable":
+        """Return the same table expressed against another anchor"""
+        return CrossRateTable(
+            anchor,
+            self.rates_for(anchor),
+            date=self.date,
+            complete=self.complete,
+            currencies=self.currencies,
+            fetched_at=self.fetched_at
+        )
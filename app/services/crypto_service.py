@@ -1,144 +1,141 @@
 import aiohttp
+import asyncio
 import logging
+import time
 from typing import Dict, List, Optional
 from datetime import datetime, date, timedelta
 import json
 
+import numpy as np
+
 from app.core.config import settings
 from app.core.cache import (
+    CacheKeys,
+    REFRESH_LOCK_TTL,
+    redis_client,
     get_cached_crypto_prices,
     set_cached_crypto_prices,
     get_cached_historical_crypto,
     set_cached_historical_crypto
 )
+from app.core.singleflight import singleflight
+from app.core.history_store import history_store
+from app.core.columnar_archive import rate_archive, archive_days
+from app.core.http_client import HTTPClientManager, http_client as default_http_client
+from app.providers.base import CRYPTO, HISTORICAL, LATEST, MARKETS, SYMBOLS
+from app.providers.registry import provider_registry
 
 logger = logging.getLogger(__name__)
 
 class CryptoService:
-    def __init__(self):
-        self.session = None
+    def __init__(self, http_client: HTTPClientManager = None):
+        self.http_client = http_client or default_http_client
         self.supported_cryptocurrencies = settings.DEFAULT_CRYPTO_CURRENCIES
     
     async def _get_session(self):
-        """Get or create aiohttp session"""
-        if self.session is None or self.session.closed:
-            self.session = aiohttp.ClientSession(
-                timeout=aiohttp.ClientTimeout(total=10)
-            )
-        return self.session
-    
-    async def _fetch_from_coingecko(self, ids: List[str] = None) -> Dict:
-        """Fetch crypto data from CoinGecko API"""
-        try:
-            session = await self._get_session()
-            
-            # Build URL
-            url = f"{settings.COINGECKO_API_URL}/simple/price"
-            params = {
-                "ids": ",".join(ids) if ids else ",".join(self.supported_cryptocurrencies),
-                "vs_currencies": "usd",
-                "include_24hr_change": "true",
-                "include_market_cap": "true",
-                "include_24hr_vol": "true",
-                "include_circulating_supply": "true"
-            }
-            
-            async with session.get(url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return self._format_coingecko_data(data)
-                else:
-                    logger.error(f"CoinGecko API error: {response.status}")
-                    return None
-        except Exception as e:
-            logger.error(f"Error fetching from CoinGecko API: {e}")
-            return None
-    
-    async def _fetch_market_cap_data(self, ids: List[str] = None) -> Dict:
-        """Fetch market cap data from CoinGecko"""
-        try:
-            session = await self._get_session()
-            
-            url = f"{settings.COINGECKO_API_URL}/coins/markets"
-            params = {
-                "vs_currency": "usd",
-                "ids": ",".join(ids) if ids else ",".join(self.supported_cryptocurrencies),
-                "order": "market_cap_desc",
-                "per_page": 100,
-                "page": 1,
-                "sparkline": False
-            }
-            
-            async with session.get(url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return self._format_market_cap_data(data)
-                else:
-                    logger.error(f"CoinGecko market cap API error: {response.status}")
-                    return None
-        except Exception as e:
-            logger.error(f"Error fetching market cap data: {e}")
-            return None
+        """Get the shared aiohttp session"""
+        return await self.http_client.get_session()
     
-    def _format_coingecko_data(self, raw_data: Dict) -> Dict:
-        """Format CoinGecko API response"""
-        formatted_data = {}
-        
-        for coin_id, coin_data in raw_data.items():
-            formatted_data[coin_id.upper()] = {
-                "price": coin_data.get("usd", 0),
-                "change_24h": coin_data.get("usd_24h_change", 0),
-                "market_cap": coin_data.get("usd_market_cap", 0),
-                "volume_24h": coin_data.get("usd_24h_vol", 0),
-                "circulating_supply": coin_data.get("circulating_supply", 0)
-            }
-        
-        return formatted_data
-    
-    def _format_market_cap_data(self, raw_data: List[Dict]) -> Dict:
-        """Format market cap API response"""
-        formatted_data = {}
-        
-        for coin in raw_data:
-            coin_id = coin.get("id", "").upper()
-            formatted_data[coin_id] = {
-                "price": coin.get("current_price", 0),
-                "change_24h": coin.get("price_change_percentage_24h", 0),
-                "market_cap": coin.get("market_cap", 0),
-                "volume_24h": coin.get("total_volume", 0),
-                "circulating_supply": coin.get("circulating_supply", 0)
-            }
+    async def _fetch_prices(self, operation: str, coin_ids: List[str]) -> Optional[Dict]:
+        """Fetch latest prices or market data, healthiest provider first
         
-        return formatted_data
+        Coins are split into batches of the provider's batch size and the
+        batches are fetched concurrently.
+        """
+        session = await self._get_session()
+        for provider in provider_registry.select(CRYPTO, operation):
+            fetch = provider.fetch_latest if operation == LATEST else provider.fetch_markets
+            size = provider.capabilities.batch_size or len(coin_ids)
+            batches = await asyncio.gather(*(
+                provider_registry.call(provider, operation, lambda chunk=chunk: fetch(session, chunk))
+                for chunk in (coin_ids[i:i + size] for i in range(0, len(coin_ids), size))
+            ))
+            prices = {}
+            for batch in batches:
+                if batch is not None:
+                    prices.update(batch.prices)
+            if prices:
+                return prices
+        return None
     
     async def get_latest_prices(self, symbols: List[str] = None) -> Dict:
         """Get latest crypto prices with caching"""
+        snapshot = await self.get_latest_snapshot(symbols)
+        return snapshot["data"]
+    
+    async def get_latest_snapshot(self, symbols: List[str] = None) -> Dict:
+        """Get latest crypto prices with caching, plus the age of the data
+
+        Past CRYPTO_CACHE_TTL the stale prices are still returned while one
+        background task refreshes them.
+        """
         try:
             # Normalize symbols to CoinGecko IDs
             coin_ids = self._normalize_symbols_to_ids(symbols or ["BTC", "ETH", "SOL", "ADA", "BNB"])
+            key = CacheKeys.crypto_latest(",".join(coin_ids))
             
             # Check cache first
-            cached_data = await get_cached_crypto_prices(coin_ids)
-            if cached_data:
+            entry = await get_cached_crypto_prices(coin_ids)
+            if entry:
                 logger.info("Returning cached crypto prices")
-                return cached_data
-            
-            # Fetch from API
-            logger.info("Fetching fresh crypto prices")
-            data = await self._fetch_from_coingecko(coin_ids)
+                if self._age(entry) > settings.CRYPTO_CACHE_TTL:
+                    singleflight.spawn(
+                        f"revalidate:{key}",
+                        lambda: self._revalidate_latest_prices(coin_ids)
+                    )
+            else:
+                # Concurrent misses on the same key share one CoinGecko call
+                entry = await singleflight.do(
+                    key,
+                    lambda: self._refresh_latest_prices(coin_ids)
+                )
             
-            if data:
-                # Cache the result
-                await set_cached_crypto_prices(data, coin_ids)
-                return data
+            if entry:
+                age = self._age(entry)
+                return {
+                    "data": entry["data"],
+                    "age": int(age),
+                    "stale": age > settings.CRYPTO_CACHE_TTL
+                }
             else:
                 # Return default data if API fails
                 logger.warning("API failed, returning default crypto prices")
-                return self._get_default_crypto_prices(symbols)
+                return {"data": self._get_default_crypto_prices(symbols), "age": None, "stale": False}
                 
         except Exception as e:
             logger.error(f"Error in get_latest_prices: {e}")
-            return self._get_default_crypto_prices(symbols)
+            return {"data": self._get_default_crypto_prices(symbols), "age": None, "stale": False}
+    
+    async def _refresh_latest_prices(self, coin_ids: List[str]) -> Optional[Dict]:
+        """Fetch latest prices from CoinGecko and cache them"""
+        logger.info("Fetching fresh crypto prices")
+        data = await self._fetch_prices(LATEST, coin_ids)
+        
+        if data:
+            # Cache the result
+            await set_cached_crypto_prices(data, coin_ids)
+            return {"data": data, "fetched_at": time.time()}
+        return None
+    
+    async def _revalidate_latest_prices(self, coin_ids: List[str]):
+        """Background refresh of stale prices"""
+        key = CacheKeys.crypto_latest(",".join(coin_ids))
+        
+        # Another worker may already have refreshed it; re-read Redis, past
+        # this worker's local copy of every coin entry
+        for coin_id in coin_ids:
+            redis_client.local_cache.delete(CacheKeys.crypto_latest(coin_id))
+        entry = await get_cached_crypto_prices(coin_ids)
+        if entry and self._age(entry) <= settings.CRYPTO_CACHE_TTL:
+            return
+        
+        if not await redis_client.try_lock(CacheKeys.refresh_lock(key), REFRESH_LOCK_TTL):
+            return
+        await self._refresh_latest_prices(coin_ids)
+    
+    def _age(self, entry: Dict) -> float:
+        """Seconds since a cache entry was fetched upstream"""
+        return max(0.0, time.time() - entry["fetched_at"])
     
     async def get_historical_prices(self, target_date: date, symbols: List[str] = None) -> Dict:
         """Get historical crypto prices for a specific date"""
@@ -146,41 +143,44 @@ class CryptoService:
             date_str = target_date.strftime("%d-%m-%Y")
             coin_ids = self._normalize_symbols_to_ids(symbols or ["BTC", "ETH", "SOL"])
             
-            # Check cache first
-            cached_data = await get_cached_historical_crypto(date_str, coin_ids)
-            if cached_data:
+            # Check cache first; every coin is cached separately, so only
+            # the coins that are missing need an upstream call
+            data = await get_cached_historical_crypto(date_str, coin_ids)
+            missing = [coin_id for coin_id in coin_ids if coin_id.upper() not in data]
+            if not missing:
                 logger.info(f"Returning cached historical crypto prices for {date_str}")
-                return cached_data
+                return data
             
-            # Fetch historical data
-            logger.info(f"Fetching historical crypto prices for {date_str}")
-            session = await self._get_session()
+            # Then the columnar archive and the history store (keyed by ISO date)
+            store_date = target_date.isoformat()
+            if rate_archive is not None:
+                archived = self._get_archived_prices(target_date, target_date, missing).get(store_date, {})
+                if archived:
+                    await set_cached_historical_crypto(date_str, archived, missing)
+                    data.update(archived)
+                    missing = [coin_id for coin_id in missing if coin_id.upper() not in archived]
+                if not missing:
+                    logger.info(f"Returning archived historical crypto prices for {date_str}")
+                    return data
             
-            url = f"{settings.COINGECKO_API_URL}/coins/bitcoin/history"
-            params = {"date": date_str}
+            if history_store is not None:
+                stored = await history_store.get_crypto(store_date, [coin_id.upper() for coin_id in missing])
+                if stored:
+                    await set_cached_historical_crypto(date_str, stored, missing)
+                    await self._archive_prices(store_date, stored)
+                    data.update(stored)
+                    missing = [coin_id for coin_id in missing if coin_id.upper() not in stored]
+                if not missing:
+                    logger.info(f"Returning stored historical crypto prices for {date_str}")
+                    return data
             
-            # Note: CoinGecko free API has limited historical data
-            # For production, you might want to use a paid service or store historical data
-            data = {}
-            for coin_id in coin_ids:
-                try:
-                    coin_url = f"{settings.COINGECKO_API_URL}/coins/{coin_id}/history"
-                    async with session.get(coin_url, params=params) as response:
-                        if response.status == 200:
-                            coin_data = await response.json()
-                            if "market_data" in coin_data:
-                                data[coin_id.upper()] = {
-                                    "price": coin_data["market_data"]["current_price"]["usd"],
-                                    "market_cap": coin_data["market_data"]["market_cap"]["usd"],
-                                    "volume_24h": coin_data["market_data"]["total_volume"]["usd"]
-                                }
-                except Exception as e:
-                    logger.error(f"Error fetching historical data for {coin_id}: {e}")
-                    continue
+            fetched = await singleflight.do(
+                CacheKeys.crypto_historical(date_str, ",".join(missing)),
+                lambda: self._fetch_historical_prices(date_str, missing, store_date)
+            )
+            data.update(fetched)
             
             if data:
-                # Cache the result
-                await set_cached_historical_crypto(date_str, data, coin_ids)
                 return data
             else:
                 return self._get_default_crypto_prices(symbols)
@@ -189,13 +189,78 @@ class CryptoService:
             logger.error(f"Error in get_historical_prices: {e}")
             return self._get_default_crypto_prices(symbols)
     
+    async def _fetch_historical_prices(self, date_str: str, coin_ids: List[str], store_date: str = None) -> Dict:
+        """Fetch historical prices from upstream, store and cache them"""
+        logger.info(f"Fetching historical crypto prices for {date_str}")
+        session = await self._get_session()
+        
+        # One coin per call; sequential to stay inside free-plan quotas
+        data = {}
+        providers = provider_registry.select(CRYPTO, HISTORICAL)
+        for coin_id in coin_ids:
+            for provider in providers:
+                batch = await provider_registry.call(
+                    provider, HISTORICAL, lambda: provider.fetch_historical(session, date_str, coin_id)
+                )
+                if batch is not None:
+                    data.update(batch.prices)
+                    break
+        
+        if data:
+            # Cache the result
+            await set_cached_historical_crypto(date_str, data, coin_ids)
+            if store_date:
+                if history_store is not None:
+                    await history_store.put_crypto(store_date, data)
+                await self._archive_prices(store_date, data)
+        return data
+    
+    def _get_archived_prices(self, start: date, end: date, coin_ids: List[str]) -> Dict[str, Dict[str, Dict]]:
+        """Archived prices by ISO day and coin for start..end (zero-copy column slices)"""
+        days = (end - start).days + 1
+        result: Dict[str, Dict[str, Dict]] = {}
+        try:
+            for coin_id in coin_ids:
+                coin = coin_id.upper()
+                columns = {
+                    field: rate_archive.read("crypto", f"{coin}.{field}", start, end)
+                    for field in ("price", "market_cap", "volume_24h")
+                }
+                prices = columns["price"]
+                if not len(prices):
+                    continue
+                covered = np.zeros(days, dtype=bool)
+                covered[:len(prices)] = ~np.isnan(prices)
+                for offset, day in zip(np.flatnonzero(covered), archive_days(start, covered)):
+                    result.setdefault(day, {})[coin] = {
+                        field: float(values[offset]) if offset < len(values) and values[offset] == values[offset] else None
+                        for field, values in columns.items()
+                    }
+        except Exception as e:
+            logger.error(f"Error reading crypto archive: {e}")
+        return result
+    
+    async def _archive_prices(self, day: str, prices: Dict[str, Dict]):
+        """Add one day's prices to the columnar archive"""
+        if rate_archive is None:
+            return
+        columns = {
+            f"{coin}.{field}": value
+            for coin, data in prices.items()
+            for field, value in data.items()
+        }
+        try:
+            await asyncio.to_thread(rate_archive.write, "crypto", {day: columns}, False)
+        except Exception as e:
+            logger.error(f"Error archiving crypto prices: {e}")
+    
     async def get_market_cap_data(self, symbols: List[str] = None) -> Dict:
         """Get market cap data for cryptocurrencies"""
         try:
             coin_ids = self._normalize_symbols_to_ids(symbols or ["BTC", "ETH", "SOL", "ADA", "BNB"])
             
             # Fetch market cap data
-            data = await self._fetch_market_cap_data(coin_ids)
+            data = await self._fetch_prices(MARKETS, coin_ids)
             
             if data:
                 return data
@@ -210,15 +275,12 @@ class CryptoService:
     async def get_supported_cryptocurrencies(self) -> List[str]:
         """Get list of supported cryptocurrencies"""
         try:
-            # Try to fetch from CoinGecko API
+            # Try the crypto providers first
             session = await self._get_session()
-            url = f"{settings.COINGECKO_API_URL}/coins/list"
-            
-            async with session.get(url) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    # Return top 50 by market cap
-                    return [coin["id"] for coin in data[:50]]
+            for provider in provider_registry.select(CRYPTO, SYMBOLS):
+                coin_ids = await provider_registry.call(provider, SYMBOLS, lambda: provider.fetch_symbols(session))
+                if coin_ids:
+                    return coin_ids
             
             # Fallback to default cryptocurrencies
             return self.supported_cryptocurrencies
@@ -320,6 +382,4 @@ class CryptoService:
             logger.error(f"Error updating crypto prices cache: {e}")
     
     async def close(self):
-        """Close aiohttp session"""
-        if self.session and not self.session.closed:
-            await self.session.close() 
\ No newline at end of file
+        """Release resources (the shared HTTP session is closed by its manager)""" 
\ No newline at end of file
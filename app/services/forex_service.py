@@ -1,161 +1,107 @@
 import aiohttp
+import asyncio
 import logging
+import time
+import numpy as np
 from typing import Dict, List, Optional
 from datetime import datetime, date, timedelta
 import json
 
 from app.core.config import settings
 from app.core.cache import (
-    get_cached_forex_rates, 
+    CacheKeys,
+    REFRESH_LOCK_TTL,
+    redis_client,
+    get_cached_forex_table,
     set_cached_forex_rates,
     get_cached_historical_forex,
-    set_cached_historical_forex
+    set_cached_historical_forex,
+    get_cached_forex_days,
+    set_cached_forex_days,
+    get_cached_forex_view,
+    set_cached_forex_views,
+    set_forex_refresh_stats
 )
+from app.core.singleflight import singleflight
+from app.core.history_store import history_store
+from app.core.columnar_archive import rate_archive, archive_days
+from app.core.date_index import forex_date_index
+from app.core.http_client import HTTPClientManager, http_client as default_http_client
+from app.core.hedging import hedged_race
+from app.core.latency import get_tracker
+from app.providers.base import FOREX, HISTORICAL, LATEST, SYMBOLS, TIMESERIES
+from app.providers.registry import provider_registry
+from app.services.cross_rates import CrossRateTable
 
 logger = logging.getLogger(__name__)
 
+# Longest range requested upstream in one time series call
+TIMESERIES_CHUNK_DAYS = 365
+
+def _date_ranges(days: List[str], max_days: int) -> List[tuple]:
+    """Group sorted ISO dates into (start, end) runs of consecutive days"""
+    ranges = []
+    for day in days:
+        current = date.fromisoformat(day)
+        if ranges:
+            range_start, range_end = ranges[-1]
+            if (current - range_end).days == 1 and (current - range_start).days < max_days:
+                ranges[-1] = (range_start, current)
+                continue
+        ranges.append((current, current))
+    return [(range_start.isoformat(), range_end.isoformat()) for range_start, range_end in ranges]
+
 class ForexService:
-    def __init__(self):
-        self.session = None
+    def __init__(self, http_client: HTTPClientManager = None):
+        self.http_client = http_client or default_http_client
         self.supported_currencies = settings.DEFAULT_FOREX_CURRENCIES
+        self.anchor = settings.FOREX_ANCHOR_CURRENCY
+        self._cross_rates: Optional[CrossRateTable] = None
+        self._cross_rates_stamp = None
     
     async def _get_session(self):
-        """Get or create aiohttp session"""
-        if self.session is None or self.session.closed:
-            self.session = aiohttp.ClientSession(
-                timeout=aiohttp.ClientTimeout(total=10)
-            )
-        return self.session
+        """Get the shared aiohttp session"""
+        return await self.http_client.get_session()
     
-    async def _fetch_from_exchangerate_host(self, base: str, symbols: List[str] = None) -> Dict:
-        """Fetch forex rates from exchangerate.host API"""
+    async def get_latest_rates(self, base: str, symbols: List[str] = None) -> Dict:
+        """Get latest forex rates with caching
+
+        Only the anchor currency table is fetched and cached; every other
+        base is triangulated from it. Past FOREX_CACHE_TTL the stale table is
+        still returned while one background task refreshes it.
+        """
+        # Currency codes are stored upper-case
+        base = base.upper()
+        symbols = [symbol.upper() for symbol in symbols] if symbols else symbols
         try:
-            session = await self._get_session()
-            
-            # Build URL
-            url = f"{settings.ECB_API_URL}?base={base}"
-            if symbols:
-                url += f"&symbols={','.join(symbols)}"
-            
-            async with session.get(url) as response:
-                if response.status == 200:
-                    data = await response.json()
+            # The derived view of base answers without rebasing the anchor table
+            view = await get_cached_forex_view(base)
+            if view and self._view_covers(view, symbols):
+                age = max(0.0, time.time() - view["fetched_at"])
+                if age <= settings.FOREX_CACHE_TTL:
+                    logger.info(f"Returning cached forex view for {base}")
+                    rates = view["rates"]
                     return {
-                        "success": data.get("success", False),
-                        "base": data.get("base", base),
-                        "date": data.get("date", datetime.now().strftime("%Y-%m-%d")),
-                        "rates": data.get("rates", {})
+                        "success": True,
+                        "base": base,
+                        "date": view["date"],
+                        "rates": {symbol: rates[symbol] for symbol in symbols if symbol in rates} if symbols else rates,
+                        "age": int(age),
+                        "stale": False
                     }
-                else:
-                    logger.error(f"ExchangeRate API error: {response.status}")
-                    return None
-        except Exception as e:
-            logger.error(f"Error fetching from ExchangeRate API: {e}")
-            return None
-    
-    async def _fetch_from_yahoo_finance(self, base: str, symbols: List[str]) -> Dict:
-        """Fetch forex rates from Yahoo Finance (fallback)"""
-        try:
-            session = await self._get_session()
-            rates = {}
-            
-            for symbol in symbols:
-                if symbol == base:
-                    rates[symbol] = 1.0
-                    continue
-                
-                # Yahoo Finance URL for currency pair
-                pair = f"{base}{symbol}=X"
-                url = f"{settings.YAHOO_FINANCE_BASE_URL}/{pair}"
-                
-                headers = {
-                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-                }
-                
-                async with session.get(url, headers=headers) as response:
-                    if response.status == 200:
-                        text = await response.text()
-                        # Simple regex to extract price (this is a basic implementation)
-                        # In production, you'd want to use a proper HTML parser
-                        import re
-                        price_match = re.search(r'"regularMarketPrice":\s*([\d.]+)', text)
-                        if price_match:
-                            rates[symbol] = float(price_match.group(1))
-                        else:
-                            rates[symbol] = None
-                    else:
-                        rates[symbol] = None
-            
-            return {
-                "success": True,
-                "base": base,
-                "date": datetime.now().strftime("%Y-%m-%d"),
-                "rates": {k: v for k, v in rates.items() if v is not None}
-            }
-        except Exception as e:
-            logger.error(f"Error fetching from Yahoo Finance: {e}")
-            return None
-    
-    async def _fetch_from_fixer(self, base: str, symbols: List[str] = None) -> Dict:
-        """Fetch forex rates from Fixer.io API (free plan: base EUR only)"""
-        try:
-            session = await self._get_session()
-            url = f"http://data.fixer.io/api/latest?access_key={settings.FIXER_API_KEY}"
-            if symbols:
-                url += f"&symbols={','.join(symbols)}"
-            async with session.get(url) as response:
-                data = await response.json()
-                if data.get("success"):
-                    rates = data.get("rates", {})
-                    # If base is not EUR, convert manually
-                    if base != "EUR":
-                        if base not in rates:
-                            return None
-                        base_rate = rates[base]
-                        converted = {s: (rates[s] / base_rate) if s in rates else None for s in symbols}
-                        return {
-                            "success": True,
-                            "base": base,
-                            "date": data.get("date"),
-                            "rates": {k: v for k, v in converted.items() if v is not None}
-                        }
-                    else:
-                        return {
-                            "success": True,
-                            "base": "EUR",
-                            "date": data.get("date"),
-                            "rates": rates
-                        }
-        except Exception as e:
-            logger.error(f"Error fetching from Fixer.io: {e}")
-        return None
-    
-    async def get_latest_rates(self, base: str, symbols: List[str] = None) -> Dict:
-        """Get latest forex rates with caching"""
-        try:
-            # Check cache first
-            cached_data = await get_cached_forex_rates(base, symbols)
-            if cached_data:
-                logger.info(f"Returning cached forex rates for {base}")
-                return cached_data
             
-            # Fetch from primary source
-            logger.info(f"Fetching fresh forex rates for {base}")
-            data = await self._fetch_from_exchangerate_host(base, symbols)
+            cross_rates = await self._get_latest_cross_rates(base, symbols)
             
-            if not data or not data.get("success"):
-                # Try fallback source
-                logger.info("Primary source failed, trying Yahoo Finance")
-                data = await self._fetch_from_yahoo_finance(base, symbols or self.supported_currencies)
-            
-            if (not data or not data.get("success")) and settings.FIXER_API_KEY:
-                logger.info("Yahoo Finance failed, trying Fixer.io")
-                data = await self._fetch_from_fixer(base, symbols or self.supported_currencies)
-            
-            if data and data.get("success"):
-                # Cache the result
-                await set_cached_forex_rates(base, data, symbols)
-                return data
+            if cross_rates and cross_rates.has(base):
+                age = self._age(cross_rates)
+                return {
+                    "success": True,
+                    "base": base,
+                    "date": cross_rates.date,
+                    "rates": cross_rates.rates_for(base, symbols),
+                    "age": int(age),
+                    "stale": age > settings.FOREX_CACHE_TTL
+                }
             else:
                 # Return cached data even if expired, or default rates
                 logger.warning("All sources failed, returning default rates")
@@ -176,6 +122,146 @@ class ForexService:
                 "error": str(e)
             }
     
+    def _view_covers(self, view: Dict, symbols: List[str] = None) -> bool:
+        """Whether a derived view quotes every requested symbol"""
+        return all(symbol in view["rates"] for symbol in symbols or [])
+    
+    async def _get_latest_cross_rates(self, base: str, symbols: List[str] = None) -> Optional[CrossRateTable]:
+        """Get the latest anchor table, refreshing it if it cannot answer base/symbols"""
+        # Check cache first
+        cross_rates = await self._get_cross_rates()
+        if cross_rates and cross_rates.covers(base, symbols):
+            logger.info(f"Returning cached forex rates for {base}")
+            if self._age(cross_rates) > settings.FOREX_CACHE_TTL:
+                singleflight.spawn(
+                    f"revalidate:{CacheKeys.forex_latest(self.anchor)}",
+                    self._revalidate_anchor_table
+                )
+            return cross_rates
+        
+        # Concurrent misses share one upstream fetch of the anchor table
+        needed = [base, *symbols] if symbols else None
+        return await singleflight.do(
+            CacheKeys.forex_latest(self.anchor),
+            lambda: self._refresh_anchor_table(needed)
+        )
+    
+    async def _get_cross_rates(self) -> Optional[CrossRateTable]:
+        """Get the cached anchor table as a CrossRateTable"""
+        table = await get_cached_forex_table(self.anchor)
+        if not table or "_date" not in table:
+            return None
+        
+        # Rebuilding the rate vector is only needed when the table changed
+        stamp = (table["_date"], table.get("_fetched_at"), table.get("_updated_at"))
+        if self._cross_rates is None or self._cross_rates_stamp != stamp:
+            rates = {symbol: float(rate) for symbol, rate in table.items() if not symbol.startswith("_")}
+            self._cross_rates = CrossRateTable(
+                self.anchor,
+                rates,
+                date=table["_date"],
+                complete=table.get("_complete") == "1",
+                fetched_at=float(table["_fetched_at"]) if "_fetched_at" in table else None
+            )
+            self._cross_rates_stamp = stamp
+        return self._cross_rates
+    
+    async def _refresh_anchor_table(self, symbols: List[str] = None) -> Optional[CrossRateTable]:
+        """Fetch the anchor rate table from upstream sources and cache it"""
+        anchor = self.anchor
+        
+        # Providers are tried healthiest and fastest first (preference order
+        # on ties). A slow provider is hedged by starting the next one in
+        # parallel; open circuits are skipped.
+        logger.info(f"Fetching fresh forex rates for anchor {anchor}")
+        session = await self._get_session()
+        symbols = symbols or self.supported_currencies
+        
+        def attempt(provider):
+            return lambda: provider_registry.call(
+                provider, LATEST, lambda: provider.fetch_latest(session, anchor, symbols)
+            )
+        
+        providers = provider_registry.select(FOREX, LATEST)
+        _, batch = await hedged_race(
+            [(provider.breaker_name(LATEST), attempt(provider)) for provider in providers],
+            lambda result: result is not None,
+            self._hedge_delay
+        )
+        if batch is None:
+            return None
+        complete = batch.complete
+        
+        cross_rates = CrossRateTable(
+            batch.base,
+            batch.rates,
+            date=batch.date,
+            complete=complete,
+            fetched_at=time.time()
+        )
+        if cross_rates.anchor != anchor:
+            if not cross_rates.has(anchor):
+                return None
+            cross_rates = cross_rates.rebase(anchor)
+        
+        await set_cached_forex_rates(
+            anchor,
+            {
+                "date": cross_rates.date,
+                "rates": cross_rates.rates_for(anchor),
+                "fetched_at": cross_rates.fetched_at
+            },
+            complete=complete
+        )
+        if complete:
+            # Partial tables are merged into the cached one, so views derived
+            # from them alone would be incomplete
+            await self._write_views(cross_rates)
+        return cross_rates
+    
+    async def _write_views(self, cross_rates: CrossRateTable) -> int:
+        """Write the derived view of every supported base in one pipeline"""
+        views = {
+            base: {
+                "date": cross_rates.date,
+                "rates": cross_rates.rates_for(base),
+                "fetched_at": cross_rates.fetched_at
+            }
+            for base in self.supported_currencies
+            if cross_rates.has(base)
+        }
+        await set_cached_forex_views(views)
+        return len(views)
+    
+    def _hedge_delay(self, provider: str) -> float:
+        """Seconds to wait for a provider before hedging with the next one"""
+        if settings.FOREX_HEDGE_DELAY_MS is not None:
+            return settings.FOREX_HEDGE_DELAY_MS / 1000
+        observed = get_tracker(provider).percentile(settings.FOREX_HEDGE_PERCENTILE)
+        if observed is None:
+            return settings.FOREX_HEDGE_DEFAULT_DELAY_MS / 1000
+        return observed
+    
+    async def _revalidate_anchor_table(self):
+        """Background refresh of a stale anchor table"""
+        key = CacheKeys.forex_latest(self.anchor)
+        
+        # Another worker may already have refreshed it; re-read Redis
+        redis_client.local_cache.delete(key)
+        cross_rates = await self._get_cross_rates()
+        if cross_rates and self._age(cross_rates) <= settings.FOREX_CACHE_TTL:
+            return
+        
+        if not await redis_client.try_lock(CacheKeys.refresh_lock(key), REFRESH_LOCK_TTL):
+            return
+        await self._refresh_anchor_table()
+    
+    def _age(self, cross_rates: CrossRateTable) -> float:
+        """Seconds since the table was fetched upstream"""
+        if not cross_rates.fetched_at:
+            return 0.0
+        return max(0.0, time.time() - cross_rates.fetched_at)
+    
     async def convert_currency(self, amount: float, from_currency: str, to_currency: str) -> Dict:
         """Convert amount from one currency to another"""
         try:
@@ -208,10 +294,48 @@ class ForexService:
             logger.error(f"Error in convert_currency: {e}")
             raise
     
+    async def convert_batch(self, amounts: np.ndarray, from_currencies: List[str], to_currencies: List[str]) -> Dict:
+        """Convert many amounts at once with the latest rates
+        
+        from_currencies and to_currencies each hold either one currency for
+        every amount or one per amount. All rates come from a single read of
+        the anchor table and the conversion is vectorized; rates and results
+        are NaN where a currency is unknown.
+        """
+        currencies = list({*from_currencies, *to_currencies})
+        cross_rates = await self._get_latest_cross_rates(currencies[0], currencies[1:])
+        if cross_rates is None:
+            raise Exception("Failed to get exchange rates")
+        
+        vector = cross_rates.vector
+        index = {currency: i for i, currency in enumerate(cross_rates.currencies)}
+        # Unknown currencies point at an extra NaN slot
+        vector = np.append(vector, np.nan)
+        missing = len(vector) - 1
+        
+        def positions(codes: List[str]):
+            if len(codes) == 1:
+                return index.get(codes[0], missing)
+            lookup = index.get
+            return np.fromiter((lookup(code, missing) for code in codes), dtype=np.intp, count=len(codes))
+        
+        # Units of quote per 1 base: quote/anchor divided by base/anchor
+        rates = vector[positions(to_currencies)] / vector[positions(from_currencies)]
+        results = np.round(amounts * rates, 4)
+        return {
+            "date": cross_rates.date,
+            "rates": np.broadcast_to(rates, results.shape),
+            "results": results
+        }
+    
     async def get_historical_rates(self, target_date: date, base: str, symbols: List[str] = None) -> Dict:
-        """Get historical forex rates for a specific date"""
+        """Get historical forex rates for a specific date
+        
+        Weekends and known holidays resolve to the previous fixing; "date"
+        in the result is the date the rates are from.
+        """
         try:
-            date_str = target_date.strftime("%Y-%m-%d")
+            date_str = await self._resolve_historical_date(target_date, base)
             
             # Check cache first
             cached_data = await get_cached_historical_forex(date_str, base, symbols)
@@ -219,31 +343,18 @@ class ForexService:
                 logger.info(f"Returning cached historical forex rates for {date_str}")
                 return cached_data
             
-            # Fetch historical data
-            logger.info(f"Fetching historical forex rates for {date_str}")
-            session = await self._get_session()
-            
-            url = f"https://api.exchangerate.host/{date_str}?base={base}"
-            if symbols:
-                url += f"&symbols={','.join(symbols)}"
+            stored_data = await self._get_stored_historical_rates(date_str, base, symbols)
+            if stored_data:
+                logger.info(f"Returning stored historical forex rates for {date_str}")
+                forex_date_index.add_fixing(base, date_str)
+                await set_cached_historical_forex(date_str, base, stored_data, symbols)
+                return stored_data
             
-            async with session.get(url) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    if data.get("success"):
-                        result = {
-                            "success": True,
-                            "base": data.get("base", base),
-                            "date": date_str,
-                            "rates": data.get("rates", {})
-                        }
-                        # Cache the result
-                        await set_cached_historical_forex(date_str, base, result, symbols)
-                        return result
-                    else:
-                        raise Exception("Historical data fetch failed")
-                else:
-                    raise Exception(f"Historical API error: {response.status}")
+            symbols_str = ",".join(symbols) if symbols else None
+            return await singleflight.do(
+                CacheKeys.forex_historical(date_str, base, symbols_str),
+                lambda: self._fetch_historical_rates(date_str, base, symbols)
+            )
                     
         except Exception as e:
             logger.error(f"Error in get_historical_rates: {e}")
@@ -255,18 +366,241 @@ class ForexService:
                 "error": str(e)
             }
     
+    async def _resolve_historical_date(self, target_date: date, base: str) -> str:
+        """ISO date of the fixing that answers target_date"""
+        if not forex_date_index.is_loaded(base):
+            dates = await history_store.get_forex_dates(base) if history_store is not None else []
+            forex_date_index.load(base, dates)
+        return forex_date_index.resolve(base, target_date)
+    
+    async def _get_stored_historical_rates(self, date_str: str, base: str, symbols: List[str] = None) -> Optional[Dict]:
+        """Get historical rates from the local history store"""
+        if history_store is None:
+            return None
+        # The store holds complete tables, so any row means the day is known
+        rates = await history_store.get_forex(date_str, base)
+        if not rates:
+            return None
+        if symbols:
+            rates = {symbol: rates[symbol] for symbol in symbols if symbol in rates}
+        return {
+            "success": True,
+            "base": base,
+            "date": date_str,
+            "rates": rates
+        }
+    
+    async def _fetch_historical_rates(self, date_str: str, base: str, symbols: List[str] = None) -> Dict:
+        """Fetch historical rates from upstream, store and cache them"""
+        logger.info(f"Fetching historical forex rates for {date_str}")
+        session = await self._get_session()
+        
+        # Always the full table: it is what the history store keeps
+        batch = None
+        for provider in provider_registry.select(FOREX, HISTORICAL, base):
+            batch = await provider_registry.call(
+                provider, HISTORICAL, lambda: provider.fetch_historical(session, date_str, base)
+            )
+            if batch is not None:
+                break
+        if batch is None:
+            raise Exception("Historical data fetch failed")
+        
+        rates = batch.rates
+        # Upstream answers a day without a fixing with the previous one; file
+        # the rates under the date they are from. Today's fixing may simply
+        # not be published yet, so today is never marked closed.
+        fixing_date = batch.date
+        unpublished = fixing_date != date_str and date_str >= date.today().isoformat()
+        if fixing_date != date_str and not unpublished:
+            forex_date_index.mark_closed(date_str)
+        # Today's table is still moving: keep it out of the permanent store
+        # and cache it only as long as the latest rates
+        final = fixing_date < date.today().isoformat()
+        if rates and final:
+            forex_date_index.add_fixing(base, fixing_date)
+            if history_store is not None:
+                await history_store.put_forex(fixing_date, base, rates)
+        if symbols:
+            rates = {symbol: rates[symbol] for symbol in symbols if symbol in rates}
+        result = {
+            "success": True,
+            "base": batch.base,
+            "date": fixing_date,
+            "rates": rates
+        }
+        # Cache the result (not under today while its fixing is unpublished)
+        await set_cached_historical_forex(
+            fixing_date if unpublished else date_str,
+            base,
+            result,
+            symbols,
+            ttl=None if final else settings.FOREX_CACHE_TTL
+        )
+        return result
+    
+    async def get_timeseries(self, start: date, end: date, base: str, symbols: List[str] = None) -> Dict:
+        """Get daily rates for a date range
+        
+        Archived days are sliced straight out of the columnar archive. The
+        rest come from the per-day anchor tables in Redis, then the history
+        store; only the missing date ranges are fetched upstream, in bulk,
+        and past days are archived.
+        """
+        anchor = self.anchor
+        dates = [(start + timedelta(days=offset)).isoformat() for offset in range((end - start).days + 1)]
+        
+        archived, rates = set(), {}
+        if rate_archive is not None:
+            archived, rates = self._get_archived_timeseries(start, end, base, symbols)
+        pending = [day for day in dates if day not in archived]
+        
+        if pending:
+            days = await get_cached_forex_days(anchor, pending)
+            missing = [day for day in pending if day not in days]
+            
+            # Today's table is still moving and never stored per day; the
+            # latest anchor table (cached and revalidated on its own) answers it
+            today = date.today().isoformat()
+            if today in missing:
+                latest = await self._get_latest_cross_rates(anchor)
+                if latest is not None:
+                    days[today] = latest.rates_for(anchor)
+                    missing.remove(today)
+            
+            # Days past the Redis TTL are still in the history store; one
+            # range scan covers them before going upstream
+            if missing and history_store is not None:
+                stored = await history_store.get_forex_range(anchor, missing[0], missing[-1])
+                stored = {day: stored[day] for day in missing if day in stored}
+                if stored:
+                    # Closed days inside the stored span were fetched before
+                    # and had no fixing; they are stored empty like upstream gaps
+                    first, last = min(stored), max(stored)
+                    for day in missing:
+                        if first < day < last and day not in stored and forex_date_index.is_closed(date.fromisoformat(day)):
+                            stored[day] = {}
+                    await set_cached_forex_days(anchor, stored)
+                    days.update(stored)
+                    missing = [day for day in missing if day not in stored]
+            
+            if missing:
+                ranges = _date_ranges(missing, TIMESERIES_CHUNK_DAYS)
+                logger.info(f"Fetching {len(missing)} missing forex days in {len(ranges)} ranges")
+                results = await asyncio.gather(*(
+                    singleflight.do(
+                        f"forex:timeseries:{anchor}:{range_start}:{range_end}",
+                        lambda range_start=range_start, range_end=range_end: self._fetch_timeseries(range_start, range_end)
+                    )
+                    for range_start, range_end in ranges
+                ), return_exceptions=True)
+                for result in results:
+                    if isinstance(result, dict):
+                        days.update(result)
+                    else:
+                        logger.error(f"Error fetching forex time series: {result}")
+            
+            for day in pending:
+                table = days.get(day)
+                if table:
+                    day_rates = CrossRateTable(anchor, table, date=day).rates_for(base, symbols)
+                    if day_rates:
+                        rates[day] = day_rates
+            
+            if rate_archive is not None:
+                # Today's table is still moving; only past days are final
+                final = {day: table for day, table in days.items() if day < today}
+                if final:
+                    try:
+                        await asyncio.to_thread(rate_archive.write, f"forex_{anchor}", final)
+                    except Exception as e:
+                        logger.error(f"Error archiving forex days: {e}")
+        
+        return {
+            "success": bool(rates),
+            "base": base,
+            "start_date": dates[0],
+            "end_date": dates[-1],
+            "rates": dict(sorted(rates.items()))
+        }
+    
+    def _get_archived_timeseries(self, start: date, end: date, base: str, symbols: List[str] = None) -> tuple:
+        """Archived days in the range and their rates against base
+        
+        Every column is a zero-copy slice of the archive; rebasing is one
+        vectorized division per symbol.
+        """
+        dataset = f"forex_{self.anchor}"
+        try:
+            covered = rate_archive.coverage(dataset, start, end)
+            if not covered.any():
+                return set(), {}
+            
+            days = len(covered)
+            
+            def column(currency: str) -> np.ndarray:
+                if currency == self.anchor:
+                    return np.ones(days)
+                values = rate_archive.read(dataset, currency, start, end)
+                if len(values) < days:
+                    values = np.concatenate([values, np.full(days - len(values), np.nan)])
+                return values
+            
+            names = symbols or list(dict.fromkeys([self.anchor, *rate_archive.symbols(dataset)]))
+            base_values = column(base)
+            table = np.vstack([column(name) / base_values for name in names]).T.tolist()
+        except Exception as e:
+            logger.error(f"Error reading forex archive: {e}")
+            return set(), {}
+        
+        archived = archive_days(start, covered)
+        rates = {}
+        for day, row in zip(archived, (table[offset] for offset in np.flatnonzero(covered))):
+            day_rates = {name: value for name, value in zip(names, row) if value == value}
+            if day_rates:
+                rates[day] = day_rates
+        return set(archived), rates
+    
+    async def _fetch_timeseries(self, start: str, end: str) -> Optional[Dict[str, Dict[str, float]]]:
+        """Fetch anchor tables for a date range in one call and store them per day"""
+        session = await self._get_session()
+        days = None
+        for provider in provider_registry.select(FOREX, TIMESERIES, self.anchor):
+            days = await provider_registry.call(
+                provider, TIMESERIES, lambda: provider.fetch_timeseries(session, start, end, self.anchor)
+            )
+            if days is not None:
+                break
+        if days is None:
+            raise Exception("Time series fetch failed")
+        
+        # Past days the source has no data for (e.g. holidays) are stored
+        # empty so they are not fetched again
+        today = date.today().isoformat()
+        day = datetime.strptime(start, "%Y-%m-%d").date()
+        while day.isoformat() <= end:
+            if day.isoformat() < today and day.isoformat() not in days:
+                days[day.isoformat()] = {}
+                forex_date_index.mark_closed(day.isoformat())
+            day += timedelta(days=1)
+        
+        # Today's table is still moving; keep it out of the day store
+        stored = {day: rates for day, rates in days.items() if day < today}
+        if stored:
+            await set_cached_forex_days(self.anchor, stored)
+            if history_store is not None:
+                await history_store.put_forex_days(self.anchor, stored)
+        return days
+    
     async def get_supported_currencies(self) -> List[str]:
         """Get list of supported currencies"""
         try:
             # Try to fetch from API first
             session = await self._get_session()
-            url = "https://api.exchangerate.host/symbols"
-            
-            async with session.get(url) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    if data.get("success"):
-                        return list(data.get("symbols", {}).keys())
+            for provider in provider_registry.select(FOREX, SYMBOLS):
+                symbols = await provider_registry.call(provider, SYMBOLS, lambda: provider.fetch_symbols(session))
+                if symbols:
+                    return symbols
             
             # Fallback to default currencies
             return self.supported_currencies
@@ -309,20 +643,35 @@ class ForexService:
         """Update cache with fresh rates (called by scheduler)"""
         try:
             logger.info("Updating forex rates cache")
+            start = time.perf_counter()
             
-            # Update for major currencies
-            major_currencies = ["USD", "EUR", "GBP", "JPY"]
-            target_currencies = ["EUR", "GBP", "JPY", "IDR", "SGD", "MYR", "THB"]
+            # One fetch of the anchor table; every base view is derived from it
+            cross_rates = await self._refresh_anchor_table(self.supported_currencies)
+            if cross_rates is None:
+                raise Exception("All sources failed")
             
-            for base in major_currencies:
-                await self.get_latest_rates(base, target_currencies)
+            quoted = [currency for currency in self.supported_currencies if cross_rates.has(currency)]
+            # Refreshes run in the Celery worker; API workers read these from Redis
+            stats = {
+                "date": cross_rates.date,
+                "complete": cross_rates.complete,
+                # The anchor table plus one view per base (complete tables only)
+                "keys_warmed": 1 + (len(quoted) if cross_rates.complete else 0),
+                "currencies": len(quoted),
+                "missing": [currency for currency in self.supported_currencies if currency not in quoted],
+                "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+                "finished_at": time.time()
+            }
+            await set_forex_refresh_stats(stats)
             
-            logger.info("Forex rates cache updated successfully")
+            logger.info(
+                f"Forex rates cache updated: {stats['keys_warmed']} keys "
+                f"in {stats['duration_ms']} ms"
+            )
+            return stats
             
         except Exception as e:
             logger.error(f"Error updating forex rates cache: {e}")
     
     async def close(self):
-        """Close aiohttp session"""
-        if self.session and not self.session.closed:
-            await self.session.close() 
\ No newline at end of file
+        """Release resources (the shared HTTP session is closed by its manager)""" 
\ No newline at end of file
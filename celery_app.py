@@ -1,6 +1,10 @@
 from celery import Celery
+from celery.signals import worker_process_shutdown
+import asyncio
 import logging
+import os
 from app.core.config import settings
+from app.core.http_client import http_client
 from app.services.forex_service import ForexService
 from app.services.crypto_service import CryptoService
 
@@ -30,27 +34,40 @@ celery_app.conf.update(
     worker_max_tasks_per_child=1000,
 )
 
+# Services share one HTTP client; with a persistent event loop per worker
+# process its pooled keep-alive/TLS connections survive between task runs
+forex_service = ForexService(http_client)
+crypto_service = CryptoService(http_client)
+
+_loop = None
+_loop_pid = None
+
+def run_async(coro):
+    """Run a coroutine on this worker process's persistent event loop"""
+    global _loop, _loop_pid
+    if _loop is None or _loop.is_closed() or _loop_pid != os.getpid():
+        _loop = asyncio.new_event_loop()
+        _loop_pid = os.getpid()
+        asyncio.set_event_loop(_loop)
+    return _loop.run_until_complete(coro)
+
+@worker_process_shutdown.connect
+def close_http_client(**kwargs):
+    """Close pooled connections when a worker process exits"""
+    if _loop is not None and not _loop.is_closed() and _loop_pid == os.getpid():
+        _loop.run_until_complete(http_client.close())
+        _loop.close()
+
 @celery_app.task(name="update_forex_rates")
 def update_forex_rates():
     """Update forex rates cache"""
     try:
-        import asyncio
-        
-        async def _update():
-            forex_service = ForexService()
-            await forex_service.update_rates_cache()
-            await forex_service.close()
+        stats = run_async(forex_service.update_rates_cache())
+        if not stats:
+            return {"status": "error", "message": "Forex rates update failed"}
+        logger.info("Forex rates cache updated successfully")
+        return {"status": "success", "message": "Forex rates updated", "stats": stats}
         
-        # Run async function
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            loop.run_until_complete(_update())
-            logger.info("Forex rates cache updated successfully")
-            return {"status": "success", "message": "Forex rates updated"}
-        finally:
-            loop.close()
-            
     except Exception as e:
         logger.error(f"Error updating forex rates: {e}")
         return {"status": "error", "message": str(e)}
@@ -59,23 +76,10 @@ def update_forex_rates():
 def update_crypto_prices():
     """Update crypto prices cache"""
     try:
-        import asyncio
+        run_async(crypto_service.update_prices_cache())
+        logger.info("Crypto prices cache updated successfully")
+        return {"status": "success", "message": "Crypto prices updated"}
         
-        async def _update():
-            crypto_service = CryptoService()
-            await crypto_service.update_prices_cache()
-            await crypto_service.close()
-        
-        # Run async function
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            loop.run_until_complete(_update())
-            logger.info("Crypto prices cache updated successfully")
-            return {"status": "success", "message": "Crypto prices updated"}
-        finally:
-            loop.close()
-            
     except Exception as e:
         logger.error(f"Error updating crypto prices: {e}")
         return {"status": "error", "message": str(e)}
@@ -84,22 +88,12 @@ def update_crypto_prices():
 def cleanup_cache():
     """Clean up expired cache entries"""
     try:
-        import asyncio
+        from app.core.cache import clear_expired_cache
         
-        async def _cleanup():
-            from app.core.cache import clear_expired_cache
-            await clear_expired_cache()
+        run_async(clear_expired_cache())
+        logger.info("Cache cleanup completed")
+        return {"status": "success", "message": "Cache cleaned"}
         
-        # Run async function
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            loop.run_until_complete(_cleanup())
-            logger.info("Cache cleanup completed")
-            return {"status": "success", "message": "Cache cleaned"}
-        finally:
-            loop.close()
-            
     except Exception as e:
         logger.error(f"Error cleaning cache: {e}")
         return {"status": "error", "message": str(e)}
@@ -108,12 +102,8 @@ def cleanup_cache():
 def health_check():
     """Perform health check of all services"""
     try:
-        import asyncio
-        
         async def _health_check():
             from app.core.cache import redis_client
-            from app.services.forex_service import ForexService
-            from app.services.crypto_service import CryptoService
             
             results = {
                 "redis": False,
@@ -129,34 +119,24 @@ def health_check():
             
             # Check Forex Service
             try:
-                forex_service = ForexService()
                 test_data = await forex_service.get_latest_rates("USD", ["EUR"])
                 results["forex_service"] = test_data.get("success", False)
-                await forex_service.close()
             except Exception as e:
                 logger.error(f"Forex service health check failed: {e}")
             
             # Check Crypto Service
             try:
-                crypto_service = CryptoService()
                 test_data = await crypto_service.get_latest_prices(["BTC"])
                 results["crypto_service"] = bool(test_data)
-                await crypto_service.close()
             except Exception as e:
                 logger.error(f"Crypto service health check failed: {e}")
             
             return results
         
-        # Run async function
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            results = loop.run_until_complete(_health_check())
-            logger.info(f"Health check results: {results}")
-            return {"status": "success", "results": results}
-        finally:
-            loop.close()
-            
+        results = run_async(_health_check())
+        logger.info(f"Health check results: {results}")
+        return {"status": "success", "results": results}
+        
     except Exception as e:
         logger.error(f"Error in health check: {e}")
         return {"status": "error", "message": str(e)}
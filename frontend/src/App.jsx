@@ -119,9 +119,21 @@ export default function App() {
 
   const fetchForexHistory = async () => {
     try {
+      // One time-series request for the 30 days up to the selected date
+      const end = new Date(forexHistoryDate);
+      const start = new Date(end);
+      start.setDate(start.getDate() - 29);
+      const symbol = forexHistorySymbols.split(",")[0];
       const res = await axios.get(
-        `${API_BASE}/forex/historical`,
-        { params: { date_str: forexHistoryDate, base: forexHistoryBase, symbols: forexHistorySymbols } }
+        `${API_BASE}/forex/timeseries`,
+        {
+          params: {
+            start: start.toISOString().slice(0, 10),
+            end: forexHistoryDate,
+            base: forexHistoryBase,
+            symbols: symbol
+          }
+        }
       );
       
       console.log("Forex API Response:", res.data);
@@ -129,10 +141,11 @@ export default function App() {
       // Convert data to chart format
       const data = [];
       const rates = res.data.rates || {};
-      Object.entries(rates).forEach(([currency, rate]) => {
+      Object.keys(rates).sort().forEach((day) => {
+        const rate = rates[day][symbol];
         if (rate && rate > 0) {
           data.push({ 
-            time: forexHistoryDate, 
+            time: day, 
             value: parseFloat(rate) || 0 
           });
         }
@@ -734,6 +747,7 @@ export default function App() {
             <input
               type="date"
               value={forexHistoryDate}
+              max={new Date().toISOString().slice(0, 10)}
               onChange={(e) => setForexHistoryDate(e.target.value)}
               className="form-control mb-2"
             />
@@ -784,7 +798,7 @@ export default function App() {
                 data={isRealtimeForex ? realtimeForexData : forexHistory} 
                 title={isRealtimeForex 
                   ? `🔴 ${forexHistoryBase} Live Exchange Rates` 
-                  : `${forexHistoryBase} Exchange Rates on ${forexHistoryDate}`
+                  : `${forexHistoryBase}/${forexHistorySymbols.split(",")[0]} Exchange Rates, 30 days to ${forexHistoryDate}`
                 }
                 width={500}
                 height={300}
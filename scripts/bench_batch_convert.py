@@ -0,0 +1,88 @@
+"""Benchmark conversions/sec of /forex/convert/batch against one-by-one conversion.
+
+Usage: python -m scripts.bench_batch_convert [--items 1000000] [--single 2000]
+
+Rates come from an in-memory anchor table (the cached path), so only the
+conversion work is measured:
+
+- single:  ForexService.convert_currency once per item (what one request per
+           line item costs without the HTTP overhead)
+- vector:  ForexService.convert_batch with a currency pair per item
+- pair:    ForexService.convert_batch with one from/to pair for every item
+- http:    POST /forex/convert/batch with a columnar payload, in process
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import httpx
+import numpy as np
+from fastapi import FastAPI
+
+from app.core.config import settings
+from app.services.cross_rates import CrossRateTable
+from app.services.forex_service import ForexService
+
+def _service() -> ForexService:
+    """ForexService answering from a fixed in-memory anchor table"""
+    random.seed(42)
+    rates = {currency: random.uniform(0.1, 20000) for currency in settings.DEFAULT_FOREX_CURRENCIES}
+    table = CrossRateTable(settings.FOREX_ANCHOR_CURRENCY, rates, date="2024-01-02", fetched_at=time.time())
+    service = ForexService()
+
+    async def cached(base, symbols=None):
+        return table
+
+    service._get_latest_cross_rates = cached
+    return service
+
+def _rate(items: int, seconds: float) -> str:
+    return f"{items / seconds:14,.0f} conversions/s"
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=1_000_000, help="conversions per batch")
+    parser.add_argument("--single", type=int, default=2000, help="conversions for the one-by-one baseline")
+    args = parser.parse_args()
+
+    service = _service()
+    currencies = settings.DEFAULT_FOREX_CURRENCIES
+    amounts = np.random.default_rng(42).uniform(1, 10000, args.items)
+    from_currencies = random.choices(currencies, k=args.items)
+    to_currencies = random.choices(currencies, k=args.items)
+
+    start = time.perf_counter()
+    for i in range(args.single):
+        await service.convert_currency(float(amounts[i]), from_currencies[i], to_currencies[i])
+    print(f"single  {_rate(args.single, time.perf_counter() - start)}")
+
+    start = time.perf_counter()
+    await service.convert_batch(amounts, from_currencies, to_currencies)
+    print(f"vector  {_rate(args.items, time.perf_counter() - start)}")
+
+    start = time.perf_counter()
+    await service.convert_batch(amounts, ["EUR"], ["USD"])
+    print(f"pair    {_rate(args.items, time.perf_counter() - start)}")
+
+    # Reuse the real endpoint with the in-memory service
+    import app.main as main_module
+    main_module.forex_service = service
+    app = FastAPI()
+    app.add_api_route("/forex/convert/batch", main_module.convert_forex_batch, methods=["POST"])
+    # Encoded up front so the client side is not part of the measurement
+    payload = json.dumps({"amounts": amounts.tolist(), "from": from_currencies, "to": to_currencies})
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        start = time.perf_counter()
+        response = await client.post(
+            "/forex/convert/batch",
+            content=payload,
+            headers={"content-type": "application/json"}
+        )
+        assert response.status_code == 200, response.text
+        print(f"http    {_rate(args.items, time.perf_counter() - start)} (request parsing and response encoding included)")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,76 @@
+"""Micro-benchmark of cache value codecs on our real payload shapes.
+
+Usage: python -m scripts.bench_codecs [--number 200]
+
+Compares encode/decode time and stored size for every codec/compression
+combination available in this environment.
+"""
+import argparse
+import random
+import string
+import timeit
+
+from app.core.codec import ValueCodec, lz4_frame, msgpack
+from app.core.config import settings
+
+def _forex_table():
+    """Full anchor rate table, as cached for /forex/latest"""
+    return {
+        "success": True,
+        "base": "USD",
+        "date": "2024-01-02",
+        "rates": {currency: random.uniform(0.1, 20000) for currency in settings.DEFAULT_FOREX_CURRENCIES}
+    }
+
+def _crypto_prices():
+    """Entry cached for /crypto/latest with every default coin"""
+    return {
+        "data": {
+            coin.upper(): {
+                "price": random.uniform(0.01, 60000),
+                "change_24h": random.uniform(-10, 10),
+                "market_cap": random.randint(10**6, 10**12),
+                "volume_24h": random.randint(10**5, 10**11),
+                "circulating_supply": random.randint(10**6, 10**11)
+            }
+            for coin in settings.DEFAULT_CRYPTO_CURRENCIES
+        },
+        "fetched_at": 1704153600.0
+    }
+
+def _coins_list(size: int = 15000):
+    """CoinGecko /coins/list response"""
+    def word(n):
+        return "".join(random.choices(string.ascii_lowercase, k=n))
+    return [{"id": f"{word(8)}-{word(5)}", "symbol": word(4), "name": word(10).title()} for _ in range(size)]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=200, help="iterations per measurement")
+    args = parser.parse_args()
+
+    random.seed(42)
+    payloads = {
+        "forex_table": _forex_table(),
+        "crypto_prices": _crypto_prices(),
+        "coins_list": _coins_list()
+    }
+
+    codecs = ["json"] + (["msgpack"] if msgpack else [])
+    compressions = ["none", "zlib"] + (["lz4"] if lz4_frame else [])
+
+    print(f"{'payload':<14} {'codec':<8} {'compress':<8} {'bytes':>9} {'encode us':>10} {'decode us':>10}")
+    for name, payload in payloads.items():
+        for codec_name in codecs:
+            for compression in compressions:
+                codec = ValueCodec(codec_name, compression, min_compress_size=0)
+                encoded = codec.encode(payload)
+                encode_time = timeit.timeit(lambda: codec.encode(payload), number=args.number) / args.number
+                decode_time = timeit.timeit(lambda: codec.decode(encoded), number=args.number) / args.number
+                print(
+                    f"{name:<14} {codec_name:<8} {compression:<8} {len(encoded):>9} "
+                    f"{encode_time * 1e6:>10.1f} {decode_time * 1e6:>10.1f}"
+                )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Benchmark requests/sec through the middleware stack, in process.
+
+Usage: python -m scripts.bench_middleware [--requests 5000] [--concurrency 50]
+
+"before" is the previous stack of two @app.middleware("http") functions
+(with the limiter awaited, so both stacks do the same work); "after" is
+RateLimitMiddleware + ProcessTimeMiddleware. The limiter answers from
+memory so only middleware overhead is measured.
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from app.core.middleware import ProcessTimeMiddleware, RateLimitMiddleware
+from app.core.rate_limiter import RateLimiter, RateLimitResult
+
+class _AllowAll(RateLimiter):
+    """Limiter that always admits without touching Redis"""
+
+    async def check(self, client_ip: str, endpoint: str, weight: int = 1) -> RateLimitResult:
+        return self._unlimited(time.time())
+
+    async def charge(self, client_ip: str, endpoint: str, weight: int):
+        pass
+
+def _build_app(stack: str) -> FastAPI:
+    app = FastAPI()
+    limiter = _AllowAll()
+
+    @app.get("/ping")
+    async def ping():
+        return {"success": True}
+
+    if stack == "before":
+        @app.middleware("http")
+        async def rate_limit_middleware(request: Request, call_next):
+            if not await limiter.is_allowed(request.client.host, request.url.path):
+                return JSONResponse(status_code=429, content={"success": False})
+            return await call_next(request)
+
+        @app.middleware("http")
+        async def add_process_time_header(request: Request, call_next):
+            start_time = time.time()
+            response = await call_next(request)
+            response.headers["X-Process-Time"] = str(time.time() - start_time)
+            return response
+    else:
+        app.add_middleware(RateLimitMiddleware, limiter=limiter)
+        app.add_middleware(ProcessTimeMiddleware)
+
+    return app
+
+async def _run(stack: str, requests: int, concurrency: int) -> float:
+    transport = httpx.ASGITransport(app=_build_app(stack))
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one():
+            async with semaphore:
+                response = await client.get("/ping")
+                assert response.status_code == 200
+
+        await one()  # Warm up
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        return requests / (time.perf_counter() - start)
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    for stack in ("before", "after"):
+        rate = await _run(stack, args.requests, args.concurrency)
+        print(f"{stack:<7} {rate:10.0f} req/s")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,62 @@
+"""Benchmark each provider's parsing cost against recorded responses.
+
+Usage: python -m scripts.bench_providers [--number 200] [--provider NAME]
+
+Fixtures in scripts/fixtures/providers have the shape of each upstream's
+response body. Only the parse_* step is timed (body text -> normalized
+batch), which is the CPU a worker spends per upstream call; network time
+is tracked live in /stats under upstream_latency.
+"""
+import argparse
+import os
+import timeit
+
+from app.providers.registry import provider_registry
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "providers")
+
+# (provider, parse method, fixture file, extra arguments)
+CASES = [
+    ("exchangerate_host", "parse_latest", "exchangerate_host_latest.json", ("USD",)),
+    ("exchangerate_host", "parse_historical", "exchangerate_host_historical.json", ("2024-01-02", "USD")),
+    ("exchangerate_host", "parse_timeseries", "exchangerate_host_timeseries.json", ()),
+    ("fixer", "parse_latest", "fixer_latest.json", ()),
+    ("yahoo_finance", "parse_quote", "yahoo_finance_quote.html", ()),
+    ("coingecko", "parse_latest", "coingecko_simple_price.json", ()),
+    ("coingecko", "parse_markets", "coingecko_markets.json", ()),
+    ("coingecko", "parse_historical", "coingecko_history.json", ("02-01-2024", "bitcoin"))
+]
+
+def _items(result) -> int:
+    """Rates, prices or days in a parse result"""
+    if result is None:
+        return 0
+    if isinstance(result, float):
+        return 1
+    if isinstance(result, dict):
+        return len(result)
+    return len(getattr(result, "rates", None) or getattr(result, "prices", None) or {})
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=200, help="parses per measurement")
+    parser.add_argument("--provider", help="only benchmark this provider")
+    args = parser.parse_args()
+
+    print(f"{'provider':<18} {'method':<17} {'size':>9} {'items':>6} {'us/parse':>10} {'MB/s':>8}")
+    for name, method, fixture, extra in CASES:
+        if args.provider and name != args.provider:
+            continue
+        with open(os.path.join(FIXTURES, fixture), encoding="utf-8") as fixture_file:
+            text = fixture_file.read()
+        parse = getattr(provider_registry.get(name), method)
+        items = _items(parse(text, *extra))
+
+        seconds = min(timeit.repeat(lambda: parse(text, *extra), number=args.number, repeat=3)) / args.number
+        print(
+            f"{name:<18} {method:<17} {len(text):>9,} {items:>6} "
+            f"{seconds * 1e6:>10.1f} {len(text) / seconds / 1e6:>8.1f}"
+        )
+
+if __name__ == "__main__":
+    main()
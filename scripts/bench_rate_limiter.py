@@ -0,0 +1,75 @@
+"""Benchmark rate limiter overhead per request against a real Redis.
+
+Usage: python -m scripts.bench_rate_limiter [--url redis://localhost:6379] [--requests 2000]
+       [--algorithm fixed_window|sliding_window|gcra]
+
+"before" replays the previous limiter: three GETs to check the windows
+followed by one INCR+EXPIRE pipeline per window (six round trips).
+"after" is RateLimiter.check, a single script call with the chosen algorithm.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import redis.asyncio as redis
+
+from app.core import cache
+from app.core.rate_limiter import ALGORITHMS, WINDOWS, RateLimiter, _window_key
+
+async def _legacy_is_allowed(client, limits, client_ip: str, endpoint: str) -> bool:
+    now = int(time.time())
+    for window, limit in limits.items():
+        count = await client.get(_window_key(client_ip, endpoint, window, now))
+        if int(count or 0) >= limit:
+            return False
+    for window, ttl in WINDOWS.items():
+        pipe = client.pipeline()
+        key = _window_key(client_ip, endpoint, window, now)
+        pipe.incr(key)
+        pipe.expire(key, ttl)
+        await pipe.execute()
+    return True
+
+def _report(name: str, samples):
+    samples = sorted(samples)
+    p99 = samples[int(len(samples) * 0.99) - 1]
+    print(
+        f"{name:<7} mean {statistics.mean(samples) * 1e3:7.3f} ms  "
+        f"p50 {statistics.median(samples) * 1e3:7.3f} ms  p99 {p99 * 1e3:7.3f} ms"
+    )
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default=cache.settings.REDIS_URL)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--algorithm", choices=list(ALGORITHMS), default="fixed_window")
+    args = parser.parse_args()
+
+    client = redis.from_url(args.url, encoding="utf-8", decode_responses=True)
+    try:
+        await client.ping()
+    except Exception as e:
+        raise SystemExit(f"Redis at {args.url} is not reachable: {e}")
+
+    # Point the shared cache at the same Redis the benchmark uses
+    cache.redis_client.redis_backend.client = client
+    cache.redis_client._redis_down_since = None
+    limiter = RateLimiter(args.algorithm)
+
+    for name, call in (
+        ("before", lambda ip: _legacy_is_allowed(client, limiter.limits, ip, "/bench")),
+        ("after", lambda ip: limiter.check(ip, "/bench"))
+    ):
+        samples = []
+        for i in range(args.requests):
+            client_ip = f"bench-{name}-{i % 50}"
+            start = time.perf_counter()
+            await call(client_ip)
+            samples.append(time.perf_counter() - start)
+        _report(name, samples)
+
+    await client.aclose()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,35 @@
+import os
+import shutil
+import tempfile
+
+# Settings are read on import: keep the history store and the archive the
+# app modules create out of the repo
+DATA_DIR = tempfile.mkdtemp(prefix="liteforex-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(DATA_DIR, 'liteforex_api.db')}"
+os.environ["ARCHIVE_DIR"] = os.path.join(DATA_DIR, "archive")
+
+import fakeredis
+import fakeredis.aioredis
+import pytest_asyncio
+
+from app.core.cache import redis_client
+
+@pytest_asyncio.fixture
+async def fake_redis(monkeypatch):
+    """Point the shared cache at an empty in-process Redis (with Lua support)"""
+    server = fakeredis.FakeServer()
+    backend = redis_client.redis_backend
+    client = fakeredis.aioredis.FakeRedis(server=server, decode_responses=True)
+    binary_client = fakeredis.aioredis.FakeRedis(server=server)
+    monkeypatch.setattr(backend, "client", client)
+    monkeypatch.setattr(backend, "binary_client", binary_client)
+    monkeypatch.setattr(redis_client, "_redis_down_since", None)
+    redis_client.local_cache.clear()
+    redis_client.memory_backend.clear()
+    yield client
+    redis_client.local_cache.clear()
+    await client.aclose()
+    await binary_client.aclose()
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(DATA_DIR, ignore_errors=True)
@@ -1,7 +1,11 @@
+import json
 import pytest
+import pytest_asyncio
 import asyncio
-from httpx import AsyncClient
-from app.main import app
+from httpx import ASGITransport, AsyncClient
+from datetime import date, timedelta
+from app.main import app, forex_service
+from app.core.cache import set_cached_forex_days, set_cached_forex_rates, set_cached_historical_forex
 
 # Test data
 FOREX_ENDPOINTS = [
@@ -18,9 +22,9 @@ CRYPTO_ENDPOINTS = [
     "/crypto/list"
 ]
 
-@pytest.fixture
+@pytest_asyncio.fixture
 async def client():
-    async with AsyncClient(app=app, base_url="http://test") as ac:
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
         yield ac
 
 @pytest.mark.asyncio
@@ -42,6 +46,16 @@ async def test_health_endpoint(client):
     assert "status" in data
     assert "services" in data
 
+@pytest.mark.asyncio
+async def test_stats_endpoint(client):
+    """Test cache statistics endpoint"""
+    response = await client.get("/stats")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["success"] == True
+    assert "layers" in data["cache"]
+    assert "local_hits" in data["cache"]["layers"]
+
 @pytest.mark.asyncio
 async def test_forex_latest(client):
     """Test forex latest rates endpoint"""
@@ -67,6 +81,56 @@ async def test_forex_convert(client):
     assert "rate" in data
     assert "result" in data
 
+@pytest.mark.asyncio
+async def test_forex_convert_batch(fake_redis, client):
+    """Test batch conversion with row and columnar payloads"""
+    await set_cached_forex_rates("USD", {"rates": {"EUR": 0.8, "GBP": 0.5, "JPY": 100.0}}, complete=True)
+    response = await client.post("/forex/convert/batch", json={
+        "conversions": [
+            {"amount": 100, "from": "USD", "to": "EUR"},
+            {"amount": 50, "from": "EUR", "to": "GBP"},
+            {"amount": 10, "from": "USD", "to": "XXX"}
+        ]
+    })
+    assert response.status_code == 200
+    data = response.json()
+    assert data["success"] == True
+    assert data["count"] == 3
+    assert data["rates"] == [0.8, 0.625, None]
+    assert data["results"] == [80.0, 31.25, None]
+    assert data["unresolved"] == [2]
+    
+    response = await client.post("/forex/convert/batch", json={
+        "amounts": [1, 2, 3],
+        "from": "GBP",
+        "to": ["EUR", "ZZZ", "JPY"]
+    })
+    assert response.status_code == 200
+    data = response.json()
+    assert data["count"] == 3
+    assert data["results"] == [1.6, None, 600.0]
+    assert data["unresolved"] == [1]
+    
+    response = await client.post("/forex/convert/batch?stream=true", json={
+        "amounts": [1, 2],
+        "from": "XXX",
+        "to": "EUR"
+    })
+    assert response.status_code == 200
+    chunk = json.loads(response.text.splitlines()[0])
+    assert chunk["results"] == [None, None]
+    assert chunk["unresolved"] == [0, 1]
+
+@pytest.mark.asyncio
+async def test_invalid_forex_convert_batch(client):
+    """Test batch conversion with mismatched columns"""
+    response = await client.post("/forex/convert/batch", json={
+        "amounts": [1, 2, 3],
+        "from": ["USD", "EUR"],
+        "to": "EUR"
+    })
+    assert response.status_code == 400
+
 @pytest.mark.asyncio
 async def test_forex_historical(client):
     """Test forex historical rates endpoint"""
@@ -78,6 +142,60 @@ async def test_forex_historical(client):
     assert data["date"] == "2024-01-01"
     assert "rates" in data
 
+@pytest.mark.asyncio
+async def test_forex_historical_weekend(fake_redis, client):
+    """Test that a weekend date is answered with the previous fixing"""
+    friday = {"success": True, "base": "USD", "date": "2024-01-05", "rates": {"EUR": 0.91}}
+    await set_cached_historical_forex("2024-01-05", "USD", friday, ["EUR"])
+    response = await client.get("/forex/historical?date_str=2024-01-06&base=USD&symbols=EUR")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["date"] == "2024-01-06"
+    assert data["effective_date"] == "2024-01-05"
+    assert data["rates"] == {"EUR": 0.91}
+
+@pytest.mark.asyncio
+async def test_forex_timeseries(client):
+    """Test forex time series endpoint"""
+    response = await client.get("/forex/timeseries?start=2024-01-01&end=2024-01-31&base=USD&symbols=EUR,IDR")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["base"] == "USD"
+    assert data["start_date"] == "2024-01-01"
+    assert data["end_date"] == "2024-01-31"
+    for day, rates in data["rates"].items():
+        assert "2024-01-01" <= day <= "2024-01-31"
+        assert set(rates) <= {"EUR", "IDR"}
+
+@pytest.mark.asyncio
+async def test_invalid_forex_timeseries_range(client):
+    """Test forex time series with a reversed range"""
+    response = await client.get("/forex/timeseries?start=2024-02-01&end=2024-01-01")
+    assert response.status_code == 400
+
+@pytest.mark.asyncio
+async def test_forex_timeseries_ends_today(fake_redis, client, monkeypatch):
+    """Test that a range ending in the future stops at today without going upstream"""
+    today = date.today()
+    yesterday = (today - timedelta(days=1)).isoformat()
+    await set_cached_forex_days("USD", {yesterday: {"EUR": 0.9}})
+    await set_cached_forex_rates("USD", {"rates": {"EUR": 0.92}}, complete=True)
+    
+    async def upstream(*args):
+        raise AssertionError("time series fetched upstream")
+    
+    monkeypatch.setattr(forex_service, "_fetch_timeseries", upstream)
+    end = (today + timedelta(days=30)).isoformat()
+    response = await client.get(f"/forex/timeseries?start={yesterday}&end={end}&base=USD&symbols=EUR")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["end_date"] == today.isoformat()
+    assert data["rates"] == {yesterday: {"EUR": 0.9}, today.isoformat(): {"EUR": 0.92}}
+    
+    start = (today + timedelta(days=1)).isoformat()
+    response = await client.get(f"/forex/timeseries?start={start}&end={end}")
+    assert response.status_code == 400
+
 @pytest.mark.asyncio
 async def test_forex_list(client):
     """Test forex list endpoint"""
@@ -145,6 +263,17 @@ async def test_rate_limiting(client):
     for response in responses:
         assert response.status_code in [200, 429]
 
+@pytest.mark.asyncio
+async def test_rate_limit_headers(client):
+    """Test rate limit headers"""
+    first = await client.get("/forex/list")
+    second = await client.get("/forex/list")
+    assert first.status_code == 200
+    for header in ["x-ratelimit-limit", "x-ratelimit-remaining", "x-ratelimit-reset"]:
+        assert header in second.headers
+    if int(first.headers["x-ratelimit-limit"]) == int(second.headers["x-ratelimit-limit"]):
+        assert int(second.headers["x-ratelimit-remaining"]) <= int(first.headers["x-ratelimit-remaining"])
+
 @pytest.mark.asyncio
 async def test_invalid_forex_convert(client):
     """Test invalid forex conversion"""
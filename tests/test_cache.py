@@ -0,0 +1,131 @@
+import asyncio
+import json
+
+import pytest
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.core.backends import MemoryBackend
+from app.core.cache import redis_client
+from app.core.codec import COMPRESSION_IDS, HEADER_SIZE, MAGIC, VERSION, JSONCodec, MsgpackCodec, ValueCodec
+
+def value(size: int) -> bytes:
+    return b"x" * size
+
+@pytest.mark.asyncio
+async def test_memory_backend_evicts_least_recently_used():
+    """Test that the memory backend stays under max_bytes by evicting the oldest entries"""
+    entry_size = 100 + 1 + MemoryBackend.ENTRY_OVERHEAD
+    backend = MemoryBackend(3 * entry_size)
+    await backend.set_many([(key, value(100), None) for key in "abc"])
+    
+    # Reading a refreshes it, so b is the oldest when d arrives
+    assert (await backend.get_many(["a"]))[0][0] == value(100)
+    await backend.set_many([("d", value(100), None)])
+    assert [found for found, _ in await backend.get_many(list("abcd"))] == [value(100), None, value(100), value(100)]
+    assert backend.evictions == 1
+    assert backend.used_bytes == 3 * entry_size
+    
+    # A value larger than the whole budget is not stored
+    await backend.set_many([("e", value(4 * entry_size), None)])
+    assert (await backend.get_many(["e"]))[0] == (None, -2)
+    assert backend.get_stats()["entries"] == 3
+
+@pytest.mark.asyncio
+async def test_memory_backend_expires_entries():
+    """Test that entries past their TTL are gone and reported as missing"""
+    backend = MemoryBackend(1024)
+    await backend.set_many([("short", value(10), 1), ("long", value(10), None)])
+    backend._entries["short"] = (0.0, *backend._entries["short"][1:])
+    assert await backend.get_many(["short", "long"]) == [(None, -2), (value(10), -1)]
+
+@pytest.mark.asyncio
+async def test_cache_fails_over_to_memory_and_recovers(fake_redis, monkeypatch):
+    """Test that a Redis connection error moves traffic to memory until Redis answers again"""
+    failovers = redis_client.stats["failovers"]
+    
+    async def unreachable(*args):
+        raise RedisConnectionError("connection refused")
+    
+    with monkeypatch.context() as down:
+        down.setattr(redis_client.redis_backend, "set_many", unreachable)
+        down.setattr(redis_client.redis_backend, "ping", unreachable)
+        assert await redis_client.set("failover:key", {"rate": 1.5})
+        assert not redis_client.available
+        assert redis_client.redis_client is None
+        assert redis_client.stats["failovers"] == failovers + 1
+        
+        # Served from memory while Redis stays down, even when a retry is due
+        redis_client._next_retry = 0.0
+        assert await redis_client.get("failover:key") == {"rate": 1.5}
+        assert not redis_client.available
+        assert await fake_redis.get("failover:key") is None
+    
+    # Redis answers the next probe: traffic moves back and memory is emptied
+    redis_client._next_retry = 0.0
+    assert await redis_client.get("failover:key") is None
+    assert redis_client.available
+    assert redis_client.memory_backend.get_stats()["entries"] == 0
+    assert await redis_client.set("failover:key", {"rate": 2.0})
+    assert await fake_redis.exists("failover:key")
+
+def test_codec_writes_header():
+    """Test that encoded values start with the versioned header"""
+    encoded = ValueCodec("json").encode({"USD": 1.0})
+    assert encoded[:HEADER_SIZE] == bytes((MAGIC, VERSION, JSONCodec.id, 0))
+    assert json.loads(encoded[HEADER_SIZE:]) == {"USD": 1.0}
+
+def test_codec_compresses_large_values_only():
+    """Test that compression applies from min_compress_size on and is read back"""
+    codec = ValueCodec("json", "zlib", min_compress_size=64)
+    small = {"USD": 1.0}
+    large = {f"C{i:03d}": 1.0 for i in range(100)}
+    assert codec.encode(small)[3] == 0
+    assert codec.encode(large)[3] == COMPRESSION_IDS["zlib"]
+    assert codec.decode(codec.encode(large)) == large
+    # Readers dispatch on the header, not on their own settings
+    assert ValueCodec("json").decode(codec.encode(large)) == large
+
+def test_codec_msgpack_round_trip():
+    """Test that msgpack values round-trip and stay readable by a JSON-configured reader"""
+    pytest.importorskip("msgpack")
+    value = {"rates": {"EUR": 0.9}, "date": "2024-01-05"}
+    encoded = ValueCodec("msgpack").encode(value)
+    assert encoded[2] == MsgpackCodec.id
+    assert ValueCodec("json").decode(encoded) == value
+
+def test_codec_decodes_legacy_json():
+    """Test that values written before the header existed are read as plain JSON"""
+    codec = ValueCodec("json")
+    assert codec.decode(b'{"USD": 1.0}') == {"USD": 1.0}
+    assert codec.decode('{"USD": 1.0}') == {"USD": 1.0}
+
+def test_codec_rejects_unknown_header():
+    """Test that a header from a newer version is an error, not garbage"""
+    with pytest.raises(ValueError):
+        ValueCodec("json").decode(bytes((MAGIC, VERSION + 1, JSONCodec.id, 0)) + b"{}")
+
+@pytest.mark.asyncio
+async def test_one_probe_while_redis_is_down(fake_redis, monkeypatch):
+    """Test that concurrent requests due for a retry share one probe of a hanging Redis"""
+    pings = 0
+    release = asyncio.Event()
+    
+    async def hanging_ping():
+        nonlocal pings
+        pings += 1
+        await release.wait()
+        raise RedisConnectionError("timed out")
+    
+    monkeypatch.setattr(redis_client.redis_backend, "ping", hanging_ping)
+    monkeypatch.setattr(redis_client, "_redis_down_since", 0.0)
+    monkeypatch.setattr(redis_client, "_next_retry", 0.0)
+    
+    probing = asyncio.ensure_future(redis_client.get("probe:key"))
+    await asyncio.sleep(0)
+    # Served from memory without waiting for the probe
+    served = asyncio.gather(*(redis_client.get("probe:key") for _ in range(10)))
+    assert await asyncio.wait_for(served, timeout=1) == [None] * 10
+    release.set()
+    assert await probing is None
+    assert pings == 1
+    assert not redis_client.available
@@ -0,0 +1,146 @@
+import asyncio
+import itertools
+import time
+
+import pytest
+
+from app.core.cache import CacheKeys
+from app.core.circuit_breaker import CLOSED, HALF_OPEN, OPEN, get_breaker, order_by_health
+from app.core.latency import get_tracker
+
+_names = itertools.count()
+
+def breaker_name() -> str:
+    """Unique name, breakers and latency trackers are process-wide"""
+    return f"test_provider_{next(_names)}"
+
+async def succeed():
+    return {"ok": True}
+
+async def fail():
+    return None
+
+async def settle():
+    """Let started calls get past the breaker's Redis round trips"""
+    await asyncio.sleep(0.05)
+
+def is_valid(result) -> bool:
+    return result is not None
+
+async def trip(breaker):
+    for _ in range(5):
+        await breaker.call(fail, is_valid)
+    assert breaker.state == OPEN
+
+async def end_open_period(breaker, fake_redis):
+    """Move the open-until time into the past, here and in Redis"""
+    breaker.open_until = time.time() - 1
+    breaker._synced_at = 0.0
+    await fake_redis.set(CacheKeys.circuit_breaker(breaker.name), repr(breaker.open_until))
+
+@pytest.mark.asyncio
+async def test_breaker_opens_and_skips_calls(fake_redis):
+    """Test that enough failures open the breaker, share it and skip calls"""
+    breaker = get_breaker(breaker_name())
+    for _ in range(4):
+        await breaker.call(fail, is_valid)
+    assert breaker.state == CLOSED
+    await breaker.call(fail, is_valid)
+    assert breaker.state == OPEN
+    assert await fake_redis.exists(CacheKeys.circuit_breaker(breaker.name))
+    
+    called = False
+    
+    async def tracked():
+        nonlocal called
+        called = True
+        return 1
+    
+    assert await breaker.call(tracked, is_valid) is None
+    assert not called
+    assert breaker.health_score() == 0.0
+
+@pytest.mark.asyncio
+async def test_successful_probe_closes(fake_redis):
+    """Test that a half-open breaker lets one probe through and closes when it succeeds"""
+    breaker = get_breaker(breaker_name())
+    await trip(breaker)
+    await end_open_period(breaker, fake_redis)
+    
+    assert await breaker.call(succeed, is_valid) == {"ok": True}
+    assert breaker.state == CLOSED
+    assert not await fake_redis.exists(CacheKeys.circuit_breaker(breaker.name))
+    assert not await fake_redis.exists(CacheKeys.circuit_probe(breaker.name))
+
+@pytest.mark.asyncio
+async def test_failed_probe_reopens(fake_redis):
+    """Test that a failed probe opens the breaker again"""
+    breaker = get_breaker(breaker_name())
+    await trip(breaker)
+    await end_open_period(breaker, fake_redis)
+    
+    await breaker.call(fail, is_valid)
+    assert breaker.state == OPEN
+    assert breaker.trips == 2
+
+@pytest.mark.asyncio
+async def test_only_the_probe_decides_half_open(fake_redis):
+    """Test that a call started before the trip does not close a half-open breaker"""
+    breaker = get_breaker(breaker_name())
+    early_release, probe_release = asyncio.Event(), asyncio.Event()
+    
+    async def slow(release):
+        await release.wait()
+        return {"ok": True}
+    
+    early = asyncio.ensure_future(breaker.call(lambda: slow(early_release), is_valid))
+    await settle()
+    await trip(breaker)
+    await end_open_period(breaker, fake_redis)
+    probe = asyncio.ensure_future(breaker.call(lambda: slow(probe_release), is_valid))
+    await settle()
+    assert breaker.state == HALF_OPEN
+    # While the probe is in flight no other call goes through
+    assert await breaker.call(succeed, is_valid) is None
+    
+    early_release.set()
+    await early
+    assert breaker.state == HALF_OPEN
+    
+    probe_release.set()
+    await probe
+    assert breaker.state == CLOSED
+
+@pytest.mark.asyncio
+async def test_cancelled_probe_releases_the_lock(fake_redis):
+    """Test that a probe cancelled by its caller lets the next call probe"""
+    breaker = get_breaker(breaker_name())
+    await trip(breaker)
+    await end_open_period(breaker, fake_redis)
+    
+    probe = asyncio.ensure_future(breaker.call(lambda: asyncio.sleep(10), is_valid))
+    await settle()
+    probe.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await probe
+    assert not await fake_redis.exists(CacheKeys.circuit_probe(breaker.name))
+    assert await breaker.call(succeed, is_valid) == {"ok": True}
+    assert breaker.state == CLOSED
+
+@pytest.mark.asyncio
+async def test_order_by_health(fake_redis):
+    """Test ordering by success rate, then p95 latency, unsampled providers in the middle"""
+    fast, slow, unsampled, failing, tripped = (breaker_name() for _ in range(5))
+    for _ in range(5):
+        get_tracker(fast).record(0.1)
+        get_tracker(slow).record(0.9)
+    
+    # One failure in five: sampled but less healthy than the rest
+    for ok in (True, True, True, True, False):
+        await get_breaker(failing).record(ok)
+    await trip(get_breaker(tripped))
+    
+    # Without samples a provider counts as the median p95 (here the slow one's)
+    assert order_by_health([tripped, failing, unsampled, slow, fast]) == [fast, unsampled, slow, failing, tripped]
+    # Equal evidence keeps the given order
+    assert order_by_health([unsampled, breaker_name()])[0] == unsampled
@@ -0,0 +1,57 @@
+from datetime import date
+
+import numpy as np
+
+from app.core.columnar_archive import ColumnarArchive, archive_days
+
+def test_write_and_read_back(tmp_path):
+    """Test that values land on their days and missing days read as NaN"""
+    archive = ColumnarArchive(str(tmp_path))
+    archive.write("forex_USD", {
+        "2024-01-01": {"EUR": 0.9, "GBP": 0.8},
+        "2024-01-03": {"EUR": 0.91, "GBP": None}
+    })
+    
+    values = archive.read("forex_USD", "EUR", date(2024, 1, 1), date(2024, 1, 3))
+    assert values[0] == 0.9
+    assert np.isnan(values[1])
+    assert values[2] == 0.91
+    assert np.isnan(archive.read("forex_USD", "GBP", date(2024, 1, 3), date(2024, 1, 3))).all()
+    assert archive.symbols("forex_USD") == ["EUR", "GBP"]
+    assert archive.get_stats() == {"forex_USD": {"columns": 2, "days": 2}}
+
+def test_existing_values_are_kept(tmp_path):
+    """Test that the archive is append-only: a second write does not overwrite"""
+    archive = ColumnarArchive(str(tmp_path))
+    archive.write("forex_USD", {"2024-01-01": {"EUR": 0.9}})
+    archive.write("forex_USD", {"2024-01-01": {"EUR": 1.5}, "2024-01-02": {"EUR": 0.95}})
+    assert list(archive.read("forex_USD", "EUR", date(2024, 1, 1), date(2024, 1, 2))) == [0.9, 0.95]
+
+def test_column_ending_early(tmp_path):
+    """Test that reads past the end of a column are shorter and coverage is False there"""
+    archive = ColumnarArchive(str(tmp_path))
+    archive.write("forex_USD", {"2024-01-01": {"EUR": 0.9}, "2024-01-02": {}})
+    
+    assert len(archive.read("forex_USD", "EUR", date(2024, 1, 1), date(2024, 1, 10))) == 1
+    assert len(archive.read("forex_USD", "JPY", date(2024, 1, 1), date(2024, 1, 10))) == 0
+    covered = archive.coverage("forex_USD", date(2023, 12, 31), date(2024, 1, 4))
+    assert list(covered) == [False, True, True, False, False]
+    assert archive_days(date(2023, 12, 31), covered) == ["2024-01-01", "2024-01-02"]
+
+def test_range_crossing_epoch(tmp_path):
+    """Test that days before EPOCH read as NaN and later values keep their days"""
+    archive = ColumnarArchive(str(tmp_path))
+    archive.write("forex_USD", {"1999-01-01": {"EUR": 0.85}, "1999-01-03": {"EUR": 0.86}, "1998-12-31": {"EUR": 1.0}})
+    
+    start = date(1998, 12, 30)
+    values = archive.read("forex_USD", "EUR", start, date(1999, 1, 3))
+    assert len(values) == 5
+    assert np.isnan(values[:2]).all()
+    assert values[2] == 0.85
+    assert values[4] == 0.86
+    covered = archive.coverage("forex_USD", start, date(1999, 1, 3))
+    assert archive_days(start, covered) == ["1999-01-01", "1999-01-03"]
+    
+    # Entirely before EPOCH
+    before = archive.read("forex_USD", "EUR", date(1998, 12, 1), date(1998, 12, 31))
+    assert len(before) == 31 and np.isnan(before).all()
@@ -0,0 +1,39 @@
+import pytest
+
+from app.services.cross_rates import CrossRateTable
+
+RATES = {"EUR": 0.8, "GBP": 0.5, "JPY": 100.0}
+
+def table(**kwargs) -> CrossRateTable:
+    return CrossRateTable("USD", RATES, date="2024-01-05", currencies=["USD", "EUR", "GBP", "JPY", "IDR"], **kwargs)
+
+def test_anchor_rates():
+    """Test that the anchor's own rates come back unchanged, with the anchor at 1"""
+    assert table().rates_for("USD") == {"USD": 1.0, **RATES}
+
+def test_rebase_to_non_anchor():
+    """Test that another base is derived by dividing through its anchor rate"""
+    rates = table().rates_for("EUR", ["USD", "GBP", "JPY"])
+    assert rates == pytest.approx({"USD": 1.25, "GBP": 0.625, "JPY": 125.0})
+    assert table().rate("GBP", "JPY") == pytest.approx(200.0)
+    
+    rebased = table().rebase("GBP")
+    assert rebased.anchor == "GBP"
+    assert rebased.date == "2024-01-05"
+    assert rebased.rates_for("GBP", ["EUR", "USD"]) == pytest.approx({"EUR": 1.6, "USD": 2.0})
+
+def test_symbols_missing_from_anchor_table():
+    """Test that currencies without an anchor rate are left out, not NaN"""
+    rates = table().rates_for("EUR", ["GBP", "IDR", "XXX"])
+    assert rates == pytest.approx({"GBP": 0.625})
+    assert not table().has("IDR")
+    assert table().rate("EUR", "IDR") is None
+    assert table().rates_for("IDR") == {}
+
+def test_covers():
+    """Test that only a partial table needs every requested currency"""
+    assert table(complete=True).covers("IDR", ["XXX"])
+    partial = table(complete=False)
+    assert partial.covers("EUR", ["GBP"])
+    assert not partial.covers("EUR", ["IDR"])
+    assert not partial.covers("IDR")
@@ -0,0 +1,38 @@
+from datetime import date
+
+from app.core.config import settings
+from app.core.date_index import DateIndex
+
+def test_weekend_resolves_to_friday():
+    """Test that Saturday and Sunday resolve to the previous Friday"""
+    index = DateIndex()
+    assert index.resolve("USD", date(2024, 1, 6)) == "2024-01-05"
+    assert index.resolve("USD", date(2024, 1, 7)) == "2024-01-05"
+    assert index.resolve("USD", date(2024, 1, 8)) == "2024-01-08"
+
+def test_stored_holiday_is_walked_over():
+    """Test that a holiday learned from upstream is skipped like a weekend"""
+    index = DateIndex()
+    index.mark_closed("2024-01-01")
+    assert index.is_closed(date(2024, 1, 1))
+    assert index.resolve("USD", date(2024, 1, 1)) == "2023-12-29"
+
+def test_stored_fixing_within_closed_span_wins():
+    """Test that a fixing stored on a closed day answers the days after it"""
+    index = DateIndex()
+    index.load("USD", ["2024-01-04", "2024-01-06"])
+    assert index.is_loaded("USD")
+    assert index.resolve("USD", date(2024, 1, 7)) == "2024-01-06"
+    # Fixings of another base do not count
+    assert index.resolve("EUR", date(2024, 1, 7)) == "2024-01-05"
+    # A fixing before the last business day does not win over it
+    assert index.resolve("USD", date(2024, 1, 5)) == "2024-01-05"
+
+def test_walk_back_stops_at_max_closed_days(monkeypatch):
+    """Test that at most FOREX_MAX_CLOSED_DAYS closed days are walked over"""
+    monkeypatch.setattr(settings, "FOREX_MAX_CLOSED_DAYS", 3)
+    index = DateIndex()
+    for day in range(8, 13):
+        index.mark_closed(f"2024-01-{day:02d}")
+    assert index.resolve("USD", date(2024, 1, 14)) == "2024-01-11"
+    assert index.get_stats() == {"fixings": {}, "holidays": 5}
@@ -0,0 +1,145 @@
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.core.cache import CacheKeys, get_forex_refresh_stats, redis_client, set_cached_forex_rates
+from app.core.config import settings
+from app.core.history_store import history_store
+from app.providers.base import RateBatch
+from app.providers.registry import provider_registry
+from app.services.forex_service import ForexService
+
+def stub_provider(monkeypatch, batch: RateBatch) -> list:
+    """Make every provider selection return one provider answering with batch"""
+    calls = []
+    
+    async def fetch_historical(session, date_str, base):
+        calls.append(date_str)
+        return batch
+    
+    async def call(provider, operation, fn):
+        return await fn()
+    
+    async def fetch_latest(session, base, symbols):
+        calls.append(base)
+        return batch
+    
+    provider = SimpleNamespace(
+        name="stub",
+        fetch_historical=fetch_historical,
+        fetch_latest=fetch_latest,
+        breaker_name=lambda operation: "stub"
+    )
+    monkeypatch.setattr(provider_registry, "select", lambda *args, **kwargs: [provider])
+    monkeypatch.setattr(provider_registry, "call", call)
+    return calls
+
+@pytest.mark.asyncio
+async def test_past_historical_rates_are_stored(fake_redis, monkeypatch):
+    """Test that a finished day goes to the history store and the long-lived cache"""
+    stub_provider(monkeypatch, RateBatch("stub", "USD", "2024-01-05", {"EUR": 0.91, "GBP": 0.79}, True))
+    result = await ForexService()._fetch_historical_rates("2024-01-05", "USD", ["EUR"])
+    assert result["rates"] == {"EUR": 0.91}
+    
+    assert await history_store.get_forex("2024-01-05", "USD") == {"EUR": 0.91, "GBP": 0.79}
+    assert await fake_redis.ttl(CacheKeys.forex_historical("2024-01-05", "USD", "EUR")) > settings.FOREX_CACHE_TTL
+
+@pytest.mark.asyncio
+async def test_todays_historical_rates_are_not_stored(fake_redis, monkeypatch):
+    """Test that today's still-moving table stays out of the store and is cached briefly"""
+    today = date.today().isoformat()
+    stub_provider(monkeypatch, RateBatch("stub", "EUR", today, {"USD": 1.1}, True))
+    result = await ForexService()._fetch_historical_rates(today, "EUR")
+    assert result["date"] == today
+    
+    assert await history_store.get_forex(today, "EUR") == {}
+    assert 0 < await fake_redis.ttl(CacheKeys.forex_historical(today, "EUR", None)) <= settings.FOREX_CACHE_TTL
+
+@pytest.mark.asyncio
+async def test_unpublished_fixing_is_filed_under_its_date(fake_redis, monkeypatch):
+    """Test that yesterday's fixing returned for today is stored under yesterday"""
+    today = date.today()
+    yesterday = (today - timedelta(days=1)).isoformat()
+    stub_provider(monkeypatch, RateBatch("stub", "GBP", yesterday, {"USD": 1.27}, True))
+    result = await ForexService()._fetch_historical_rates(today.isoformat(), "GBP")
+    assert result["date"] == yesterday
+    
+    assert await history_store.get_forex(yesterday, "GBP") == {"USD": 1.27}
+    assert await fake_redis.exists(CacheKeys.forex_historical(yesterday, "GBP", None))
+    assert not await fake_redis.exists(CacheKeys.forex_historical(today.isoformat(), "GBP", None))
+
+@pytest.mark.asyncio
+async def test_convert_batch_with_unknown_currencies(fake_redis):
+    """Test vectorized conversion, with NaN where either currency is unknown"""
+    await set_cached_forex_rates("USD", {"rates": {"EUR": 0.8, "GBP": 0.5}, "date": "2024-01-05"}, complete=True)
+    batch = await ForexService().convert_batch(
+        np.array([100.0, 10.0, 10.0, 4.0]),
+        ["USD", "XXX", "EUR", "GBP"],
+        ["EUR", "EUR", "YYY", "EUR"]
+    )
+    assert batch["date"] == "2024-01-05"
+    assert batch["results"][0] == 80.0
+    assert np.isnan(batch["results"][1:3]).all()
+    assert batch["results"][3] == 6.4
+    assert batch["rates"][3] == pytest.approx(1.6)
+
+@pytest.mark.asyncio
+async def test_latest_rates_normalize_case(fake_redis):
+    """Test that lower-case base and symbols find the upper-case rates"""
+    await set_cached_forex_rates("USD", {"rates": {"EUR": 0.8, "GBP": 0.5}}, complete=True)
+    result = await ForexService().get_latest_rates("eur", ["usd", "gbp"])
+    assert result["base"] == "EUR"
+    assert result["rates"] == pytest.approx({"USD": 1.25, "GBP": 0.625})
+
+def spy_set_many(monkeypatch) -> list:
+    """Record the keys of every pipelined write to Redis"""
+    writes = []
+    backend = redis_client.redis_backend
+    set_many = backend.set_many
+    
+    async def recording(items):
+        writes.append([key for key, _, _ in items])
+        return await set_many(items)
+    
+    monkeypatch.setattr(backend, "set_many", recording)
+    return writes
+
+@pytest.mark.asyncio
+async def test_update_rates_cache_writes_views_in_one_pipeline(fake_redis, monkeypatch):
+    """Test that the bulk refresh fetches once, writes every view in one pipeline and shares its stats"""
+    calls = stub_provider(monkeypatch, RateBatch("stub", "EUR", "2024-01-05", {"USD": 1.25, "GBP": 0.625}, True))
+    writes = spy_set_many(monkeypatch)
+    service = ForexService()
+    service.supported_currencies = ["USD", "EUR", "GBP", "IDR"]
+    
+    stats = await service.update_rates_cache()
+    assert calls == ["USD"]
+    assert stats["complete"] is True
+    assert stats["keys_warmed"] == 4
+    assert stats["currencies"] == 3
+    assert stats["missing"] == ["IDR"]
+    
+    view_keys = [CacheKeys.forex_view(base) for base in ("USD", "EUR", "GBP")]
+    assert [keys for keys in writes if CacheKeys.forex_view("USD") in keys] == [view_keys]
+    assert (await service.get_latest_rates("GBP", ["EUR"]))["rates"] == pytest.approx({"EUR": 1.6})
+    
+    # Any worker (e.g. the API, not the Celery worker that refreshed) reads the same stats
+    redis_client.local_cache.clear()
+    assert await get_forex_refresh_stats() == stats
+
+@pytest.mark.asyncio
+async def test_update_rates_cache_partial_table(fake_redis, monkeypatch):
+    """Test that a partial table warms only the anchor table, no views"""
+    stub_provider(monkeypatch, RateBatch("stub", "USD", "2024-01-05", {"EUR": 0.8}, False))
+    writes = spy_set_many(monkeypatch)
+    service = ForexService()
+    service.supported_currencies = ["USD", "EUR", "GBP"]
+    
+    stats = await service.update_rates_cache()
+    assert stats["complete"] is False
+    assert stats["keys_warmed"] == 1
+    assert stats["missing"] == ["GBP"]
+    assert not [keys for keys in writes if CacheKeys.forex_view("USD") in keys]
+    assert await get_forex_refresh_stats() == stats
@@ -0,0 +1,35 @@
+import asyncio
+
+import pytest
+
+from app.core.hedging import hedged_race
+
+def is_valid(result) -> bool:
+    return result is not None
+
+def answer(result, delay: float = 0.0):
+    async def fn():
+        await asyncio.sleep(delay)
+        return result
+    return fn
+
+@pytest.mark.asyncio
+async def test_no_providers():
+    """Test that an empty provider list (every breaker open) is a miss, not an error"""
+    assert await hedged_race([], is_valid, lambda provider: 0.01) == (None, None)
+
+@pytest.mark.asyncio
+async def test_slow_provider_is_hedged():
+    """Test that the next provider starts after the hedge delay and the first valid answer wins"""
+    attempts = [("slow", answer("slow result", 1.0)), ("fast", answer("fast result"))]
+    assert await hedged_race(attempts, is_valid, lambda provider: 0.01) == ("fast", "fast result")
+
+@pytest.mark.asyncio
+async def test_invalid_answer_starts_the_next_provider():
+    """Test that failures and invalid answers fall through to the next provider"""
+    async def broken():
+        raise RuntimeError("upstream down")
+    
+    attempts = [("broken", broken), ("empty", answer(None)), ("good", answer({"EUR": 0.9}))]
+    assert await hedged_race(attempts, is_valid, lambda provider: 10.0) == ("good", {"EUR": 0.9})
+    assert await hedged_race(attempts[:2], is_valid, lambda provider: 10.0) == (None, None)
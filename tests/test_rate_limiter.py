@@ -0,0 +1,159 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from app.core import rate_limiter as rate_limiter_module
+from app.core.cache import CacheKeys
+from app.core.rate_limiter import LocalRateLimiter, RateLimiter, _window_key
+
+CLIENT = "203.0.113.7"
+ENDPOINT = "/forex/latest"
+
+def limiter(algorithm: str = "fixed_window", per_minute: int = 5) -> RateLimiter:
+    rate_limiter = RateLimiter(algorithm)
+    rate_limiter.limits = {"per_minute": per_minute, "per_hour": 100, "per_day": 1000}
+    return rate_limiter
+
+@pytest.mark.asyncio
+async def test_fixed_window_check_counts_until_limit(fake_redis):
+    """Test that check admits and counts up to the limit, then rejects"""
+    rate_limiter = limiter()
+    for expected in range(4, -1, -1):
+        result = await rate_limiter.check(CLIENT, ENDPOINT)
+        assert result.allowed
+        assert result.windows["per_minute"] == expected
+    
+    result = await rate_limiter.check(CLIENT, ENDPOINT)
+    assert not result.allowed
+    assert result.remaining == 0
+    assert result.limit == 5
+    # A rejected request is not counted
+    assert result.windows["per_hour"] == 95
+
+@pytest.mark.asyncio
+async def test_fixed_window_weight(fake_redis):
+    """Test that a weighted request needs room for its whole weight"""
+    rate_limiter = limiter()
+    assert (await rate_limiter.check(CLIENT, ENDPOINT, weight=3)).windows["per_minute"] == 2
+    assert not (await rate_limiter.check(CLIENT, ENDPOINT, weight=3)).allowed
+    assert (await rate_limiter.check(CLIENT, ENDPOINT, weight=2)).windows["per_minute"] == 0
+
+@pytest.mark.asyncio
+async def test_fixed_window_peek_does_not_count(fake_redis):
+    """Test that usage info reads the windows without counting"""
+    rate_limiter = limiter()
+    await rate_limiter.check(CLIENT, ENDPOINT, weight=2)
+    for _ in range(3):
+        usage = await rate_limiter.get_usage_info(CLIENT, ENDPOINT)
+        assert usage["per_minute"]["current"] == 2
+        assert usage["per_minute"]["remaining"] == 3
+
+@pytest.mark.asyncio
+async def test_fixed_window_charge_and_refund(fake_redis):
+    """Test that charges may exceed the limit and refunds never go below empty"""
+    rate_limiter = limiter()
+    await rate_limiter.check(CLIENT, ENDPOINT)
+    await rate_limiter.charge(CLIENT, ENDPOINT, 6)
+    usage = await rate_limiter.get_usage_info(CLIENT, ENDPOINT)
+    assert usage["per_minute"]["current"] == 5
+    assert usage["per_hour"]["current"] == 7
+    
+    await rate_limiter.charge(CLIENT, ENDPOINT, -4)
+    assert (await rate_limiter.get_usage_info(CLIENT, ENDPOINT))["per_hour"]["current"] == 3
+    await rate_limiter.charge(CLIENT, ENDPOINT, -10)
+    assert (await rate_limiter.get_usage_info(CLIENT, ENDPOINT))["per_hour"]["current"] == 0
+
+@pytest.mark.asyncio
+async def test_fixed_window_reserve(fake_redis):
+    """Test that a reservation is all or nothing and is not counted as a request"""
+    rate_limiter = limiter()
+    await rate_limiter.check(CLIENT, ENDPOINT)
+    assert not (await rate_limiter.reserve(CLIENT, ENDPOINT, 5)).allowed
+    assert (await rate_limiter.get_usage_info(CLIENT, ENDPOINT))["per_minute"]["current"] == 1
+    assert (await rate_limiter.reserve(CLIENT, ENDPOINT, 4)).allowed
+    
+    stats = await rate_limiter.get_global_stats()
+    assert stats["total_requests"] == 1
+    assert stats["active_clients"] == 1
+
+@pytest.mark.asyncio
+async def test_sliding_window_weights_previous_window(fake_redis, monkeypatch):
+    """Test that half of the previous minute still counts halfway through the current one"""
+    now = 1_700_000_010  # 30 seconds into a minute
+    monkeypatch.setattr(rate_limiter_module, "time", SimpleNamespace(time=lambda: now))
+    rate_limiter = limiter("sliding_window")
+    await fake_redis.set(_window_key(CLIENT, ENDPOINT, "per_minute", now - 60), 4)
+    
+    result = await rate_limiter.check(CLIENT, ENDPOINT)
+    assert result.allowed
+    assert result.windows["per_minute"] == 2
+    assert (await rate_limiter.check(CLIENT, ENDPOINT, weight=2)).allowed
+    assert not (await rate_limiter.check(CLIENT, ENDPOINT)).allowed
+    
+    # Refunds only take back from the current window
+    await rate_limiter.charge(CLIENT, ENDPOINT, -10)
+    assert await fake_redis.get(_window_key(CLIENT, ENDPOINT, "per_minute", now)) == "0"
+    assert (await rate_limiter.get_usage_info(CLIENT, ENDPOINT))["per_minute"]["current"] == 2
+
+@pytest.mark.asyncio
+async def test_gcra_burst_and_theoretical_arrival_time(fake_redis):
+    """Test that GCRA admits a burst of the limit and pushes the TAT by period / limit each"""
+    rate_limiter = limiter("gcra")
+    for expected in range(4, -1, -1):
+        result = await rate_limiter.check(CLIENT, ENDPOINT)
+        assert result.allowed
+        assert result.windows["per_minute"] == expected
+    assert not (await rate_limiter.check(CLIENT, ENDPOINT)).allowed
+    
+    # Five requests at 12 seconds each: the bucket is full again in a minute
+    key = f"{CacheKeys.rate_limit(CLIENT, ENDPOINT)}:per_minute:gcra"
+    tat = float(await fake_redis.get(key))
+    assert 59 < tat - time.time() <= 60
+    assert 59_000 < await fake_redis.pttl(key) <= 60_000
+
+@pytest.mark.asyncio
+async def test_gcra_refund_moves_tat_back(fake_redis):
+    """Test that a GCRA refund returns tokens and clears the state once the bucket is full"""
+    rate_limiter = limiter("gcra")
+    await rate_limiter.check(CLIENT, ENDPOINT, weight=5)
+    await rate_limiter.charge(CLIENT, ENDPOINT, -2)
+    assert (await rate_limiter.get_usage_info(CLIENT, ENDPOINT))["per_minute"]["remaining"] == 2
+    
+    await rate_limiter.charge(CLIENT, ENDPOINT, -5)
+    assert not await fake_redis.exists(f"{CacheKeys.rate_limit(CLIENT, ENDPOINT)}:per_minute:gcra")
+    assert (await rate_limiter.check(CLIENT, ENDPOINT, weight=5)).allowed
+
+@pytest.mark.asyncio
+async def test_local_limiter_over_admission_is_bounded_by_one_sync(fake_redis):
+    """Test that two workers over-admit only until their next sync"""
+    workers = [LocalRateLimiter(sync_interval_ms=60_000) for _ in range(2)]
+    for worker in workers:
+        worker.limits = {"per_minute": 5, "per_hour": 100, "per_day": 1000}
+    
+    # Without a sync in between each worker admits the whole limit
+    admitted = [sum([(await worker.check(CLIENT, ENDPOINT)).allowed for _ in range(6)]) for worker in workers]
+    assert admitted == [5, 5]
+    
+    for worker in workers:
+        await worker.sync()
+    assert await fake_redis.get(_window_key(CLIENT, ENDPOINT, "per_minute", int(time.time()))) == "10"
+    for worker in workers:
+        assert not (await worker.check(CLIENT, ENDPOINT)).allowed
+    assert (await workers[0].get_global_stats())["total_requests"] == 10
+    
+    for worker in workers:
+        await worker.close()
+
+@pytest.mark.asyncio
+async def test_local_limiter_drops_idle_counters(fake_redis):
+    """Test that counters with nothing pending are dropped once idle"""
+    worker = LocalRateLimiter(sync_interval_ms=60_000)
+    await worker.check(CLIENT, ENDPOINT)
+    await worker.sync()
+    assert len(worker._counters) == 3
+    
+    worker.idle_seconds = -1
+    await worker.sync()
+    assert not worker._counters
+    await worker.close()
@@ -0,0 +1,60 @@
+import contextvars
+
+from app.core.config import settings
+from app.core.request_cost import (
+    RequestCost,
+    admission_weight,
+    current_request_cost,
+    record_upstream_call,
+    request_weight,
+    start_request_cost
+)
+
+def in_new_context(fn):
+    """Run fn with its own copy of the request context"""
+    return contextvars.copy_context().run(fn)
+
+def test_symbols_come_from_the_query_string():
+    """Test that the symbol count is parsed from the query, with per-endpoint defaults"""
+    def parse():
+        cost = start_request_cost("/forex/latest", b"base=USD&symbols=EUR,GBP,,JPY")
+        assert current_request_cost() is cost
+        return cost.symbols, start_request_cost("/forex/latest").symbols, start_request_cost("/health").symbols
+    
+    assert in_new_context(parse) == (3, 4, 0)
+
+def test_cached_and_uncached_weight():
+    """Test that a miss costs more than a hit and large responses cost extra"""
+    assert request_weight(RequestCost("/forex/latest", symbols=4)) == 1
+    assert request_weight(RequestCost("/forex/latest", symbols=120)) == 3
+    assert request_weight(RequestCost("/forex/latest", symbols=4, upstream_calls=1)) == 2
+    assert request_weight(RequestCost("/unknown", symbols=500, upstream_calls=3)) == 1
+
+def test_per_coin_endpoints_reserve_their_fan_out():
+    """Test that per-coin endpoints are admitted at the uncached weight"""
+    cost = RequestCost("/crypto/historical", symbols=10)
+    assert request_weight(cost) == 1
+    assert admission_weight(cost) == 11
+    # Endpoints without reserve are admitted at the cached weight
+    assert admission_weight(RequestCost("/crypto/latest", symbols=10)) == 1
+
+def test_batch_weight_follows_item_count():
+    """Test that a conversion batch costs one unit per FOREX_BATCH_ITEMS_PER_UNIT items"""
+    per_unit = settings.FOREX_BATCH_ITEMS_PER_UNIT
+    assert request_weight(RequestCost("/forex/convert/batch", symbols=per_unit - 1)) == 1
+    assert request_weight(RequestCost("/forex/convert/batch", symbols=5 * per_unit)) == 6
+
+def test_upstream_calls_count_against_the_current_request():
+    """Test that upstream calls mark only the request handled in this context as a miss"""
+    def serve():
+        cost = start_request_cost("/forex/latest")
+        assert cost.cached
+        record_upstream_call()
+        return cost
+    
+    cost = in_new_context(serve)
+    assert cost.upstream_calls == 1
+    assert not cost.cached
+    assert current_request_cost() is None
+    # Outside a request there is nothing to count against
+    record_upstream_call()
@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+from app.core.singleflight import SingleFlight
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_fetch():
+    """Test that concurrent callers for one key get the result of a single call"""
+    flight = SingleFlight()
+    calls = 0
+    release = asyncio.Event()
+    
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return {"USD": 1.0}
+    
+    waiters = [asyncio.ensure_future(flight.do("forex:latest:USD", fetch)) for _ in range(10)]
+    await asyncio.sleep(0)
+    release.set()
+    assert await asyncio.gather(*waiters) == [{"USD": 1.0}] * 10
+    assert calls == 1
+    assert flight.get_stats() == {"leaders": 1, "coalesced": 9, "background": 0, "in_flight": 0}
+    
+    # Once finished, the next call fetches again
+    await flight.do("forex:latest:USD", fetch)
+    assert calls == 2
+
+@pytest.mark.asyncio
+async def test_cancelled_leader_does_not_cancel_followers():
+    """Test that a leader going away (e.g. a client disconnect) leaves the fetch running"""
+    flight = SingleFlight()
+    release = asyncio.Event()
+    
+    async def fetch():
+        await release.wait()
+        return 42
+    
+    leader = asyncio.ensure_future(flight.do("key", fetch))
+    await asyncio.sleep(0)
+    follower = asyncio.ensure_future(flight.do("key", fetch))
+    await asyncio.sleep(0)
+    leader.cancel()
+    release.set()
+    assert await follower == 42
+    assert leader.cancelled()
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_caller_and_are_not_kept():
+    """Test that a failed call raises for all waiters and is forgotten"""
+    flight = SingleFlight()
+    
+    async def fail():
+        await asyncio.sleep(0)
+        raise RuntimeError("upstream down")
+    
+    results = await asyncio.gather(*(flight.do("key", fail) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert flight.get_stats()["in_flight"] == 0
+
+@pytest.mark.asyncio
+async def test_spawn_skips_keys_in_flight():
+    """Test that a background refresh is not started twice for one key"""
+    flight = SingleFlight()
+    release = asyncio.Event()
+    
+    async def refresh():
+        await release.wait()
+    
+    assert flight.spawn("revalidate:key", refresh)
+    assert not flight.spawn("revalidate:key", refresh)
+    release.set()
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    assert flight.spawn("revalidate:key", refresh)
+    for _ in range(3):
+        await asyncio.sleep(0)
+    assert flight.get_stats() == {"leaders": 0, "coalesced": 0, "background": 2, "in_flight": 0}